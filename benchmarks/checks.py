@@ -0,0 +1,138 @@
+"""Детерминированные проверки на регрессии: без pytest, каждая падает на assert.
+
+Запуск из корня репозитория:
+    python -m benchmarks.checks
+"""
+import os
+import tempfile
+
+import numpy as np
+
+
+def check_offscreen_frames():
+    # Кадры без output возвращаются списком: каждый должен быть своим массивом, а не видом буфера холста
+    import creeper_1
+    from offscreen import render_frames, spin_states
+    creeper = creeper_1.Creeper()
+    images = render_frames(creeper, spin_states(creeper, 3), fmt='rgb')['images']
+    assert not np.shares_memory(images[0], images[2]), 'кадры ссылаются на общий буфер'
+    assert not np.array_equal(images[0], images[1]), 'разные состояния дали одинаковые кадры'
+    creeper.update_plot()
+    assert np.array_equal(images[-1], creeper.grab_frame()), 'последний кадр не совпал с перерисовкой'
+
+
+def check_parallel_rgb():
+    # Пул процессов с кусками по 2 кадра должен выдать те же байты, что и один процесс
+    import creeper_1
+    from offscreen import compare_frames, render_frames, render_frames_parallel, spin_states
+    states = spin_states(creeper_1.Creeper(), 12)
+    with tempfile.TemporaryDirectory() as directory:
+        single, parallel = os.path.join(directory, 'single.rgb'), os.path.join(directory, 'parallel.rgb')
+        render_frames(creeper_1.Creeper(), states, single, 'rgb')
+        render_frames_parallel('creeper_1', states, parallel, 'rgb', workers=3, chunk_size=2)
+        assert os.path.getsize(single) == os.path.getsize(parallel), 'разное число байт'
+        assert compare_frames('rgb', parallel, single, len(states)) is None, 'кадры пула отличаются от одного процесса'
+        with open(parallel, 'r+b') as file:
+            file.seek(-1, os.SEEK_END)
+            last = file.read(1)
+            file.seek(-1, os.SEEK_END)
+            file.write(bytes([last[0] ^ 1]))
+        assert compare_frames('rgb', parallel, single, len(states)) == len(states) - 1, 'сравнение не видит расхождение'
+
+
+def check_raster_edges():
+    # Сглаженная линия у края буфера: соседний пиксель с индексом -1 не должен заворачиваться в другую строку
+    from raster import new_framebuffer, rasterize_lines
+    background = (255, 255, 255)
+    shallow = rasterize_lines(new_framebuffer(20, 10, background), np.array([[0.4, 0.0]]), np.array([[19.0, 2.0]]),
+                              (0, 0, 0), antialiased=True)
+    drawn = np.any(shallow != background, axis=2)
+    assert not drawn[3:].any(), 'пологая линия у нижнего края задела дальние строки'
+    steep = rasterize_lines(new_framebuffer(10, 20, background), np.array([[0.0, 0.4]]), np.array([[2.0, 19.0]]),
+                            (0, 0, 0), antialiased=True)
+    drawn = np.any(steep != background, axis=2)
+    assert not drawn[:, 3:].any(), 'крутая линия у левого края задела дальние столбцы'
+    assert drawn[:, 0].sum() > 5 and drawn[-1].any(), 'линия нарисована не целиком'
+
+
+def check_obj_relative_indices():
+    # Отрицательный индекс считается от вершин, объявленных выше строки, а не от конца файла
+    from mesh_loader import parse_obj
+    text = ('v 0 0 0\nv 1 0 0\nv 0 1 0\nf -3 -2 -1\n'
+            'v 5 0 0\nv 6 0 0\nv 5 1 0\nf -3 -2 -1\nl 1 -1\n')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'relative.obj')
+        with open(path, 'w') as file:
+            file.write(text)
+        points, edges = parse_obj(path)
+    assert len(points) == 6
+    expected = {(0, 1), (1, 2), (0, 2), (3, 4), (4, 5), (3, 5), (0, 5)}
+    assert {tuple(sorted(edge)) for edge in edges.tolist()} == expected, \
+        'треугольники с относительными индексами потеряны'
+    # Индекс -4 при трех объявленных вершинах указывает до начала файла
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'broken.obj')
+        with open(path, 'w') as file:
+            file.write('v 0 0 0\nv 1 0 0\nv 0 1 0\nf -4 -2 -1\n')
+        try:
+            parse_obj(path)
+        except ValueError as error:
+            assert '[-1]' in str(error), f'неверный индекс в сообщении: {error}'
+        else:
+            raise AssertionError('индекс до начала файла не обнаружен')
+
+
+def check_mesh_cache():
+    # Кэш без одного из массивов пересобирается, а незаписываемый кэш не мешает загрузке
+    from mesh_loader import _cache_paths, load_mesh
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'triangle.obj')
+        with open(path, 'w') as file:
+            file.write('v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n')
+        points_path, edges_path, meta_path = _cache_paths(path)
+        load_mesh(path)
+        os.remove(edges_path)
+        compact, edges = load_mesh(path)
+        assert len(compact) == 3 and len(edges) == 3 and os.path.exists(edges_path), 'кэш не пересобран'
+        for name in (points_path, edges_path, meta_path):
+            os.remove(name)
+        # Каталог на месте файла кэша: запись падает с OSError, как в каталоге только для чтения
+        os.mkdir(points_path)
+        compact, edges = load_mesh(path)
+        assert len(compact) == 3 and len(edges) == 3 and not os.path.exists(meta_path)
+
+
+def check_compact_geometry():
+    # Загруженная модель остается CompactPoints: без копии во float64 и с теми же объемами и кадром
+    import creeper_2
+    from mesh_loader import load_into
+    from transforms import CompactPoints, transform_points
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'quad.obj')
+        with open(path, 'w') as file:
+            file.write('v 0 0 0\nv 2 0 0\nv 2 1 0\nv 0 1 3\nf 1 2 3 4\n')
+        creeper = load_into(creeper_2.Creeper(), path)
+        points = creeper.original_points
+        assert isinstance(points, CompactPoints) and points.coords.dtype == np.float32
+        homogeneous = points.to_homogeneous()
+        assert np.allclose(creeper.bounds.box, ((0, 0, 0), (2, 1, 3)))
+        world = creeper.apply_transformations()
+        assert world.shape == (4, 3)
+        assert np.allclose(world, transform_points(creeper.get_transformation_matrix(), homogeneous)[:, :3])
+        creeper.move_vertex(0, (1.0, 1.0, 1.0))
+        assert np.array_equal(load_into(creeper_2.Creeper(), path).original_points.coords[:, 0], (0, 0, 0)), \
+            'правка вершины попала в кэш на диске'
+
+
+CHECKS = [check_offscreen_frames, check_parallel_rgb, check_raster_edges, check_obj_relative_indices,
+          check_mesh_cache, check_compact_geometry]
+
+
+def main():
+    for check in CHECKS:
+        check()
+        print(f'{check.__name__}: ok')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Сравнение однородных точек float64 и компактного хранения CompactPoints (float32, без столбца единиц).
+
+Запуск из корня репозитория:
+    python -m benchmarks.compact
+    python -m benchmarks.compact --sizes 1000 1000000 --dim 3
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.transform import best_time, make_matrix, make_points
+from transforms import CompactPoints, transform_compact, transform_points
+
+
+def run(sizes, dim, repeat):
+    rng = np.random.default_rng(0)
+    matrix = make_matrix(dim, rng)
+    rows = []
+    for n in sizes:
+        points = make_points(n, dim, rng)
+        compact = CompactPoints.from_homogeneous(points)
+        out = np.empty_like(points)
+        compact_out = np.empty_like(compact.coords)
+        full = best_time(lambda: transform_points(matrix, points, out=out), repeat)
+        packed = best_time(lambda: transform_compact(matrix, compact, out=compact_out), repeat)
+        reference = transform_points(matrix, points)[:, :-1]
+        # Относительная ошибка float32 по сравнению с float64
+        error = np.abs(transform_compact(matrix, compact).T - reference).max() / np.abs(reference).max()
+        rows.append((n, points.nbytes, compact.nbytes, full, packed, error))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** k for k in range(2, 7)])
+    parser.add_argument('--dim', type=int, choices=(3, 4), default=4)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"N":>9} {"float64, КБ":>12} {"компакт, КБ":>12} {"экономия":>9} '
+          f'{"float64, мс":>12} {"компакт, мс":>12} {"ошибка":>9}')
+    for n, full_bytes, packed_bytes, full, packed, error in run(args.sizes, args.dim, args.repeat):
+        saving = 1 - packed_bytes / full_bytes
+        print(f'{n:>9} {full_bytes / 1024:12.1f} {packed_bytes / 1024:12.1f} {saving:8.0%} '
+              f'{full * 1e3:12.3f} {packed * 1e3:12.3f} {error:9.1e}')
+        assert error < 1e-5, 'компактный путь разошелся с float64'
+
+
+if __name__ == '__main__':
+    main()
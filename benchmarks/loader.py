@@ -0,0 +1,110 @@
+"""Время загрузки и занимаемая память для большой модели: разбор OBJ и отображение кэша в память.
+
+Каждый этап запускается в отдельном процессе, чтобы память одного не
+влияла на другой. Этапы load_into и load_fit загружают кэш в крипер
+creeper_2 (без fit и с fit), а первое преобразование делает сам крипер.
+Запуск из корня репозитория:
+    python -m benchmarks.loader
+    python -m benchmarks.loader --vertices 3000000 --path /tmp/grid.obj
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from mesh_loader import load_into, load_mesh
+from transforms import transform_compact
+
+
+# Кэш создается этапом first, следующие этапы его отображают
+PHASES = ('parse', 'first', 'cached', 'load_into', 'load_fit')
+
+
+def resident_memory_mb():
+    # Текущий RSS процесса; /proc есть только в Linux, иначе пиковый RSS
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_grid_obj(path, vertices):
+    """Сетка side x side вершин, разбитая на треугольники."""
+    side = int(np.sqrt(vertices))
+    y, x = np.divmod(np.arange(side * side), side)
+    points = np.column_stack((x, y, np.sin(x / 10.0) * np.cos(y / 10.0)))
+    cells = (np.arange(side - 1)[:, None] * side + np.arange(side - 1)).ravel() + 1
+    faces = np.concatenate((np.column_stack((cells, cells + 1, cells + side)),
+                            np.column_stack((cells + 1, cells + side + 1, cells + side))))
+    with open(path, 'w') as file:
+        np.savetxt(file, points, fmt='v %.4f %.4f %.4f')
+        np.savetxt(file, faces, fmt='f %d %d %d')
+    return len(points), len(faces)
+
+
+def run_phase(phase, path):
+    creeper = None
+    if phase in ('load_into', 'load_fit'):
+        # Крипер и matplotlib создаются до замера, чтобы RSS показывал только модель
+        from creeper_2 import Creeper
+        creeper = Creeper()
+    base = resident_memory_mb()
+    start = time.perf_counter()
+    if creeper is None:
+        compact, edges = load_mesh(path, cache=phase != 'parse')
+    else:
+        load_into(creeper, path, fit=phase == 'load_fit')
+        compact, edges = creeper.original_points, creeper.edges
+    seconds = time.perf_counter() - start
+    loaded = resident_memory_mb()
+    # Первое полное преобразование подтягивает в память страницы отображенного кэша
+    start = time.perf_counter()
+    if creeper is None:
+        transform_compact(np.eye(4), compact)
+    else:
+        creeper.apply_transformations()
+    first_transform = time.perf_counter() - start
+    return {'phase': phase, 'vertices': len(compact), 'edges': len(edges), 'seconds': seconds,
+            'first_transform': first_transform, 'rss_mb': loaded - base,
+            'rss_after_transform_mb': resident_memory_mb() - base}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vertices', type=int, default=1000000)
+    parser.add_argument('--path', help='файл OBJ; создается, если его нет')
+    parser.add_argument('--phase', choices=PHASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        print(json.dumps(run_phase(args.phase, args.path)))
+        return
+
+    path = args.path or os.path.join(tempfile.gettempdir(), f'grid_{args.vertices}.obj')
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        vertices, faces = write_grid_obj(path, args.vertices)
+        print(f'создан {path}: {vertices} вершин, {faces} треугольников за {time.perf_counter() - start:.1f} с')
+    for suffix in ('.points.npy', '.edges.npy', '.cache.json'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    print(f'{"этап":<9} {"вершин":>9} {"ребер":>9} {"загрузка, с":>12} {"1-е преобр., с":>15} '
+          f'{"RSS, МБ":>9} {"RSS после, МБ":>14}')
+    for phase in PHASES:
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.loader', '--phase', phase, '--path', path],
+                                check=True, capture_output=True, text=True).stdout
+        row = json.loads(output)
+        print(f'{phase:<9} {row["vertices"]:>9} {row["edges"]:>9} {row["seconds"]:12.3f} '
+              f'{row["first_transform"]:15.4f} {row["rss_mb"]:9.1f} {row["rss_after_transform_mb"]:14.1f}')
+
+
+if __name__ == '__main__':
+    main()
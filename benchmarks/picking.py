@@ -0,0 +1,59 @@
+"""Задержка выбора вершины и ребра под курсором по сетке PickIndex.
+
+Запуск из корня репозитория:
+    python -m benchmarks.picking
+    python -m benchmarks.picking --sizes 1000 1000000 --radius 8
+"""
+import argparse
+import time
+
+import numpy as np
+
+from picking import PickIndex
+
+
+def make_mesh(n, rng, width=1200):
+    # Точки на экране и ребра между соседями по порядку обхода сетки
+    side = int(np.ceil(np.sqrt(n)))
+    grid = np.stack(np.meshgrid(np.arange(side), np.arange(side), indexing='ij'), axis=-1).reshape(-1, 2)[:n]
+    points = (grid + rng.uniform(-0.3, 0.3, grid.shape)) * (width / side)
+    edges = np.column_stack((np.arange(n - 1), np.arange(1, n)))
+    return points, edges[np.abs(np.diff(grid[:n], axis=0)).sum(axis=1) == 1]
+
+
+def run(sizes, radius, queries):
+    rng = np.random.default_rng(0)
+    rows = []
+    for n in sizes:
+        points, edges = make_mesh(n, rng)
+        start = time.perf_counter()
+        index = PickIndex(points, edges)
+        build = time.perf_counter() - start
+        index.nearest_edge(0.0, 0.0, radius)
+        cursor = rng.uniform(0, points.max(), (queries, 2))
+        start = time.perf_counter()
+        for x, y in cursor:
+            index.nearest_vertex(x, y, radius)
+        vertex = (time.perf_counter() - start) / queries
+        start = time.perf_counter()
+        for x, y in cursor:
+            index.nearest_edge(x, y, radius)
+        edge = (time.perf_counter() - start) / queries
+        rows.append((n, build, vertex, edge))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** k for k in range(2, 7)])
+    parser.add_argument('--radius', type=float, default=8.0, help='радиус выбора в пикселях')
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f'{"N":>9} {"сетка, мс":>10} {"вершина, мс":>12} {"ребро, мс":>10}')
+    for n, build, vertex, edge in run(args.sizes, args.radius, args.queries):
+        print(f'{n:>9} {build * 1e3:10.1f} {vertex * 1e3:12.4f} {edge * 1e3:10.4f}')
+
+
+if __name__ == '__main__':
+    main()
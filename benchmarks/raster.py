@@ -0,0 +1,61 @@
+"""Скорость программного растеризатора raster.py на крипере и на больших каркасах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.raster
+    python -m benchmarks.raster --edges 1000 100000 --size 1920 1080
+"""
+import argparse
+import time
+
+import numpy as np
+
+from creeper_1 import Creeper
+from raster import new_framebuffer, rasterize_lines
+
+
+def frames_per_second(func, min_time=0.5):
+    frames = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        func(frames)
+        frames += 1
+    return frames / (time.perf_counter() - start)
+
+
+def bench_creeper(width, height, antialiased):
+    creeper = Creeper()
+    framebuffer = new_framebuffer(width, height)
+
+    def frame(i):
+        creeper.rotation_angle = i
+        creeper.rasterize(width, height, antialiased, out=framebuffer)
+
+    return frames_per_second(frame)
+
+
+def bench_random_edges(count, width, height, antialiased):
+    # Короткие ребра, как в плотной сетке: длина до 2% ширины кадра
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, (width, height), size=(count, 2))
+    ends = starts + rng.uniform(-0.02, 0.02, size=(count, 2)) * width
+    framebuffer = new_framebuffer(width, height)
+    return frames_per_second(lambda i: rasterize_lines(framebuffer, starts, ends, (0, 0, 0), antialiased))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--edges', type=int, nargs='+', default=[10 ** 3, 10 ** 4, 10 ** 5])
+    parser.add_argument('--size', type=int, nargs=2, default=(800, 800), metavar=('W', 'H'))
+    args = parser.parse_args()
+    width, height = args.size
+
+    print(f'{"сцена":>16} {"кадр/с":>10} {"кадр/с (AA)":>12}')
+    print(f'{"крипер":>16} {bench_creeper(width, height, False):10.1f} {bench_creeper(width, height, True):12.1f}')
+    for count in args.edges:
+        aliased = bench_random_edges(count, width, height, False)
+        smooth = bench_random_edges(count, width, height, True)
+        print(f'{f"{count} ребер":>16} {aliased:10.1f} {smooth:12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Сравнение поворота тремя матрицами Эйлера и кватернионом.
+
+Запуск из корня репозитория:
+    python -m benchmarks.rotation
+    python -m benchmarks.rotation --steps 100000
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.transform import best_time
+from quaternion import QuaternionRotation
+
+
+# Прежние матрицы поворота криперов вокруг осей, оставлены только для сравнения
+def get_rotation_x_matrix(angle_deg):
+    angle_rad = np.radians(angle_deg)
+    return np.array([
+        [1, 0, 0, 0],
+        [0, np.cos(angle_rad), -np.sin(angle_rad), 0],
+        [0, np.sin(angle_rad), np.cos(angle_rad), 0],
+        [0, 0, 0, 1]
+    ])
+
+
+def get_rotation_y_matrix(angle_deg):
+    angle_rad = np.radians(angle_deg)
+    return np.array([
+        [np.cos(angle_rad), 0, np.sin(angle_rad), 0],
+        [0, 1, 0, 0],
+        [-np.sin(angle_rad), 0, np.cos(angle_rad), 0],
+        [0, 0, 0, 1]
+    ])
+
+
+def get_rotation_z_matrix(angle_deg):
+    angle_rad = np.radians(angle_deg)
+    return np.array([
+        [np.cos(angle_rad), -np.sin(angle_rad), 0, 0],
+        [np.sin(angle_rad), np.cos(angle_rad), 0, 0],
+        [0, 0, 1, 0],
+        [0, 0, 0, 1]
+    ])
+
+
+def euler_chain(x, y, z):
+    # Прежний вариант: три матрицы 4x4 и два произведения на каждый кадр
+    return get_rotation_z_matrix(z) @ get_rotation_y_matrix(y) @ get_rotation_x_matrix(x)
+
+
+def quaternion_frame(rotation, axis, step):
+    # Новый вариант: одно домножение кватерниона на клавишу и одна матрица на кадр
+    rotation.rotate(axis, step)
+    return rotation.get_matrix()
+
+
+def drift(steps, renormalize_every):
+    """Отклонение матрицы от ортогональной после steps поворотов на 5°."""
+    rotation = QuaternionRotation(renormalize_every)
+    for i in range(steps):
+        rotation.rotate('xyz'[i % 3], 5.0)
+    matrix = rotation.get_matrix()[:3, :3]
+    return np.abs(matrix.T @ matrix - np.eye(3)).max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--steps', type=int, default=10000, help='число поворотов для оценки накопленной ошибки')
+    args = parser.parse_args()
+
+    rotation = QuaternionRotation()
+    chain = best_time(lambda: euler_chain(10.0, 20.0, 30.0), args.repeat)
+    quaternion = best_time(lambda: quaternion_frame(rotation, 'y', 5.0), args.repeat)
+    matrix_only = best_time(rotation.get_matrix, args.repeat)
+    euler = best_time(lambda: rotation.set_euler(10.0, 20.0, 30.0) or rotation.get_euler(), args.repeat)
+
+    print(f'{"вариант":<36} {"мкс на кадр":>12}')
+    print(f'{"три матрицы Эйлера":<36} {chain * 1e6:12.2f}')
+    print(f'{"кватернион: поворот + матрица":<36} {quaternion * 1e6:12.2f}')
+    print(f'{"кватернион: только матрица":<36} {matrix_only * 1e6:12.2f}')
+    print(f'{"углы Эйлера -> кватернион -> углы":<36} {euler * 1e6:12.2f}')
+    print(f'ускорение: {chain / quaternion:.1f}x (с поворотом), {chain / matrix_only:.1f}x (только матрица)')
+    print(f'ошибка ортогональности после {args.steps} поворотов: '
+          f'{drift(args.steps, 32):.1e} с нормировкой, {drift(args.steps, args.steps + 1):.1e} без нее')
+
+
+if __name__ == '__main__':
+    main()
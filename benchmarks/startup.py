@@ -0,0 +1,51 @@
+"""Время импорта модулей в чистом интерпретаторе и подтянутые ими библиотеки графики.
+
+Запуск из корня репозитория:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --modules geometry creeper_m --repeat 10
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+MODULES = ['transforms', 'geometry', 'bounds', 'quaternion', 'camera', 'hidden_line', 'raster', 'instancing',
+           'lod', 'picking', 'mesh_loader', 'timeline', 'offscreen', 'main', 'creeper_1', 'creeper_2', 'creeper_m']
+BACKENDS = ['matplotlib', 'matplotlib.pyplot', 'mpl_toolkits.mplot3d', 'plotly', 'plotly.graph_objects']
+
+# Код замера в отдельном процессе: numpy импортируется заранее, он нужен всем модулям
+PROBE = '''
+import json, sys, time
+import numpy
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [name for name in {backends!r} if name in sys.modules]}}))
+'''
+
+
+def measure(module, repeat):
+    """Лучшее из repeat время импорта module (без numpy) и загруженные им библиотеки графики."""
+    best, loaded = float('inf'), []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(module=module, backends=BACKENDS)],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        best, loaded = min(best, result['seconds']), result['loaded']
+    return best, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"модуль":<12} {"импорт, мс":>11}  графика')
+    for module in args.modules:
+        seconds, loaded = measure(module, args.repeat)
+        print(f'{module:<12} {seconds * 1e3:11.1f}  {", ".join(loaded) or "-"}')
+
+
+if __name__ == '__main__':
+    main()
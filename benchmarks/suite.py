@@ -0,0 +1,149 @@
+"""Набор замеров этапов кадра для creeper_1, creeper_2 и creeper_m с записью в JSON.
+
+Меряются apply_transformations, world_to_screen/screen_to_world, обход ребер
+(сборка отрезков или ломаной) и update_plot на стандартном крипере и на
+синтетических сетках от 10^2 до 10^6 вершин. Результат пишется в JSON, и
+его можно сравнить с прошлым запуском через --compare.
+
+Запуск из корня репозитория:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --variants creeper_1 --sizes 100 10000 --compare bench.json
+"""
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import time
+
+import matplotlib
+import numpy as np
+
+from benchmarks.transform import best_time
+from geometry import edge_polyline, edge_segments
+from mesh_loader import set_geometry
+from transforms import CompactPoints
+
+VARIANTS = ('creeper_1', 'creeper_2', 'creeper_m')
+
+
+def grid_mesh(vertices):
+    """Сетка side x side в пределах окна [-15, 15] с ребрами по строкам и столбцам."""
+    side = max(2, int(round(np.sqrt(vertices))))
+    y, x = np.divmod(np.arange(side * side), side)
+    coords = np.vstack((x, y, np.sin(x / 5.0) + np.cos(y / 5.0))).astype(np.float32)
+    coords[:2] = coords[:2] * 30.0 / (side - 1) - 15.0
+    index = np.arange(side * side).reshape(side, side)
+    edges = np.vstack((np.column_stack((index[:, :-1].ravel(), index[:, 1:].ravel())),
+                       np.column_stack((index[:-1].ravel(), index[1:].ravel()))))
+    return CompactPoints(coords), edges
+
+
+def make_creeper(module, mesh):
+    creeper = module.Creeper()
+    if mesh is not None:
+        set_geometry(creeper, *mesh)
+    if module.__name__ == 'creeper_m':
+        creeper.use_widget = False
+        creeper.create_figure()
+    else:
+        creeper.create_offscreen_figure(figsize=(6, 6), dpi=50)
+    return creeper
+
+
+def bench_creeper(module, mesh, repeat, draw_limit):
+    creeper = make_creeper(module, mesh)
+    vertices = len(creeper.original_points)
+    stages = {}
+
+    def transform():
+        creeper.transform_cache.invalidate()
+        return creeper.apply_transformations()
+
+    stages['apply_transformations'] = best_time(transform, repeat)
+    world_points = transform()
+    if hasattr(creeper, 'world_to_screen'):
+        screen_points = creeper.world_to_screen(world_points)
+        stages['world_to_screen'] = best_time(lambda: creeper.world_to_screen(world_points), repeat)
+        stages['screen_to_world'] = best_time(lambda: creeper.screen_to_world(screen_points), repeat)
+        stages['edge_iteration'] = best_time(lambda: edge_segments(screen_points, creeper.edges), repeat)
+    else:
+        stages['edge_iteration'] = best_time(lambda: edge_polyline(world_points[:, :3], creeper.edges), repeat)
+    if vertices <= draw_limit:
+        # update_plot целиком: проверка видимости, преобразование, артисты и отрисовка
+        def update():
+            creeper.transform_cache.invalidate()
+            creeper.update_plot()
+
+        stages['update_plot'] = best_time(update, repeat)
+    return vertices, len(creeper.edges), stages
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    versions = {'python': platform.python_version(), 'numpy': np.__version__,
+                'matplotlib': matplotlib.__version__}
+    try:
+        import plotly
+        versions['plotly'] = plotly.__version__
+    except ImportError:
+        pass
+    return {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(), 'machine': platform.machine(), 'versions': versions}
+
+
+def run(variants, sizes, repeat, draw_limit):
+    results = []
+    for name in variants:
+        try:
+            module = importlib.import_module(name)
+        except ImportError as error:
+            print(f'{name}: пропущен ({error})')
+            continue
+        for size in [None] + list(sizes):
+            mesh = None if size is None else grid_mesh(size)
+            vertices, edges, stages = bench_creeper(module, mesh, repeat, draw_limit)
+            for stage, seconds in stages.items():
+                results.append({'variant': name, 'mesh': 'creeper' if size is None else 'grid',
+                                'vertices': vertices, 'edges': edges, 'stage': stage, 'seconds': seconds})
+    return results
+
+
+def result_key(row):
+    return row['variant'], row['mesh'], row['vertices'], row['stage']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** k for k in range(2, 7)])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--draw-limit', type=int, default=10 ** 5,
+                        help='максимальное число вершин, для которого меряется update_plot')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='JSON прошлого запуска для сравнения')
+    args = parser.parse_args()
+
+    matplotlib.use('Agg')
+    results = run(args.variants, args.sizes, args.repeat, args.draw_limit)
+    with open(args.output, 'w') as file:
+        json.dump({'meta': metadata(), 'results': results}, file, indent=1)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = {result_key(row): row['seconds'] for row in json.load(file)['results']}
+    print(f'{"вариант":<10} {"сетка":<8} {"вершин":>9} {"этап":<22} {"мс":>10} {"к прошлому":>11}')
+    for row in results:
+        old = baseline.get(result_key(row))
+        ratio = f'{row["seconds"] / old:10.2f}x' if old else f'{"-":>11}'
+        print(f'{row["variant"]:<10} {row["mesh"]:<8} {row["vertices"]:>9} {row["stage"]:<22} '
+              f'{row["seconds"] * 1e3:10.3f} {ratio}')
+    print(f'результаты записаны в {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Сравнение покомпонентного цикла и пакетного ядра transform_points.
+
+Запуск из корня репозитория:
+    python -m benchmarks.transform
+    python -m benchmarks.transform --sizes 100 10000 1000000 --dim 3
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from transforms import transform_points
+
+
+def loop_transform(matrix, points):
+    # Старый вариант из apply_transformations: по одной вершине за раз
+    transformed_points = np.zeros_like(points)
+    for i in range(len(points)):
+        transformed_points[i] = matrix @ points[i]
+    return transformed_points
+
+
+def make_points(n, dim, rng):
+    points = rng.uniform(-20, 20, size=(n, dim))
+    points[:, -1] = 1.0
+    return points
+
+
+def make_matrix(dim, rng):
+    matrix = np.eye(dim)
+    matrix[:-1, :] = rng.uniform(-1, 1, size=(dim - 1, dim))
+    return matrix
+
+
+def best_time(func, repeat):
+    number = 1
+    # Подбираем число повторов, чтобы одно измерение длилось хотя бы ~20 мс
+    while timeit.timeit(func, number=number) < 0.02 and number < 10 ** 6:
+        number *= 10
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def run(sizes, dim, repeat, loop_limit):
+    rng = np.random.default_rng(0)
+    matrix = make_matrix(dim, rng)
+    rows = []
+    for n in sizes:
+        points = make_points(n, dim, rng)
+        out = np.empty_like(points)
+        batched = best_time(lambda: transform_points(matrix, points), repeat)
+        batched_out = best_time(lambda: transform_points(matrix, points, out=out), repeat)
+        looped = None
+        if n <= loop_limit:
+            looped = best_time(lambda: loop_transform(matrix, points), repeat)
+            assert np.allclose(loop_transform(matrix, points), transform_points(matrix, points))
+        rows.append((n, looped, batched, batched_out))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** k for k in range(2, 7)])
+    parser.add_argument('--dim', type=int, choices=(3, 4), default=4)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--loop-limit', type=int, default=10 ** 5,
+                        help='максимальное N, для которого меряется медленный цикл')
+    args = parser.parse_args()
+
+    print(f'{"N":>9} {"цикл, мс":>12} {"пакетно, мс":>12} {"out=, мс":>12} {"ускорение":>10}')
+    for n, looped, batched, batched_out in run(args.sizes, args.dim, args.repeat, args.loop_limit):
+        looped_str = f'{looped * 1e3:12.3f}' if looped is not None else f'{"-":>12}'
+        speedup_str = f'{looped / batched_out:9.1f}x' if looped is not None else f'{"-":>10}'
+        print(f'{n:>9} {looped_str} {batched * 1e3:12.3f} {batched_out * 1e3:12.3f} {speedup_str}')
+
+
+if __name__ == '__main__':
+    main()
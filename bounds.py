@@ -0,0 +1,66 @@
+import numpy as np
+
+from transforms import point_coords
+
+# Результат проверки объема против окна просмотра
+OUTSIDE = 0
+PARTIAL = 1
+INSIDE = 2
+
+
+def bounding_box(points):
+    """Осевой ограничивающий параллелепипед однородных точек (N, D) или CompactPoints: углы lo, hi размера D - 1."""
+    coords = point_coords(points)
+    return coords.min(axis=0).astype(float), coords.max(axis=0).astype(float)
+
+
+def bounding_sphere(points):
+    """Ограничивающая сфера с центром в середине параллелепипеда: центр и радиус."""
+    lo, hi = bounding_box(points)
+    center = (lo + hi) / 2
+    radius = np.sqrt(np.max(np.sum((point_coords(points) - center) ** 2, axis=1)))
+    return center, radius
+
+
+def transform_box(matrix, lo, hi):
+    """Параллелепипед после аффинной матрицы (D, D) или стека (M, D, D) без обхода вершин (метод Арво)."""
+    linear, offset = matrix[..., :-1, :-1], matrix[..., :-1, -1]
+    center = linear @ ((lo + hi) / 2) + offset
+    half = np.abs(linear) @ ((hi - lo) / 2)
+    return center - half, center + half
+
+
+def transform_sphere(matrix, center, radius):
+    """Сфера после аффинной матрицы: радиус растягивается на наибольшее сингулярное число."""
+    linear, offset = matrix[..., :-1, :-1], matrix[..., :-1, -1]
+    return linear @ center + offset, radius * np.linalg.norm(linear, 2, axis=(-2, -1))
+
+
+def classify_box(lo, hi, window_lo, window_hi):
+    """OUTSIDE, PARTIAL или INSIDE для параллелепипеда (или стека параллелепипедов) относительно окна."""
+    outside = np.any((hi < window_lo) | (lo > window_hi), axis=-1)
+    inside = np.all((lo >= window_lo) & (hi <= window_hi), axis=-1)
+    return np.where(outside, OUTSIDE, np.where(inside, INSIDE, PARTIAL))
+
+
+class Bounds:
+    """Ограничивающие объемы модели, посчитанные один раз по исходным точкам.
+
+    Для 2D-модели хранится только параллелепипед, для 3D - еще и сфера.
+    Оба объема консервативны, поэтому модель невидима, если вне окна
+    оказался любой из них, и целиком видима, если внутри любой из них.
+    """
+
+    def __init__(self, points):
+        self.box = bounding_box(points)
+        self.sphere = bounding_sphere(points) if point_coords(points).shape[1] == 3 else None
+
+    def classify(self, matrix, window_lo, window_hi):
+        """Проверка модели с матрицей (D, D) или экземпляров со стеком (M, D, D) против окна."""
+        result = classify_box(*transform_box(matrix, *self.box), window_lo, window_hi)
+        if self.sphere is not None:
+            center, radius = transform_sphere(matrix, *self.sphere)
+            radius = np.asarray(radius)[..., None]
+            sphere = classify_box(center - radius, center + radius, window_lo, window_hi)
+            result = np.where((result == OUTSIDE) | (sphere == OUTSIDE), OUTSIDE, np.maximum(result, sphere))
+        return result[()]
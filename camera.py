@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class Camera:
+    """Камера с видовой матрицей look-at и перспективной или ортографической проекцией.
+
+    Ось y направлена вверх, как у модели крипера. get_screen_matrix(width, height)
+    объединяет вид, проекцию и переход в пиксели в одну матрицу 4x4, которая
+    ставится слева от матрицы модели: после нее точки остаются однородными
+    (x, y, z, w), и пиксели получаются делением на w. Ближняя плоскость
+    отсечения в этих координатах - это z = 0 (видимая часть z >= 0).
+    """
+
+    def __init__(self, eye=(0.0, 0.0, 60.0), target=(0.0, 0.0, 0.0), up=(0.0, 1.0, 0.0),
+                 fov=45.0, near=1.0, far=500.0, projection='perspective', ortho_height=40.0):
+        self.eye = np.array(eye, dtype=float)
+        self.target = np.array(target, dtype=float)
+        self.up = np.array(up, dtype=float)
+        self.fov = fov
+        self.near = near
+        self.far = far
+        self.projection = projection
+        self.ortho_height = ortho_height
+
+    def orbit(self, azimuth_deg, elevation_deg, distance=None):
+        """Ставит камеру на сферу вокруг цели: азимут вокруг оси y, возвышение над плоскостью xz."""
+        if distance is None:
+            distance = np.linalg.norm(self.eye - self.target)
+        azimuth, elevation = np.radians(azimuth_deg), np.radians(elevation_deg)
+        offset = np.array([np.cos(elevation) * np.sin(azimuth),
+                           np.sin(elevation),
+                           np.cos(elevation) * np.cos(azimuth)])
+        self.eye = self.target + distance * offset
+
+    def get_view_matrix(self):
+        forward = self.target - self.eye
+        forward /= np.linalg.norm(forward)
+        right = np.cross(forward, self.up)
+        if np.linalg.norm(right) < 1e-9:
+            # Взгляд вдоль up (например, orbit с возвышением ±90°): вверх берем ось, ближайшую к перпендикуляру
+            right = np.cross(forward, np.eye(3)[np.argmin(np.abs(forward))])
+        right /= np.linalg.norm(right)
+        true_up = np.cross(right, forward)
+        return np.array([
+            [*right, -right @ self.eye],
+            [*true_up, -true_up @ self.eye],
+            [*-forward, forward @ self.eye],
+            [0, 0, 0, 1]
+        ])
+
+    def get_projection_matrix(self, aspect):
+        near, far = self.near, self.far
+        if self.projection == 'orthographic':
+            top = self.ortho_height / 2
+            right = top * aspect
+            return np.array([
+                [1 / right, 0, 0, 0],
+                [0, 1 / top, 0, 0],
+                [0, 0, -2 / (far - near), -(far + near) / (far - near)],
+                [0, 0, 0, 1]
+            ])
+        if self.projection != 'perspective':
+            raise ValueError(f"Неизвестная проекция: {self.projection}")
+        f = 1 / np.tan(np.radians(self.fov) / 2)
+        return np.array([
+            [f / aspect, 0, 0, 0],
+            [0, f, 0, 0],
+            [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+            [0, 0, -1, 0]
+        ])
+
+    def get_viewport_matrix(self, width, height):
+        # Из отсекающих координат сразу в пиксели (ось y вниз) и глубину [0, 1]; деление на w - после
+        return np.array([
+            [(width - 1) / 2, 0, 0, (width - 1) / 2],
+            [0, -(height - 1) / 2, 0, (height - 1) / 2],
+            [0, 0, 0.5, 0.5],
+            [0, 0, 0, 1]
+        ])
+
+    def get_screen_matrix(self, width, height):
+        return (self.get_viewport_matrix(width, height)
+                @ self.get_projection_matrix(width / height)
+                @ self.get_view_matrix())
+
+
+def clip_edges_near(screen_points, edges):
+    """Отсекает ребра ближней плоскостью и делит на w.
+
+    screen_points - однородные точки (N, 4) после матрицы get_screen_matrix.
+    Возвращает отрезки (E', 2, 3) с пиксельными x, y и глубиной, а также
+    индексы ребер, от которых осталась видимая часть.
+    """
+    start = screen_points[edges[:, 0]]
+    end = screen_points[edges[:, 1]]
+    d0, d1 = start[:, 2], end[:, 2]
+    keep = (d0 >= 0) | (d1 >= 0)
+    start, end, d0, d1 = start[keep], end[keep], d0[keep], d1[keep]
+    # Конец за ближней плоскостью переносим в точку пересечения ребра с ней
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = d0 / (d0 - d1)
+        clipped = start + t[:, None] * (end - start)
+    crossing = ((d0 < 0) | (d1 < 0))[:, None]
+    start = np.where(crossing & (d0 < 0)[:, None], clipped, start)
+    end = np.where(crossing & (d1 < 0)[:, None], clipped, end)
+    segments = np.stack((start, end), axis=1)
+    segments = segments[:, :, :3] / segments[:, :, 3:]
+    return segments, np.flatnonzero(keep)
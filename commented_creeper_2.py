@@ -2,6 +2,16 @@
 import matplotlib.pyplot as plt
 # Импортируем библиотеку numpy для работы с массивами и математическими операциями (нужна для матриц преобразований и векторов, соответствует разделу лекции о линейной алгебре и преобразованиях).
 import numpy as np
+# Импортируем коллекцию 3D-линий, чтобы рисовать весь каркас одним объектом.
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+# Импортируем кэш преобразований: он хранит составную матрицу и преобразованные точки, пока состояние не изменилось.
+from transforms import TransformCache
+# Импортируем сборку массива уникальных ребер из матрицы смежности и построение массива отрезков.
+from geometry import edge_segments, edges_from_adjacency
+# Импортируем рендер последовательности кадров без окна (PNG или сырые кадры rgb24).
+from offscreen import render_frames
+# Импортируем планировщик кадров, объединяющий события автоповтора клавиш.
+from scheduler import FrameScheduler
 
 # Определяем класс Creeper, который инкапсулирует логику работы с моделью крипера (объектно-ориентированный подход, соответствует принципам ООП из лекции).
 class Creeper:
@@ -24,6 +34,29 @@ class Creeper:
         # Объединяем фронтальные и задние точки в один массив (вертикальное объединение, соответствует лекции о манипуляциях с массивами в numpy).
         self.original_points = np.vstack((front_points, back_points))
 
+        # Определяем матрицу смежности для фронтальной части (описывает, какие точки соединены линиями, соответствует лекции о графах и топологии).
+        self.adjacency = {
+            0: [1, 5], 1: [0, 2], 2: [1, 3], 3: [2, 17], 4: [3, 5], 5: [0, 4], 
+            6: [4, 7, 17], 7: [6, 8], 8: [7, 9, 15], 9: [8, 10], 10: [9, 11], 
+            11: [10, 12], 12: [11, 13], 13: [12, 14], 14: [13, 15, 16], 15: [8, 11, 14], 
+            16: [14, 17], 17: [3, 16], 18: [19, 35], 19: [18, 20], 20: [19, 21], 
+            21: [20, 22, 24, 25], 22: [21, 23], 23: [22, 24], 24: [21, 23], 
+            25: [21, 26, 28, 29], 26: [25, 27], 27: [26, 28], 28: [25, 27], 
+            29: [25, 30], 30: [29, 31], 31: [30, 32], 32: [31, 33], 33: [32, 34], 
+            34: [33, 35], 35: [18, 34]
+        }
+        # Запоминаем количество точек фронта (36, включая лицо и тело) и спины (18, только контур тела).
+        num_front = len(front_points)
+        num_back = len(back_points)
+        # Собираем уникальные ребра фронта в массив (E, 2): связи, записанные в обе стороны, учитываются один раз (соответствует лекции о графах).
+        front_edges = edges_from_adjacency(self.adjacency)
+        # Ребра спины: берем ребра фронта между первыми 18 точками и смещаем индексы на num_front (соответствует лекции о копировании структуры).
+        back_edges = front_edges[(front_edges < num_back).all(axis=1)] + num_front
+        # Соединения между фронтом и спиной: каждая точка контура фронта связана с соответствующей точкой спины.
+        connections = np.column_stack((np.arange(num_back), np.arange(num_back) + num_front))
+        # Объединяем все ребра в один массив один раз при создании модели, а не на каждом кадре.
+        self.edges = np.vstack((front_edges, back_edges, connections))
+
         # Инициализируем коэффициент масштабирования по оси X (начальное значение 1.0, соответствует лекции о линейных преобразованиях).
         self.scale_x = 1.0
         # Инициализируем коэффициент масштабирования по оси Y (начальное значение 1.0, соответствует лекции о линейных преобразованиях).
@@ -44,17 +77,25 @@ class Creeper:
         self.move_step = 0.5
         # Устанавливаем шаг масштабирования (0.1, для интерактивного управления, соответствует лекции о масштабировании).
         self.scale_step = 0.1
+        # Целевая частота кадров: перерисовка выполняется не чаще target_fps раз в секунду.
+        self.target_fps = 30
+        # Создаем планировщик кадров: он объединяет нажатия клавиш и вызывает update_plot не чаще одного раза за кадр.
+        self.scheduler = FrameScheduler(self.update_plot, self.target_fps)
+        # Создаем кэш преобразований: матрицы компонент и их произведение пересчитываются только при изменении параметров.
+        self.transform_cache = TransformCache()
 
         # Инициализируем фигуру (графическое окно, None до создания, соответствует лекции о настройке Matplotlib).
         self.fig = None
         # Инициализируем оси 3D (None до создания, соответствует лекции о 3D-графике).
         self.ax = None
+        # Режим отрисовки каркаса: 'collection' - одна коллекция линий на все ребра, 'lines' - отдельная линия на каждое ребро.
+        self.render_mode = 'collection'
         # Инициализируем список линий (пустой, будет заполняться при отрисовке, соответствует лекции о динамическом обновлении графика).
         self.lines = []
+        # Инициализируем коллекцию линий каркаса (None до первой отрисовки, затем обновляются только ее отрезки).
+        self.wireframe = None
         # Инициализируем объект точек (None до отрисовки, соответствует лекции о scatter-графике).
         self.points_plot = None
-        # Инициализируем список текстовых меток (пустой, будет заполняться номерами точек, соответствует лекции о аннотациях).
-        self.texts = []
         # Инициализируем объект информационного текста (None до создания, соответствует лекции о аннотациях).
         self.info_text = None
 
@@ -144,30 +185,25 @@ class Creeper:
             [0, 0, 0, 1]    # Четвертый ряд: гомогенный компонент.
         ])
 
+    # Метод get_transformation_matrix возвращает составную матрицу модели (соответствует лекции о комбинированных преобразованиях).
+    def get_transformation_matrix(self):
+        # Передаем цепочку в порядке: трансляция @ поворот Z @ поворот Y @ поворот X @ масштаб @ отражение (соответствует лекции о порядке умножения матриц).
+        # Каждая компонента задается именем, методом построения и его аргументами; кэш пересобирает только те, чьи аргументы изменились.
+        return self.transform_cache.compose([
+            ('translation', self.get_translation_matrix, tuple(self.translation)),  # Трансляция по текущему вектору смещения.
+            ('rotation_z', self.get_rotation_z_matrix, (self.rotation_z,)),         # Поворот вокруг оси Z.
+            ('rotation_y', self.get_rotation_y_matrix, (self.rotation_y,)),         # Поворот вокруг оси Y.
+            ('rotation_x', self.get_rotation_x_matrix, (self.rotation_x,)),         # Поворот вокруг оси X.
+            ('scale', self.get_scale_matrix, (self.scale_x, self.scale_y, self.scale_z)),  # Масштабирование.
+            ('reflection_y', self.get_reflection_y_matrix, ()),                      # Отражение (без параметров, строится один раз).
+        ])
+
     # Метод apply_transformations применяет все преобразования к исходным точкам (соответствует лекции о комбинированных преобразованиях).
     def apply_transformations(self):
-        # Получаем матрицу масштабирования с текущими коэффициентами (используем метод get_scale_matrix).
-        scale_matrix = self.get_scale_matrix(self.scale_x, self.scale_y, self.scale_z)
-        # Получаем матрицу поворота вокруг оси X с текущим углом (используем метод get_rotation_x_matrix).
-        rotation_x_matrix = self.get_rotation_x_matrix(self.rotation_x)
-        # Получаем матрицу поворота вокруг оси Y с текущим углом (используем метод get_rotation_y_matrix).
-        rotation_y_matrix = self.get_rotation_y_matrix(self.rotation_y)
-        # Получаем матрицу поворота вокруг оси Z с текущим углом (используем метод get_rotation_z_matrix).
-        rotation_z_matrix = self.get_rotation_z_matrix(self.rotation_z)
-        # Получаем матрицу трансляции с текущим вектором смещения (используем метод get_translation_matrix).
-        translation_matrix = self.get_translation_matrix(self.translation[0], self.translation[1], self.translation[2])
-        # Получаем матрицу отражения (используем метод get_reflection_y_matrix).
-        reflection_y_matrix = self.get_reflection_y_matrix()
-
-        # Комбинируем матрицы в порядке: трансляция @ поворот Z @ поворот Y @ поворот X @ масштаб @ отражение (соответствует лекции о порядке умножения матриц).
-        transformation_matrix = translation_matrix @ rotation_z_matrix @ rotation_y_matrix @ rotation_x_matrix @ scale_matrix @ reflection_y_matrix
-        # Создаем массив для хранения преобразованных точек с тем же размером, что и original_points.
-        transformed_points = np.zeros_like(self.original_points)
-        # Проходим по всем точкам и применяем преобразование (матричное умножение, соответствует лекции о применении преобразований).
-        for i in range(len(self.original_points)):
-            transformed_points[i] = transformation_matrix @ self.original_points[i]
-        # Возвращаем массив преобразованных точек.
-        return transformed_points
+        # Обновляем составную матрицу (если параметры не менялись, она берется из кэша).
+        self.get_transformation_matrix()
+        # Применяем матрицу сразу ко всем точкам; результат хранится в кэше до следующего изменения состояния.
+        return self.transform_cache.apply(self.original_points)
 
     # Метод world_to_screen преобразует мировые координаты в экранные (соответствует лекции о проецировании).
     def world_to_screen(self, points):
@@ -197,114 +233,52 @@ class Creeper:
         # Возвращаем мировые координаты (без гомогенного компонента).
         return world_xyz
 
+    # Метод create_artists один раз создает все изменяемые объекты графика; дальше update_plot только обновляет их данные.
+    def create_artists(self):
+        # В режиме коллекции весь каркас рисуется одним объектом Line3DCollection (пока без отрезков).
+        if self.render_mode == 'collection':
+            self.wireframe = Line3DCollection([], colors='deeppink', linewidths=2.5)
+            self.ax.add_collection(self.wireframe)
+        # Иначе создаем по одной пустой линии на каждое ребро из массива self.edges.
+        else:
+            self.lines = [self.ax.plot([], [], [], color='deeppink', linewidth=2.5)[0] for _ in range(len(self.edges))]
+        # Создаем пустой scatter-график точек (соответствует лекции о визуализации точек).
+        self.points_plot = self.ax.scatter([], [], [], color='hotpink', s=6)
+        # Создаем пустую текстовую аннотацию для информации о параметрах (соответствует лекции о аннотациях).
+        self.info_text = self.ax.text2D(0.02, 0.98, '', transform=self.ax.transAxes, fontsize=10,
+                                        verticalalignment='top', bbox=dict(boxstyle='round', facecolor='pink', alpha=0.8))
+
     # Метод update_plot обновляет график с учетом всех преобразований (соответствует лекции о динамическом обновлении 3D-графиков).
     def update_plot(self):
         # Проверяем, инициализирована ли фигура (если None, выходим, чтобы избежать ошибок, соответствует хорошей практике программирования).
         if self.fig is None:
             return
 
-        # Удаляем все существующие линии, если они есть в осях (очистка для нового рендера, соответствует лекции о динамическом обновлении).
-        for line in self.lines:
-            if line in self.ax.lines:
-                line.remove()
-        # Очищаем список линий (подготовка к новому набору, соответствует управлению состоянием).
-        self.lines = []
-
-        # Удаляем существующий объект точек, если он существует (очистка для нового рендера).
-        if self.points_plot is not None:
-            self.points_plot.remove()
-
-        # Удаляем все существующие текстовые метки, если они есть (очистка для нового рендера).
-        for text in self.texts:
-            if text in self.ax.texts:
-                text.remove()
-        # Очищаем список текстовых меток (подготовка к новому набору).
-        self.texts = []
-
-        # Удаляем существующий информационный текст, если он есть (очистка для нового рендера).
-        if self.info_text is not None and self.info_text in self.ax.texts:
-            self.info_text.remove()
-
         # Применяем все преобразования к исходным точкам (вызываем метод apply_transformations).
         world_points = self.apply_transformations()
         # Преобразуем мировые координаты в экранные (вызываем метод world_to_screen).
         screen_points = self.world_to_screen(world_points)
 
-        # Устанавливаем количество точек фронта (36, включая лицо и тело, соответствует структуре модели).
-        num_front = 36
-
-        # Определяем матрицу смежности для фронтальной части (описывает, какие точки соединены линиями, соответствует лекции о графах и топологии).
-        front_adjacency = {
-            0: [1, 5], 1: [0, 2], 2: [1, 3], 3: [2, 17], 4: [3, 5], 5: [0, 4], 
-            6: [4, 7, 17], 7: [6, 8], 8: [7, 9, 15], 9: [8, 10], 10: [9, 11], 
-            11: [10, 12], 12: [11, 13], 13: [12, 14], 14: [13, 15, 16], 15: [8, 11, 14], 
-            16: [14, 17], 17: [3, 16], 18: [19, 35], 19: [18, 20], 20: [19, 21], 
-            21: [20, 22, 24, 25], 22: [21, 23], 23: [22, 24], 24: [21, 23], 
-            25: [21, 26, 28, 29], 26: [25, 27], 27: [26, 28], 28: [25, 27], 
-            29: [25, 30], 30: [29, 31], 31: [30, 32], 32: [31, 33], 33: [32, 34], 
-            34: [33, 35], 35: [18, 34]
-        }
-        # Создаем матрицу смежности для спины, смещая индексы на num_front (соответствует лекции о копировании структуры).
-        back_adjacency = {k + num_front: [v + num_front for v in vals if v < 18] for k, vals in front_adjacency.items() if k < 18}
-        # Определяем соединения между фронтом и спиной (каждая точка фронта связана с соответствующей точкой спины, соответствует 3D-моделированию).
-        connections = {i: [i + num_front] for i in range(18)}
-
-        # Отрисовываем ребра фронтальной части (цикл по матрице смежности).
-        for point_idx, connected_points in front_adjacency.items():
-            # Извлекаем экранные координаты первой точки (x1, y1, z1).
-            x1, y1, z1 = screen_points[point_idx]
-            # Проходим по всем связанным точкам.
-            for connected_idx in connected_points:
-                # Извлекаем экранные координаты второй точки (x2, y2, z2).
-                x2, y2, z2 = screen_points[connected_idx]
-                # Рисуем линию между точками (метод plot, соответствует лекции о визуализации).
-                line, = self.ax.plot([x1, x2], [y1, y2], [z1, z2], color='deeppink', linewidth=2.5)
-                # Добавляем линию в список для последующего удаления.
-                self.lines.append(line)
-
-        # Отрисовываем ребра спины (аналогично фронту).
-        for point_idx, connected_points in back_adjacency.items():
-            x1, y1, z1 = screen_points[point_idx]
-            for connected_idx in connected_points:
-                x2, y2, z2 = screen_points[connected_idx]
-                line, = self.ax.plot([x1, x2], [y1, y2], [z1, z2], color='deeppink', linewidth=2.5)
-                self.lines.append(line)
-
-        # Отрисовываем соединения между фронтом и спиной.
-        for point_idx, connected_points in connections.items():
-            x1, y1, z1 = screen_points[point_idx]
-            for connected_idx in connected_points:
-                x2, y2, z2 = screen_points[connected_idx]
-                line, = self.ax.plot([x1, x2], [y1, y2], [z1, z2], color='deeppink', linewidth=2.5)
-                self.lines.append(line)
-
-        # Извлекаем координаты x всех точек для scatter-графика.
-        x_coords = screen_points[:, 0]
-        # Извлекаем координаты y всех точек для scatter-графика.
-        y_coords = screen_points[:, 1]
-        # Извлекаем координаты z всех точек для scatter-графика.
-        z_coords = screen_points[:, 2]
-        # Создаем scatter-график точек (соответствует лекции о визуализации точек).
-        self.points_plot = self.ax.scatter(x_coords, y_coords, z_coords, color='hotpink', s=6)
-
-        # Формируем строку с информацией о текущих параметрах (для отображения состояния, соответствует лекции о аннотациях).
-        info_text_str = (f'Масштаб X: {self.scale_x:.2f}\n'
-                         f'Масштаб Y: {self.scale_y:.2f}\n'
-                         f'Масштаб Z: {self.scale_z:.2f}\n'
-                         f'Поворот X: {self.rotation_x:.1f}°\n'
-                         f'Поворот Y: {self.rotation_y:.1f}°\n'
-                         f'Поворот Z: {self.rotation_z:.1f}°\n'
-                         f'Позиция: ({self.translation[0]:.2f}, {self.translation[1]:.2f}, {self.translation[2]:.2f})')
-        # Добавляем текстовую аннотацию с информацией (соответствует лекции о аннотациях).
-        self.info_text = self.ax.text2D(0.02, 0.98, info_text_str, transform=self.ax.transAxes, fontsize=10,
-                                        verticalalignment='top', bbox=dict(boxstyle='round', facecolor='pink', alpha=0.8))
-
-        # Устанавливаем пределы по оси X (соответствует лекции о настройке осей).
-        self.ax.set_xlim(self.fixed_xlim)
-        # Устанавливаем пределы по оси Y (соответствует лекции о настройке осей).
-        self.ax.set_ylim(self.fixed_ylim)
-        # Устанавливаем пределы по оси Z (соответствует лекции о настройке осей).
-        self.ax.set_zlim(self.fixed_zlim)
+        # В режиме коллекции заменяем отрезки коллекции массивом (E, 2, 3): для каждого ребра - координаты двух его концов.
+        if self.render_mode == 'collection':
+            self.wireframe.set_segments(edge_segments(screen_points, self.edges))
+        # Иначе обновляем координаты каждой линии на месте (объекты не создаются и не удаляются).
+        else:
+            for line, edge in zip(self.lines, self.edges):
+                line.set_data_3d(screen_points[edge, 0], screen_points[edge, 1], screen_points[edge, 2])
+
+        # Передаем scatter-графику новые координаты точек: x и y как смещения, z отдельно.
+        self.points_plot.set_offsets(screen_points[:, :2])
+        self.points_plot.set_3d_properties(screen_points[:, 2], 'z')
+
+        # Обновляем текст с информацией о текущих параметрах (для отображения состояния, соответствует лекции о аннотациях).
+        self.info_text.set_text(f'Масштаб X: {self.scale_x:.2f}\n'
+                                f'Масштаб Y: {self.scale_y:.2f}\n'
+                                f'Масштаб Z: {self.scale_z:.2f}\n'
+                                f'Поворот X: {self.rotation_x:.1f}°\n'
+                                f'Поворот Y: {self.rotation_y:.1f}°\n'
+                                f'Поворот Z: {self.rotation_z:.1f}°\n'
+                                f'Позиция: ({self.translation[0]:.2f}, {self.translation[1]:.2f}, {self.translation[2]:.2f})')
         # Перерисовываем холст для обновления графика (соответствует лекции о динамическом рендеринге).
         self.fig.canvas.draw()
 
@@ -375,29 +349,15 @@ class Creeper:
         elif event.key == 'r':
             self.rotation_y -= self.rotation_step
 
-        # Обновляем график после изменения параметров (вызываем метод update_plot).
-        self.update_plot()
+        # Запрашиваем перерисовку у планировщика: несколько нажатий подряд приведут к одному кадру.
+        self.scheduler.request()
 
-    # Метод draw создает и отображает окно с моделью (соответствует лекции о настройке 3D-окна).
-    def draw(self):
-        # Включаем интерактивный режим Matplotlib (позволяет обновлять график без закрытия, соответствует лекции).
-        plt.ion()
-        # Создаем фигуру с размером 12x12 дюймов (настраиваем окно, соответствует лекции о настройке графика).
-        self.fig = plt.figure(figsize=(12, 12))
-        # Создаем 3D-оси в фигуре (используем projection='3d', соответствует лекции о 3D-графике).
-        self.ax = self.fig.add_subplot(111, projection='3d')
+    # Метод setup_figure оформляет уже созданные фигуру и оси; он общий для окна и для рендера без окна.
+    def setup_figure(self):
         # Устанавливаем равный масштаб по осям (для правильного восприятия 3D, соответствует лекции).
         self.ax.set_aspect('equal')
         # Настраиваем отступы фигуры, чтобы максимизировать область отображения (соответствует лекции о настройке).
         self.fig.subplots_adjust(left=0.02, right=0.98, top=0.95, bottom=0.05)
-        # Получаем менеджер окна для настройки размера (соответствует лекции о управлении окном).
-        fig_manager = plt.get_current_fig_manager()
-        # Пытаемся развернуть окно на полный экран (Windows-совместимость, соответствует лекции).
-        try:
-            fig_manager.window.showMaximized()
-        # Альтернатива для других систем (например, Linux), разворачиваем окно.
-        except AttributeError:
-            fig_manager.window.state('zoomed')
 
         # Устанавливаем цвет фона фигуры (lightpink для стилизации, соответствует лекции о кастомизации).
         self.fig.patch.set_facecolor('lightpink')
@@ -444,6 +404,9 @@ class Creeper:
                      verticalalignment='bottom', horizontalalignment='right',
                      bbox=dict(boxstyle='round', facecolor='lightpink', alpha=0.8))
 
+        # Создаем изменяемые объекты графика один раз (каркас, точки, информационный текст).
+        self.create_artists()
+
         # Устанавливаем пределы по оси X (соответствует лекции о настройке осей).
         self.ax.set_xlim(self.fixed_xlim)
         # Устанавливаем пределы по оси Y (соответствует лекции о настройке осей).
@@ -451,8 +414,52 @@ class Creeper:
         # Устанавливаем пределы по оси Z (соответствует лекции о настройке осей).
         self.ax.set_zlim(self.fixed_zlim)
 
+    # Метод create_offscreen_figure создает фигуру без pyplot и без окна (для серверов без дисплея).
+    def create_offscreen_figure(self, figsize=(12, 12), dpi=100):
+        # Импортируем холст Agg и фигуру здесь: они нужны только при рендере без окна.
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        # Создаем фигуру и сразу привязываем ее к растровому холсту Agg.
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        # Создаем 3D-оси и оформляем их так же, как в окне.
+        self.ax = self.fig.add_subplot(111, projection='3d')
+        self.setup_figure()
+
+    # Метод grab_frame возвращает текущий кадр холста как массив (высота, ширина, 3).
+    def grab_frame(self):
+        # Копируем кадр: буфер холста Agg перезаписывается при следующей отрисовке.
+        return np.asarray(self.fig.canvas.buffer_rgba())[:, :, :3].copy()
+
+    # Метод render_offscreen рендерит список состояний в PNG или rgb24 (см. offscreen.render_frames).
+    def render_offscreen(self, states, output=None, fmt='png'):
+        return render_frames(self, states, output, fmt)
+
+    # Метод draw создает и отображает окно с моделью (соответствует лекции о настройке 3D-окна).
+    def draw(self):
+        # Включаем интерактивный режим Matplotlib (позволяет обновлять график без закрытия, соответствует лекции).
+        plt.ion()
+        # Создаем фигуру с размером 12x12 дюймов (настраиваем окно, соответствует лекции о настройке графика).
+        self.fig = plt.figure(figsize=(12, 12))
+        # Создаем 3D-оси в фигуре (используем projection='3d', соответствует лекции о 3D-графике).
+        self.ax = self.fig.add_subplot(111, projection='3d')
+        # Получаем менеджер окна для настройки размера (соответствует лекции о управлении окном).
+        fig_manager = plt.get_current_fig_manager()
+        # Пытаемся развернуть окно на полный экран (Windows-совместимость, соответствует лекции).
+        try:
+            fig_manager.window.showMaximized()
+        # Альтернатива для других систем (например, Linux); у неинтерактивного бэкенда окна нет вовсе.
+        except AttributeError:
+            if hasattr(fig_manager, 'window'):
+                fig_manager.window.state('zoomed')
+
+        # Оформляем фигуру и оси (фон, оси координат, подписи, инструкция, объекты графика).
+        self.setup_figure()
+
         # Вызываем метод обновления графика (инициализация, соответствует лекции).
         self.update_plot()
+        # Подключаем планировщик кадров к таймеру холста.
+        self.scheduler.attach(self.fig.canvas)
         # Подключаем обработчик событий клавиш (соответствует лекции о взаимодействии).
         self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
         # Отображаем окно и ждем его закрытия (соответствует лекции о рендеринге).
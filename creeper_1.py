@@ -1,6 +1,18 @@
-import matplotlib.pyplot as plt
 import numpy as np
 
+from bounds import INSIDE, OUTSIDE, PARTIAL, Bounds
+from geometry import clip_segments, edge_segments, edges_from_adjacency
+from lod import FULL, LOD_NAMES, POINT, LevelsOfDetail
+from offscreen import render_frames
+from picking import PickIndex
+from profiling import FrameProfiler
+from raster import clear_framebuffer, new_framebuffer, rasterize_wireframe, window_to_pixels
+from scheduler import FrameScheduler
+from transforms import TransformCache, point_coords
+
+# Библиотеки графики импортируются в методах, создающих фигуру: Creeper без окна
+# (расчеты, растеризация, процессы экспорта кадров) их не загружает
+
 class Creeper:
     def __init__(self):
 
@@ -23,6 +35,7 @@ class Creeper:
             29: [25, 30], 30: [29, 31], 31: [30, 32], 32: [31, 33], 33: [32, 34], 
             34: [33, 35], 35: [18, 34]
         }
+        self.edges = edges_from_adjacency(self.adjacency)
 
         self.scale = 1.0
         self.translation = np.array([0.0, 0.0])
@@ -30,21 +43,52 @@ class Creeper:
         self.rotation_step = 5.0
         self.move_step = 0.5
         self.scale_step = 0.4
+        self.profiler = FrameProfiler()
+        self.trace_path = 'frame_trace.json'
+        self.scheduler = FrameScheduler(self.update_plot, fps=60)
+        self.transform_cache = TransformCache()
         self.fig = None
         self.ax = None
+        self.render_mode = 'collection'
+        self.use_blit = True
+        self.raster_color = (255, 20, 147)
+        self.raster_background = (255, 240, 245)
+        self.blitting = False
+        self.background = None
         self.lines = []
+        self.wireframe = None
         self.points_plot = None
-        self.texts = []
+        self.selection_plot = None
         self.info_text = None
+        # Выбор мышью: радиус в пикселях, индекс по экранным вершинам и выбранные вершина или ребро
+        self.pick_radius = 8
+        self.pick_index = None
+        self.pick_key = None
+        self.selection = None
+        self.dragging = False
 
         self.fixed_xlim = (-20, 20)
         self.fixed_ylim = (-20, 20)
+        self.bounds = Bounds(self.original_points)
+        self.visibility = None
+        self.lod = LevelsOfDetail(self.original_points, self.edges,
+                                  [[0, 1, 2, 3, 17, 16, 14, 13, 12, 11, 10, 9, 8, 7, 6, 4, 5]])
+        self.lod_level = FULL
 
         self.screen_center_x = 0.0  
         self.screen_center_y = 0.0  
         self.screen_scale_x = 1.0   
         self.screen_scale_y = 1.0   
 
+    @property
+    def target_fps(self):
+        # Частота кадров хранится в планировщике, присваивание сразу меняет интервал таймера
+        return self.scheduler.fps
+
+    @target_fps.setter
+    def target_fps(self, fps):
+        self.scheduler.set_fps(fps)
+
     def get_scale_matrix(self, scale_x, scale_y):
         return np.array([
             [scale_x, 0, 0],  
@@ -67,17 +111,30 @@ class Creeper:
             [0, 0, 1]    
         ])
 
+    def get_transformation_matrix(self):
+        return self.transform_cache.compose([
+            ('translation', self.get_translation_matrix, (self.translation[0], self.translation[1])),
+            ('rotation', self.get_rotation_matrix, (self.rotation_angle,)),
+            ('scale', self.get_scale_matrix, (self.scale, self.scale)),
+        ])
+
     def apply_transformations(self):
-        scale_matrix = self.get_scale_matrix(self.scale, self.scale)  
-        rotation_matrix = self.get_rotation_matrix(self.rotation_angle)  
-        translation_matrix = self.get_translation_matrix(self.translation[0], self.translation[1])  
-     
+        self.get_transformation_matrix()
+        return self.transform_cache.apply(self.original_points)
 
-        transformation_matrix = translation_matrix @ rotation_matrix @ scale_matrix 
-        transformed_points = np.zeros_like(self.original_points)  
-        for i in range(len(self.original_points)):  
-            transformed_points[i] = transformation_matrix @ self.original_points[i]  
-        return transformed_points  
+    def get_view_window(self):
+        # Окно fixed_xlim x fixed_ylim в мировых координатах
+        corners = self.screen_to_world(np.array([[self.fixed_xlim[0], self.fixed_ylim[0]],
+                                                 [self.fixed_xlim[1], self.fixed_ylim[1]]], dtype=float))
+        return corners.min(axis=0), corners.max(axis=0)
+
+    def get_visibility(self):
+        # Проверка по ограничивающему объему за O(1), без преобразования вершин
+        return self.bounds.classify(self.get_transformation_matrix(), *self.get_view_window())
+
+    def get_pixels_per_unit(self):
+        # Пикселей экрана на единицу мировых координат по оси x
+        return self.ax.bbox.width * self.screen_scale_x / (self.fixed_xlim[1] - self.fixed_xlim[0])
 
     def world_to_screen(self, points):
         world_xy = points[:, :2]  
@@ -93,49 +150,109 @@ class Creeper:
         world_xy[:, 1] = (screen_points[:, 1] - self.screen_center_y) / self.screen_scale_y  
         return world_xy  
 
-    def update_plot(self):
-        if self.fig is None:  
+    def create_artists(self):
+        from matplotlib.collections import LineCollection
+        if self.render_mode == 'collection':
+            self.wireframe = LineCollection([], colors='deeppink', linewidths=2.5)
+            self.ax.add_collection(self.wireframe, autolim=False)
+        else:
+            self.lines = [self.ax.plot([], [], color='deeppink', linewidth=2.5)[0] for _ in range(len(self.edges))]
+        self.points_plot, = self.ax.plot([], [], 'o', color='hotpink', markersize=6)
+        self.selection_plot, = self.ax.plot([], [], 'o-', color='mediumvioletred', linewidth=4, markersize=10)
+        self.info_text = self.ax.text(0.02, 0.98, '', transform=self.ax.transAxes, fontsize=10,
+                                      verticalalignment='top', bbox=dict(boxstyle='round', facecolor='pink', alpha=0.8))
+        for artist in self.get_animated_artists():
+            artist.set_animated(self.blitting)
+
+    def update_plot(self, world_points=None, visibility=None):
+        if self.fig is None:
             return
 
-        for line in self.lines:
-            if line in self.ax.lines:  
-                line.remove()  
-        self.lines = []  
-
-        if self.points_plot is not None and self.points_plot in self.ax.lines:
-            self.points_plot.remove() 
-
-        for text in self.texts:
-            if text in self.ax.texts:
-                text.remove()  
-        self.texts = []  
-
-        if self.info_text is not None and self.info_text in self.ax.texts:
-            self.info_text.remove()  
-
-        world_points = self.apply_transformations()
-        screen_points = self.world_to_screen(world_points)
-
-        for point_idx, connected_points in self.adjacency.items(): 
-            x1, y1 = screen_points[point_idx]  
-            for connected_idx in connected_points:  
-                x2, y2 = screen_points[connected_idx] 
-                line, = self.ax.plot([x1, x2], [y1, y2], color='deeppink', linewidth=2.5) 
-                self.lines.append(line)  
-
-        x_coords = screen_points[:, 0]  
-        y_coords = screen_points[:, 1]  
-        self.points_plot, = self.ax.plot(x_coords, y_coords, 'o', color='hotpink', markersize=6)  
-
-        info_text_str = (f'Масштаб: {self.scale:.2f}x\n'  
-                         f'Поворот: {self.rotation_angle:.1f}°\n'  
-                         f'Позиция: ({self.translation[0]:.2f}, {self.translation[1]:.2f})')  
-        self.info_text = self.ax.text(0.02, 0.98, info_text_str, transform=self.ax.transAxes, fontsize=10,
-                                     verticalalignment='top', bbox=dict(boxstyle='round', facecolor='pink', alpha=0.8))
+        self.profiler.begin_frame()
+        with self.profiler.stage('матрица'):
+            if world_points is None:
+                self.visibility = self.get_visibility()
+            else:
+                # Кадр запеченной анимации: матрица и вершины посчитаны заранее
+                self.visibility = INSIDE if visibility is None else visibility
+        with self.profiler.stage('вершины'):
+            if self.visibility == OUTSIDE:
+                # Крипер целиком за пределами окна: вершины не преобразуем и ничего не рисуем
+                screen_points = np.empty((0, 2))
+                segments = np.empty((0, 2, 2))
+            else:
+                edges = self.edges
+                if world_points is None:
+                    # Мелкий на экране крипер рисуется упрощенной моделью; кадр анимации - всегда целиком
+                    matrix = self.get_transformation_matrix()
+                    self.lod_level = self.lod.select(matrix, self.get_pixels_per_unit())
+                    if self.lod_level == FULL:
+                        world_points = self.apply_transformations()
+                    else:
+                        world_points, edges = self.lod.transform_level(self.lod_level, matrix)
+                else:
+                    self.lod_level = FULL
+                screen_points = self.world_to_screen(world_points)
+                segments = edge_segments(screen_points, edges)
+                if self.lod_level not in (FULL, POINT):
+                    # Маркеры вершин упрощенной модели сливаются в пятно
+                    screen_points = screen_points[:0]
+                if self.visibility == PARTIAL:
+                    starts, ends, _ = clip_segments(segments[:, 0], segments[:, 1], self.fixed_xlim, self.fixed_ylim)
+                    segments = np.stack((starts, ends), axis=1)
+
+        with self.profiler.stage('артисты'):
+            if self.render_mode == 'collection':
+                self.wireframe.set_segments(segments)
+            else:
+                for i, line in enumerate(self.lines):
+                    if i < len(segments):
+                        line.set_data(segments[i, :, 0], segments[i, :, 1])
+                    else:
+                        line.set_data([], [])
+
+            self.points_plot.set_data(screen_points[:, 0], screen_points[:, 1])
+            selected = self.get_selected_points(screen_points)
+            self.selection_plot.set_data(selected[:, 0], selected[:, 1])
+
+            info = (f'Масштаб: {self.scale:.2f}x\n'
+                    f'Поворот: {self.rotation_angle:.1f}°\n'
+                    f'Позиция: ({self.translation[0]:.2f}, {self.translation[1]:.2f})')
+            if self.selection is not None:
+                info += '\n' + self.get_selection_text()
+            if self.lod_level != FULL:
+                info += f'\nДетализация: {LOD_NAMES[self.lod_level]}'
+            if self.profiler.enabled:
+                info += '\n' + self.profiler.format_line()
+            self.info_text.set_text(info)
+        with self.profiler.stage('отрисовка'):
+            self.render()
+        self.profiler.end_frame()
+
+    def get_animated_artists(self):
+        artists = [self.wireframe, self.points_plot, self.selection_plot, self.info_text]
+        return [artist for artist in artists if artist is not None] + self.lines
+
+    def draw_animated(self):
+        for artist in self.get_animated_artists():
+            self.ax.draw_artist(artist)
+
+    def on_draw(self, event):
+        # Полная перерисовка (первый показ, изменение размера окна): запоминаем статический фон
+        if not self.blitting:
+            return
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_animated()
 
-        self.ax.set_xlim(self.fixed_xlim)  
-        self.ax.set_ylim(self.fixed_ylim)  
-        self.fig.canvas.draw()
+    def render(self):
+        canvas = self.fig.canvas
+        if not self.blitting or self.background is None:
+            canvas.draw()
+            return
+        canvas.restore_region(self.background)
+        self.draw_animated()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
 
     def on_key_press(self, event):
         if event.key == '=' or event.key == 'add':  
@@ -154,22 +271,78 @@ class Creeper:
             self.rotation_angle += self.rotation_step  
         elif event.key == 'shift':  
             self.rotation_angle -= self.rotation_step  
+        elif event.key == 'i':
+            self.profiler.toggle()
+        self.scheduler.request()
 
-        self.update_plot()  
-
-    def draw(self):
-        plt.ion()  
-        self.fig, self.ax = plt.subplots(figsize=(12, 12))
+    def get_pick_index(self):
+        # Индекс по пикселям вершин пересобирается, только если сменились матрица, точки или окно
+        world_points = self.apply_transformations()
+        key = (self.transform_cache.version, self.ax.bbox.bounds)
+        if self.pick_index is None or key != self.pick_key:
+            pixels = self.ax.transData.transform(self.world_to_screen(world_points))
+            self.pick_index = PickIndex(pixels, self.edges)
+            self.pick_key = key
+        return self.pick_index
+
+    def get_selected_points(self, screen_points):
+        if self.selection is None or self.lod_level != FULL or not len(screen_points):
+            return np.empty((0, 2))
+        kind, index = self.selection
+        return screen_points[[index]] if kind == 'vertex' else screen_points[self.edges[index]]
+
+    def get_selection_text(self):
+        kind, index = self.selection
+        if kind == 'vertex':
+            x, y = point_coords(self.original_points)[index, :2]
+            return f'Вершина {index}: ({x:.2f}, {y:.2f})'
+        return f'Ребро {index}: {self.edges[index, 0]} - {self.edges[index, 1]}'
+
+    def move_vertex(self, index, coords):
+        # Правка исходной модели; кэш вершин сбрасывается, индекс выбора пересоберется при следующем щелчке
+        if not point_coords(self.original_points).flags.writeable:
+            self.original_points = self.original_points.copy()
+        point_coords(self.original_points)[index] = coords
+        self.transform_cache.invalidate()
+
+    def on_mouse_press(self, event):
+        if event.inaxes is not self.ax or event.button != 1:
+            return
+        if self.visibility == OUTSIDE or self.lod_level != FULL:
+            self.selection = None
+        else:
+            self.selection = self.get_pick_index().pick(event.x, event.y, self.pick_radius)
+        self.dragging = self.selection is not None and self.selection[0] == 'vertex'
+        self.scheduler.request()
+
+    def on_mouse_move(self, event):
+        if not self.dragging or event.inaxes is not self.ax:
+            return
+        world = self.screen_to_world(np.array([[event.xdata, event.ydata]]))[0]
+        # Мировые координаты курсора -> координаты модели через обратную матрицу
+        model = np.linalg.solve(self.get_transformation_matrix(), np.append(world, 1.0))
+        self.move_vertex(self.selection[1], model[:-1])
+        self.scheduler.request()
+
+    def on_mouse_release(self, event):
+        if not self.dragging:
+            return
+        self.dragging = False
+        # Объемы отсечения и уровни детализации по новой форме модели
+        self.bounds = Bounds(self.original_points)
+        self.lod = LevelsOfDetail(self.original_points, self.edges, self.lod.outlines, self.lod.thresholds)
+
+    def on_close(self, event):
+        # При закрытии окна сохраняем собранные замеры для chrome://tracing или Perfetto
+        if self.profiler.frames and self.trace_path:
+            count = self.profiler.export_chrome_trace(self.trace_path)
+            print(f'Замеры {count} кадров сохранены в {self.trace_path}')
+
+    def setup_figure(self):
         self.ax.set_aspect('equal') 
 
         self.fig.subplots_adjust(left=0.02, right=0.98, top=0.95, bottom=0.05)
 
-        fig_manager = plt.get_current_fig_manager()  
-        try:
-            fig_manager.window.showMaximized()  
-        except AttributeError:
-            fig_manager.window.state('zoomed') 
-
         self.fig.patch.set_facecolor('lightpink')
         self.ax.set_facecolor('lavenderblush')
         for spine in self.ax.spines.values():
@@ -187,17 +360,70 @@ class Creeper:
                        "- - уменьшение масштаба\n"
                        "Стрелки - перемещение\n"
                        "Ctrl - поворот влево\n"
-                       "Shift - поворот вправо")
+                       "Shift - поворот вправо\n"
+                       "I - замер времени кадра (FPS)\n"
+                       "Мышь - выбор вершины или ребра,\n"
+                       "перетаскивание вершины")
 
         self.ax.text(0.98, 0.02, instructions, transform=self.ax.transAxes, fontsize=9,
                      verticalalignment='bottom', horizontalalignment='right',
                      bbox=dict(boxstyle='round', facecolor='lightpink', alpha=0.8))
 
+        self.create_artists()
+
         self.ax.set_xlim(self.fixed_xlim)
         self.ax.set_ylim(self.fixed_ylim)
 
+    def create_offscreen_figure(self, figsize=(12, 12), dpi=100):
+        # Фигура без pyplot и без окна: рисуется на холсте Agg, подходит для серверов без дисплея
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self.blitting = False
+        self.setup_figure()
+
+    def grab_frame(self):
+        # Копия: буфер холста Agg перезаписывается следующим кадром
+        return np.asarray(self.fig.canvas.buffer_rgba())[:, :, :3].copy()
+
+    def render_offscreen(self, states, output=None, fmt='png'):
+        return render_frames(self, states, output, fmt)
+
+    def rasterize(self, width=800, height=800, antialiased=True, out=None):
+        # Программная растеризация каркаса в массив (height, width, 3) без matplotlib
+        screen_points = self.world_to_screen(self.apply_transformations())
+        pixel_points = window_to_pixels(screen_points, self.fixed_xlim, self.fixed_ylim, width, height)
+        if out is None:
+            out = new_framebuffer(width, height, self.raster_background)
+        else:
+            clear_framebuffer(out, self.raster_background)
+        return rasterize_wireframe(pixel_points, self.edges, out, self.raster_color, antialiased)
+
+    def draw(self):
+        import matplotlib.pyplot as plt
+        plt.ion()  
+        self.fig, self.ax = plt.subplots(figsize=(12, 12))
+
+        fig_manager = plt.get_current_fig_manager()  
+        try:
+            fig_manager.window.showMaximized()  
+        except AttributeError:
+            if hasattr(fig_manager, 'window'):
+                fig_manager.window.state('zoomed') 
+
+        self.blitting = self.use_blit and self.fig.canvas.supports_blit
+        self.setup_figure()
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+
         self.update_plot() 
+        self.scheduler.attach(self.fig.canvas)
         self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)  
+        self.fig.canvas.mpl_connect('button_press_event', self.on_mouse_press)
+        self.fig.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+        self.fig.canvas.mpl_connect('button_release_event', self.on_mouse_release)
+        self.fig.canvas.mpl_connect('close_event', self.on_close)
         plt.show(block=True) 
 
 if __name__ == "__main__":
@@ -1,7 +1,28 @@
-import matplotlib.pyplot as plt
 import numpy as np
 
+from bounds import INSIDE, OUTSIDE, PARTIAL, Bounds
+from camera import Camera, clip_edges_near
+from geometry import (clip_segments_box, edge_face_incidence, edge_segments, edges_from_adjacency, extrude,
+                      extrusion_topology)
+from hidden_line import visible_edge_segments, visible_model_segments
+from lod import FULL, LOD_NAMES, POINT, LevelsOfDetail
+from offscreen import render_frames
+from picking import PickIndex
+from profiling import FrameProfiler
+from quaternion import EulerAngle, QuaternionRotation, quaternion_to_matrix
+from raster import clear_framebuffer, new_framebuffer, rasterize_lines
+from scheduler import FrameScheduler
+from transforms import TransformCache, point_coords, transform_points
+
+# Библиотеки графики импортируются в методах, создающих фигуру: Creeper без окна
+# (расчеты, растеризация, процессы экспорта кадров) их не загружает
+
 class Creeper:
+    # Углы Эйлера для подписи и для задания состояния; сам поворот хранится кватернионом
+    rotation_x = EulerAngle(0)
+    rotation_y = EulerAngle(1)
+    rotation_z = EulerAngle(2)
+
     def __init__(self):
         front_points = np.array([
             [-4, 16, 0, 1], [4, 16, 0, 1], [4, 8, 0, 1], [3, 8, 0, 1], [-3, 8, 0, 1], [-4, 8, 0, 1],
@@ -12,32 +33,71 @@ class Creeper:
             [-2, 12, 0, 1], [-2, 9, 0, 1], [-1, 9, 0, 1], [-1, 10, 0, 1], [1, 10, 0, 1], [1, 9, 0, 1]
         ], dtype=float)
 
-        back_points = front_points[0:18].copy()
-        back_points[:, 2] = -8
-
-        self.original_points = np.vstack((front_points, back_points))
+        self.adjacency = {
+            0: [1, 5], 1: [0, 2], 2: [1, 3], 3: [2, 17], 4: [3, 5], 5: [0, 4], 
+            6: [4, 7, 17], 7: [6, 8], 8: [7, 9, 15], 9: [8, 10], 10: [9, 11], 
+            11: [10, 12], 12: [11, 13], 13: [12, 14], 14: [13, 15, 16], 15: [8, 11, 14], 
+            16: [14, 17], 17: [3, 16], 18: [19, 35], 19: [18, 20], 20: [19, 21], 
+            21: [20, 22, 24, 25], 22: [21, 23], 23: [22, 24], 24: [21, 23], 
+            25: [21, 26, 28, 29], 26: [25, 27], 27: [26, 28], 28: [25, 27], 
+            29: [25, 30], 30: [29, 31], 31: [30, 32], 32: [31, 33], 33: [32, 34], 
+            34: [33, 35], 35: [18, 34]
+        }
+        # Тело (первые 18 точек) выдавливается на глубину 8, лицо остается только спереди
+        num_front = len(front_points)
+        num_back = 18
+        self.original_points, self.edges = extrude(front_points[:, :2], edges_from_adjacency(self.adjacency),
+                                                   depth=-8, subset=np.arange(num_back))
+
+        # Грани выдавленного тела: передняя и задняя крышки по контуру и боковые стенки
+        self.outline = [0, 1, 2, 3, 17, 16, 14, 13, 12, 11, 10, 9, 8, 7, 6, 4, 5]
+        self.triangles, self.face_ids, face_members = extrusion_topology(
+            self.original_points, self.outline, num_front,
+            np.arange(num_front), np.arange(num_back) + num_front)
+        self.edge_faces = edge_face_incidence(self.edges, face_members, len(self.original_points))
 
         self.scale_x = 1.0
         self.scale_y = 1.0
         self.scale_z = 1.0
         self.translation = np.array([0.0, 0.0, 0.0])
-        self.rotation_x = 0.0
-        self.rotation_y = 0.0
-        self.rotation_z = 0.0
+        self.rotation = QuaternionRotation()
         self.rotation_step = 5.0
         self.move_step = 0.5
         self.scale_step = 0.1
+        self.camera = Camera()
+        self.raster_color = (255, 20, 147)
+        self.raster_background = (255, 240, 245)
+        self.profiler = FrameProfiler()
+        self.trace_path = 'frame_trace.json'
+        self.scheduler = FrameScheduler(self.update_plot, fps=30)
+        self.transform_cache = TransformCache()
 
         self.fig = None
         self.ax = None
+        self.render_mode = 'collection'
+        # Удаление невидимых линий в окне, переключается клавишей h
+        self.hidden_lines = False
         self.lines = []
+        self.wireframe = None
         self.points_plot = None
-        self.texts = []
+        self.selection_plot = None
         self.info_text = None
+        # Выбор мышью: радиус в пикселях, индекс по экранным вершинам и выбранные вершина или ребро
+        self.pick_radius = 8
+        self.pick_index = None
+        self.pick_key = None
+        self.selection = None
+        self.dragging = False
+        self.drag_depth = 0.0
 
         self.fixed_xlim = (-20, 20)
         self.fixed_ylim = (-20, 20)
         self.fixed_zlim = (-20, 20)
+        self.bounds = Bounds(self.original_points)
+        self.visibility = None
+        self.lod = LevelsOfDetail(self.original_points, self.edges,
+                                  [self.outline, np.add(self.outline, num_front)])
+        self.lod_level = FULL
 
         self.screen_center_x = 0.0
         self.screen_center_y = 0.0
@@ -46,6 +106,15 @@ class Creeper:
         self.screen_scale_y = 1.0
         self.screen_scale_z = 1.0
 
+    @property
+    def target_fps(self):
+        # Частота кадров хранится в планировщике, присваивание сразу меняет интервал таймера
+        return self.scheduler.fps
+
+    @target_fps.setter
+    def target_fps(self, fps):
+        self.scheduler.set_fps(fps)
+
     def get_scale_matrix(self, scale_x, scale_y, scale_z):
         return np.array([
             [scale_x, 0, 0, 0],
@@ -54,33 +123,6 @@ class Creeper:
             [0, 0, 0, 1]
         ])
 
-    def get_rotation_x_matrix(self, angle_deg):
-        angle_rad = np.radians(angle_deg)
-        return np.array([
-            [1, 0, 0, 0],
-            [0, np.cos(angle_rad), -np.sin(angle_rad), 0],
-            [0, np.sin(angle_rad), np.cos(angle_rad), 0],
-            [0, 0, 0, 1]
-        ])
-
-    def get_rotation_y_matrix(self, angle_deg):
-        angle_rad = np.radians(angle_deg)
-        return np.array([
-            [np.cos(angle_rad), 0, np.sin(angle_rad), 0],
-            [0, 1, 0, 0],
-            [-np.sin(angle_rad), 0, np.cos(angle_rad), 0],
-            [0, 0, 0, 1]
-        ])
-
-    def get_rotation_z_matrix(self, angle_deg):
-        angle_rad = np.radians(angle_deg)
-        return np.array([
-            [np.cos(angle_rad), -np.sin(angle_rad), 0, 0],
-            [np.sin(angle_rad), np.cos(angle_rad), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]
-        ])
-
     def get_translation_matrix(self, tx, ty, tz):
         return np.array([
             [1, 0, 0, tx],
@@ -97,19 +139,33 @@ class Creeper:
             [0, 0, 0, 1]
         ])
 
+    def get_rotation_matrix(self, w, x, y, z):
+        return quaternion_to_matrix((w, x, y, z))
+
+    def get_transformation_matrix(self):
+        return self.transform_cache.compose([
+            ('translation', self.get_translation_matrix, tuple(self.translation)),
+            ('rotation', self.get_rotation_matrix, tuple(self.rotation.quaternion)),
+            ('scale', self.get_scale_matrix, (self.scale_x, self.scale_y, self.scale_z)),
+            ('reflection_y', self.get_reflection_y_matrix, ()),
+        ])
+
     def apply_transformations(self):
-        scale_matrix = self.get_scale_matrix(self.scale_x, self.scale_y, self.scale_z)
-        rotation_x_matrix = self.get_rotation_x_matrix(self.rotation_x)
-        rotation_y_matrix = self.get_rotation_y_matrix(self.rotation_y)
-        rotation_z_matrix = self.get_rotation_z_matrix(self.rotation_z)
-        translation_matrix = self.get_translation_matrix(self.translation[0], self.translation[1], self.translation[2])
-        reflection_y_matrix = self.get_reflection_y_matrix()
-
-        transformation_matrix = translation_matrix @ rotation_z_matrix @ rotation_y_matrix @ rotation_x_matrix @ scale_matrix @ reflection_y_matrix
-        transformed_points = np.zeros_like(self.original_points)
-        for i in range(len(self.original_points)):
-            transformed_points[i] = transformation_matrix @ self.original_points[i]
-        return transformed_points
+        self.get_transformation_matrix()
+        return self.transform_cache.apply(self.original_points)
+
+    def get_view_window(self):
+        # Окно fixed_xlim x fixed_ylim x fixed_zlim в мировых координатах
+        corners = self.screen_to_world(np.array((self.fixed_xlim, self.fixed_ylim, self.fixed_zlim), dtype=float).T)
+        return corners.min(axis=0), corners.max(axis=0)
+
+    def get_visibility(self):
+        # Проверка по ограничивающим объемам за O(1), без преобразования вершин
+        return self.bounds.classify(self.get_transformation_matrix(), *self.get_view_window())
+
+    def get_pixels_per_unit(self):
+        # Пикселей экрана на единицу мировых координат по оси x
+        return self.ax.bbox.width * self.screen_scale_x / (self.fixed_xlim[1] - self.fixed_xlim[0])
 
     def world_to_screen(self, points):
         world_xyz = points[:, :3]
@@ -126,83 +182,97 @@ class Creeper:
         world_xyz[:, 2] = (screen_points[:, 2] - self.screen_center_z) / self.screen_scale_z
         return world_xyz
 
-    def update_plot(self):
+    def create_artists(self):
+        from mpl_toolkits.mplot3d.art3d import Line3DCollection
+        if self.render_mode == 'collection':
+            self.wireframe = Line3DCollection([], colors='deeppink', linewidths=2.5)
+            self.ax.add_collection(self.wireframe)
+        else:
+            self.lines = [self.ax.plot([], [], [], color='deeppink', linewidth=2.5)[0] for _ in range(len(self.edges))]
+        self.points_plot = self.ax.scatter([], [], [], color='hotpink', s=6)
+        self.selection_plot, = self.ax.plot([], [], [], 'o-', color='mediumvioletred', linewidth=4, markersize=8)
+        self.info_text = self.ax.text2D(0.02, 0.98, '', transform=self.ax.transAxes, fontsize=10,
+                                        verticalalignment='top', bbox=dict(boxstyle='round', facecolor='pink', alpha=0.8))
+
+    def update_plot(self, world_points=None, visibility=None):
         if self.fig is None:
             return
 
-        for line in self.lines:
-            if line in self.ax.lines:
-                line.remove()
-        self.lines = []
-
-        if self.points_plot is not None:
-            self.points_plot.remove()
-
-        for text in self.texts:
-            if text in self.ax.texts:
-                text.remove()
-        self.texts = []
-
-        if self.info_text is not None and self.info_text in self.ax.texts:
-            self.info_text.remove()
-
-        world_points = self.apply_transformations()
-        screen_points = self.world_to_screen(world_points)
-
-        num_front = 36
-        front_adjacency = {
-            0: [1, 5], 1: [0, 2], 2: [1, 3], 3: [2, 17], 4: [3, 5], 5: [0, 4], 
-            6: [4, 7, 17], 7: [6, 8], 8: [7, 9, 15], 9: [8, 10], 10: [9, 11], 
-            11: [10, 12], 12: [11, 13], 13: [12, 14], 14: [13, 15, 16], 15: [8, 11, 14], 
-            16: [14, 17], 17: [3, 16], 18: [19, 35], 19: [18, 20], 20: [19, 21], 
-            21: [20, 22, 24, 25], 22: [21, 23], 23: [22, 24], 24: [21, 23], 
-            25: [21, 26, 28, 29], 26: [25, 27], 27: [26, 28], 28: [25, 27], 
-            29: [25, 30], 30: [29, 31], 31: [30, 32], 32: [31, 33], 33: [32, 34], 
-            34: [33, 35], 35: [18, 34]
-        }
-        back_adjacency = {k + num_front: [v + num_front for v in vals if v < 18] for k, vals in front_adjacency.items() if k < 18}
-        connections = {i: [i + num_front] for i in range(18)}
-
-        for point_idx, connected_points in front_adjacency.items():
-            x1, y1, z1 = screen_points[point_idx]
-            for connected_idx in connected_points:
-                x2, y2, z2 = screen_points[connected_idx]
-                line, = self.ax.plot([x1, x2], [y1, y2], [z1, z2], color='deeppink', linewidth=2.5)
-                self.lines.append(line)
-
-        for point_idx, connected_points in back_adjacency.items():
-            x1, y1, z1 = screen_points[point_idx]
-            for connected_idx in connected_points:
-                x2, y2, z2 = screen_points[connected_idx]
-                line, = self.ax.plot([x1, x2], [y1, y2], [z1, z2], color='deeppink', linewidth=2.5)
-                self.lines.append(line)
-
-        for point_idx, connected_points in connections.items():
-            x1, y1, z1 = screen_points[point_idx]
-            for connected_idx in connected_points:
-                x2, y2, z2 = screen_points[connected_idx]
-                line, = self.ax.plot([x1, x2], [y1, y2], [z1, z2], color='deeppink', linewidth=2.5)
-                self.lines.append(line)
-
-        x_coords = screen_points[:, 0]
-        y_coords = screen_points[:, 1]
-        z_coords = screen_points[:, 2]
-        self.points_plot = self.ax.scatter(x_coords, y_coords, z_coords, color='hotpink', s=6)
-
-        info_text_str = (f'Масштаб X: {self.scale_x:.2f}\n'
-                         f'Масштаб Y: {self.scale_y:.2f}\n'
-                         f'Масштаб Z: {self.scale_z:.2f}\n'
-                         f'Поворот X: {self.rotation_x:.1f}°\n'
-                         f'Поворот Y: {self.rotation_y:.1f}°\n'
-                         f'Поворот Z: {self.rotation_z:.1f}°\n'
-                         f'Позиция: ({self.translation[0]:.2f}, {self.translation[1]:.2f}, {self.translation[2]:.2f})')
-        self.info_text = self.ax.text2D(0.02, 0.98, info_text_str, transform=self.ax.transAxes, fontsize=10,
-                                        verticalalignment='top', bbox=dict(boxstyle='round', facecolor='pink', alpha=0.8))
-
-        self.ax.set_xlim(self.fixed_xlim)
-        self.ax.set_ylim(self.fixed_ylim)
-        self.ax.set_zlim(self.fixed_zlim)
-        self.fig.canvas.draw()
+        self.profiler.begin_frame()
+        with self.profiler.stage('матрица'):
+            if world_points is None:
+                self.visibility = self.get_visibility()
+            else:
+                # Кадр запеченной анимации: матрица и вершины посчитаны заранее
+                self.visibility = INSIDE if visibility is None else visibility
+        with self.profiler.stage('вершины'):
+            if self.visibility == OUTSIDE:
+                # Крипер целиком за пределами окна: вершины не преобразуем и ничего не рисуем
+                screen_points = np.empty((0, 3))
+                segments = np.empty((0, 2, 3))
+            else:
+                edges = self.edges
+                if world_points is None:
+                    # Мелкий на экране крипер рисуется упрощенной моделью; кадр анимации - всегда целиком
+                    matrix = self.get_transformation_matrix()
+                    self.lod_level = self.lod.select(matrix, self.get_pixels_per_unit())
+                    if self.lod_level == FULL:
+                        world_points = self.apply_transformations()
+                    else:
+                        world_points, edges = self.lod.transform_level(self.lod_level, matrix)
+                else:
+                    self.lod_level = FULL
+                screen_points = self.world_to_screen(world_points)
+                if self.hidden_lines and self.lod_level == FULL and self.triangles is not None:
+                    segments = self.get_visible_segments(screen_points)
+                else:
+                    segments = edge_segments(screen_points, edges)
+                if self.lod_level not in (FULL, POINT):
+                    # Маркеры вершин упрощенной модели сливаются в пятно
+                    screen_points = screen_points[:0]
+                if self.visibility == PARTIAL:
+                    lo, hi = np.array((self.fixed_xlim, self.fixed_ylim, self.fixed_zlim)).T
+                    starts, ends, _ = clip_segments_box(segments[:, 0], segments[:, 1], lo, hi)
+                    segments = np.stack((starts, ends), axis=1)
+
+        with self.profiler.stage('артисты'):
+            if self.render_mode == 'collection':
+                self.wireframe.set_segments(segments)
+            else:
+                if len(segments) > len(self.lines):
+                    # Невидимые линии режут ребро на несколько частей: линий бывает нужно больше, чем ребер
+                    self.lines += [self.ax.plot([], [], [], color='deeppink', linewidth=2.5)[0]
+                                   for _ in range(len(segments) - len(self.lines))]
+                for i, line in enumerate(self.lines):
+                    if i < len(segments):
+                        line.set_data_3d(segments[i, :, 0], segments[i, :, 1], segments[i, :, 2])
+                    else:
+                        line.set_data_3d([], [], [])
+
+            self.points_plot.set_offsets(screen_points[:, :2])
+            self.points_plot.set_3d_properties(screen_points[:, 2], 'z')
+            selected = self.get_selected_points(screen_points)
+            self.selection_plot.set_data_3d(selected[:, 0], selected[:, 1], selected[:, 2])
+
+            info = (f'Масштаб X: {self.scale_x:.2f}\n'
+                    f'Масштаб Y: {self.scale_y:.2f}\n'
+                    f'Масштаб Z: {self.scale_z:.2f}\n'
+                    f'Поворот X: {self.rotation_x:.1f}°\n'
+                    f'Поворот Y: {self.rotation_y:.1f}°\n'
+                    f'Поворот Z: {self.rotation_z:.1f}°\n'
+                    f'Позиция: ({self.translation[0]:.2f}, {self.translation[1]:.2f}, {self.translation[2]:.2f})')
+            if self.selection is not None:
+                info += '\n' + self.get_selection_text()
+            if self.lod_level != FULL:
+                info += f'\nДетализация: {LOD_NAMES[self.lod_level]}'
+            if self.hidden_lines:
+                info += '\nНевидимые линии скрыты'
+            if self.profiler.enabled:
+                info += '\n' + self.profiler.format_line()
+            self.info_text.set_text(info)
+        with self.profiler.stage('отрисовка'):
+            self.fig.canvas.draw()
+        self.profiler.end_frame()
 
     def on_key_press(self, event):
         if event.key == '=' or event.key == 'add':
@@ -238,31 +308,118 @@ class Creeper:
         elif event.key == 'e':
             self.translation[2] -= self.move_step
         elif event.key == 'control':
-            self.rotation_z += self.rotation_step
+            self.rotation.rotate('z', self.rotation_step)
         elif event.key == 'shift':
-            self.rotation_z -= self.rotation_step
+            self.rotation.rotate('z', -self.rotation_step)
         elif event.key == 'a':
-            self.rotation_x += self.rotation_step
+            self.rotation.rotate('x', self.rotation_step)
         elif event.key == 'd':
-            self.rotation_x -= self.rotation_step
+            self.rotation.rotate('x', -self.rotation_step)
         elif event.key == 'w':
-            self.rotation_y += self.rotation_step
+            self.rotation.rotate('y', self.rotation_step)
         elif event.key == 'r':
-            self.rotation_y -= self.rotation_step
-
-        self.update_plot()
-
-    def draw(self):
-        plt.ion()
-        self.fig = plt.figure(figsize=(12, 12))
-        self.ax = self.fig.add_subplot(111, projection='3d')
+            self.rotation.rotate('y', -self.rotation_step)
+        elif event.key == 'i':
+            self.profiler.toggle()
+        elif event.key == 'h':
+            self.hidden_lines = not self.hidden_lines
+        self.scheduler.request()
+
+    def project_to_axes(self, screen_points):
+        # Координаты сцены -> плоские координаты осей mplot3d и глубина, той же матрицей, что при отрисовке
+        from mpl_toolkits.mplot3d import proj3d
+        return np.column_stack(proj3d.proj_transform(*screen_points.T, self.ax.get_proj()))
+
+    def get_visible_segments(self, screen_points):
+        # Видимые части ребер для текущего вида осей: тест глубины в пикселях окна (проекция осей,
+        # затем transData), а отрезки остаются в координатах сцены - их проецирует сам mplot3d
+        affine = self.ax.transData.get_matrix()
+        pixels = np.array([[affine[0, 0], affine[0, 1], 0, affine[0, 2]],
+                           [affine[1, 0], affine[1, 1], 0, affine[1, 2]],
+                           [0, 0, 1, 0],
+                           [0, 0, 0, 1]])
+        clip_points = np.column_stack((screen_points, np.ones(len(screen_points)))) @ (pixels @ self.ax.get_proj()).T
+        return visible_model_segments(screen_points, clip_points, self.original_points, self.edges,
+                                      self.triangles, self.face_ids, self.edge_faces)
+
+    def get_pick_index(self):
+        # Индекс по пикселям вершин пересобирается, только если сменились матрица, точки, окно или вид осей
+        world_points = self.apply_transformations()
+        key = (self.transform_cache.version, self.ax.bbox.bounds, self.ax.get_proj().tobytes())
+        if self.pick_index is None or key != self.pick_key:
+            projected = self.project_to_axes(self.world_to_screen(world_points))
+            self.pick_index = PickIndex(self.ax.transData.transform(projected[:, :2]), self.edges)
+            self.pick_key = key
+        return self.pick_index
+
+    def get_selected_points(self, screen_points):
+        if self.selection is None or self.lod_level != FULL or not len(screen_points):
+            return np.empty((0, 3))
+        kind, index = self.selection
+        return screen_points[[index]] if kind == 'vertex' else screen_points[self.edges[index]]
+
+    def get_selection_text(self):
+        kind, index = self.selection
+        if kind == 'vertex':
+            x, y, z = point_coords(self.original_points)[index, :3]
+            return f'Вершина {index}: ({x:.2f}, {y:.2f}, {z:.2f})'
+        return f'Ребро {index}: {self.edges[index, 0]} - {self.edges[index, 1]}'
+
+    def move_vertex(self, index, coords):
+        # Правка исходной модели (extrude и кэш загруженной модели отдают данные только для чтения,
+        # поэтому сначала копия); кэш вершин сбрасывается, индекс выбора пересоберется при следующем щелчке
+        if not point_coords(self.original_points).flags.writeable:
+            self.original_points = self.original_points.copy()
+        point_coords(self.original_points)[index] = coords
+        self.transform_cache.invalidate()
+
+    def on_mouse_press(self, event):
+        if event.inaxes is not self.ax or event.button != 1:
+            return
+        if self.visibility == OUTSIDE or self.lod_level != FULL:
+            self.selection = None
+        else:
+            self.selection = self.get_pick_index().pick(event.x, event.y, self.pick_radius)
+        self.dragging = self.selection is not None and self.selection[0] == 'vertex'
+        if self.dragging:
+            # Пока вершина тащится, левая кнопка не вращает оси
+            self.ax.disable_mouse_rotation()
+            vertex = self.apply_transformations()[[self.selection[1]]]
+            self.drag_depth = self.project_to_axes(self.world_to_screen(vertex))[0, 2]
+        self.scheduler.request()
+
+    def on_mouse_move(self, event):
+        if not self.dragging or event.inaxes is not self.ax:
+            return
+        x, y = self.ax.transData.inverted().transform((event.x, event.y))
+        # Обратная проекция курсора на той глубине, где вершина была при щелчке
+        screen = np.linalg.solve(self.ax.get_proj(), [x, y, self.drag_depth, 1.0])
+        world = self.screen_to_world(screen[None, :3] / screen[3])[0]
+        model = np.linalg.solve(self.get_transformation_matrix(), np.append(world, 1.0))
+        self.move_vertex(self.selection[1], model[:-1])
+        self.scheduler.request()
+
+    def on_mouse_release(self, event):
+        if self.hidden_lines:
+            # Оси могли повернуть мышью, а видимость ребер зависит от направления взгляда
+            self.scheduler.request()
+        if not self.dragging:
+            return
+        self.dragging = False
+        self.ax.mouse_init()
+        # Объемы отсечения и уровни детализации по новой форме модели; грани выдавливания остаются прежними
+        self.bounds = Bounds(self.original_points)
+        self.lod = LevelsOfDetail(self.original_points, self.edges, self.lod.outlines, self.lod.thresholds)
+
+    def on_close(self, event):
+        # При закрытии окна сохраняем собранные замеры для chrome://tracing или Perfetto
+        if self.profiler.frames and self.trace_path:
+            count = self.profiler.export_chrome_trace(self.trace_path)
+            print(f'Замеры {count} кадров сохранены в {self.trace_path}')
+
+    def setup_figure(self):
         self.ax.set_aspect('equal')
         self.fig.subplots_adjust(left=0.02, right=0.98, top=0.95, bottom=0.05)
-        fig_manager = plt.get_current_fig_manager()
-        try:
-            fig_manager.window.showMaximized()
-        except AttributeError:
-            fig_manager.window.state('zoomed')
 
         self.fig.patch.set_facecolor('lightpink')
         self.ax.set_facecolor('lavenderblush')
@@ -290,17 +447,86 @@ class Creeper:
                        "Ctrl - поворот в плоскости (вокруг Z) +\n"
                        "Shift - поворот в плоскости (вокруг Z) -\n"
                        "A/D - поворот по оси X +/-\n"
-                       "W/R - поворот по оси Y +/-")
+                       "W/R - поворот по оси Y +/-\n"
+                       "I - замер времени кадра (FPS)\n"
+                       "H - скрыть невидимые линии\n"
+                       "Мышь - выбор вершины или ребра,\n"
+                       "перетаскивание вершины")
         self.ax.text2D(0.98, 0.02, instructions, transform=self.ax.transAxes, fontsize=9,
                      verticalalignment='bottom', horizontalalignment='right',
                      bbox=dict(boxstyle='round', facecolor='lightpink', alpha=0.8))
 
+        self.create_artists()
+
         self.ax.set_xlim(self.fixed_xlim)
         self.ax.set_ylim(self.fixed_ylim)
         self.ax.set_zlim(self.fixed_zlim)
 
+    def create_offscreen_figure(self, figsize=(12, 12), dpi=100):
+        # Фигура без pyplot и без окна: рисуется на холсте Agg, подходит для серверов без дисплея
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111, projection='3d')
+        self.setup_figure()
+
+    def grab_frame(self):
+        # Копия: буфер холста Agg перезаписывается следующим кадром
+        return np.asarray(self.fig.canvas.buffer_rgba())[:, :, :3].copy()
+
+    def render_offscreen(self, states, output=None, fmt='png'):
+        return render_frames(self, states, output, fmt)
+
+    def project_edges(self, width, height):
+        # Модель -> камера -> проекция -> пиксели одной матрицей, затем отсечение ближней плоскостью
+        matrix = self.camera.get_screen_matrix(width, height) @ self.get_transformation_matrix()
+        return clip_edges_near(transform_points(matrix, self.original_points), self.edges)
+
+    def project_visible_edges(self, width, height):
+        # Удаление невидимых линий: отбраковка нелицевых граней и тест глубины по лицевым
+        model = self.get_transformation_matrix()
+        screen_points = transform_points(self.camera.get_screen_matrix(width, height) @ model, self.original_points)
+        if self.triangles is None or np.any(screen_points[:, 2] < 0):
+            # Нет граней (загруженная модель) или тело пересекает ближнюю плоскость: рисуем все ребра
+            return self.project_edges(width, height)[0]
+        screen_points = screen_points[:, :3] / screen_points[:, 3:]
+        orientation = np.sign(np.linalg.det(model[:3, :3]))
+        return visible_edge_segments(screen_points, self.edges, self.triangles, self.face_ids,
+                                     self.edge_faces, orientation)
+
+    def rasterize(self, width=800, height=800, antialiased=True, out=None, hidden_lines=False):
+        if hidden_lines:
+            segments = self.project_visible_edges(width, height)
+        else:
+            segments, _ = self.project_edges(width, height)
+        if out is None:
+            out = new_framebuffer(width, height, self.raster_background)
+        else:
+            clear_framebuffer(out, self.raster_background)
+        return rasterize_lines(out, segments[:, 0, :2], segments[:, 1, :2], self.raster_color, antialiased)
+
+    def draw(self):
+        import matplotlib.pyplot as plt
+        plt.ion()
+        self.fig = plt.figure(figsize=(12, 12))
+        self.ax = self.fig.add_subplot(111, projection='3d')
+        fig_manager = plt.get_current_fig_manager()
+        try:
+            fig_manager.window.showMaximized()
+        except AttributeError:
+            if hasattr(fig_manager, 'window'):
+                fig_manager.window.state('zoomed')
+
+        self.setup_figure()
+
         self.update_plot()
+        self.scheduler.attach(self.fig.canvas)
         self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
+        self.fig.canvas.mpl_connect('button_press_event', self.on_mouse_press)
+        self.fig.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+        self.fig.canvas.mpl_connect('button_release_event', self.on_mouse_release)
+        self.fig.canvas.mpl_connect('close_event', self.on_close)
         plt.show(block=True)
 
 if __name__ == "__main__":
@@ -1,9 +1,38 @@
-import plotly.graph_objects as go
 import numpy as np
-import plotly.io as pio
-import matplotlib.pyplot as plt  # Переносим импорт сюда
+
+from bounds import INSIDE, OUTSIDE, PARTIAL, Bounds
+from camera import Camera, clip_edges_near
+from geometry import (EdgeAdjacency, clip_segments_box, edge_face_incidence, edge_polyline, edge_segments,
+                      edges_from_adjacency, extrude, extrusion_topology, segment_polyline)
+from hidden_line import visible_edge_segments, visible_model_segments
+from lod import FULL, LOD_NAMES, POINT, LevelsOfDetail
+from offscreen import render_frames
+from profiling import FrameProfiler
+from quaternion import EulerAngle, QuaternionRotation, quaternion_to_matrix
+from raster import clear_framebuffer, new_framebuffer, rasterize_lines
+from scheduler import FrameScheduler
+from transforms import TransformCache, transform_points
+
+# Plotly и matplotlib импортируются в методах, создающих фигуры: Creeper без окна
+# (расчеты, растеризация, процессы экспорта кадров) их не загружает
+
+
+def in_ipython_kernel():
+    # FigureWidget показывается только ядром Jupyter; при запуске из терминала его некуда вывести
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return False
+    shell = get_ipython()
+    return shell is not None and 'IPKernelApp' in shell.config
+
 
 class Creeper:
+    # Углы Эйлера для подписи и для задания состояния; сам поворот хранится кватернионом
+    rotation_angle_x = EulerAngle(0)
+    rotation_angle_y = EulerAngle(1)
+    rotation_angle_z = EulerAngle(2)
+
     def __init__(self):
         original_2d_points = np.array([
             [-4, 16, 1], [4, 16, 1], [4, 8, 1], [3, 8, 1], [-3, 8, 1], [-4, 8, 1],
@@ -13,9 +42,6 @@ class Creeper:
             [1, 15, 1], [-1, 13, 1], [-1, 15, 1], [-3, 15, 1], [-3, 13, 1], [-1, 12, 1],
             [-2, 12, 1], [-2, 9, 1], [-1, 9, 1], [-1, 10, 1], [1, 10, 1], [1, 9, 1]
         ], dtype=float)
-        front_points = np.hstack((original_2d_points[:, :2], np.zeros((36, 1)), np.ones((36, 1))))
-        back_points = np.hstack((original_2d_points[:, :2], np.full((36, 1), 5), np.ones((36, 1))))
-        self.original_points = np.vstack((front_points, back_points))
         original_adjacency = {
             0: [1, 5], 1: [0, 2], 2: [1, 3], 3: [2, 17], 4: [3, 5], 5: [0, 4],
             6: [4, 7, 17], 7: [6, 8], 8: [7, 9, 15], 9: [8, 10], 10: [9, 11],
@@ -26,57 +52,55 @@ class Creeper:
             29: [25, 30], 30: [29, 31], 31: [30, 32], 32: [31, 33], 33: [32, 34],
             34: [33, 35], 35: [18, 34]
         }
-        self.adjacency = {}
-        for k, v in original_adjacency.items():
-            self.adjacency[k] = list(v)
-        offset = 36
-        for k, v in original_adjacency.items():
-            self.adjacency[k + offset] = [x + offset for x in v]
-        for i in range(36):
-            self.adjacency[i].append(i + offset)
-            self.adjacency[i + offset].append(i)
+        # Весь контур вместе с лицом выдавливается на глубину 5
+        offset = len(original_2d_points)
+        self.original_points, self.edges = extrude(original_2d_points, edges_from_adjacency(original_adjacency), depth=5)
+        self.adjacency = EdgeAdjacency(self.edges, len(self.original_points))
+        # Грани выдавленного тела: передняя и задняя крышки по контуру и боковые стенки
+        self.outline = [0, 1, 2, 3, 17, 16, 14, 13, 12, 11, 10, 9, 8, 7, 6, 4, 5]
+        self.triangles, self.face_ids, face_members = extrusion_topology(
+            self.original_points, self.outline, offset, np.arange(offset), np.arange(offset) + offset)
+        self.edge_faces = edge_face_incidence(self.edges, face_members, len(self.original_points))
         self.scale = 1.0
         self.translation = np.array([0.0, 0.0, 0.0])
-        self.rotation_angle_x = 0.0
-        self.rotation_angle_y = 0.0
-        self.rotation_angle_z = 0.0
+        self.rotation = QuaternionRotation()
         self.rotation_step = 5.0
         self.move_step = 0.5
         self.scale_step = 0.4
+        self.camera = Camera()
+        self.raster_color = (255, 20, 147)
+        self.raster_background = (255, 240, 245)
+        self.profiler = FrameProfiler()
+        self.trace_path = 'frame_trace.json'
+        self.scheduler = FrameScheduler(self.render_frame, fps=10)
+        self.transform_cache = TransformCache()
         self.fig = None
+        self.use_widget = True
+        self.is_widget = False
+        self.live_page = None
+        self.camera_version = 0
+        self.camera_timer = None
+        # Удаление невидимых линий в окне, переключается клавишей h
+        self.hidden_lines = False
         self.fixed_xlim = (-20, 20)
         self.fixed_ylim = (-20, 20)
         self.fixed_zlim = (-20, 20)
+        self.bounds = Bounds(self.original_points)
+        self.visibility = None
+        self.lod = LevelsOfDetail(self.original_points, self.edges, [self.outline, np.add(self.outline, offset)])
+        self.lod_level = FULL
 
-    def get_scale_matrix(self, scale):
-        return np.diag([scale, scale, scale, 1])
+    @property
+    def target_fps(self):
+        # Частота кадров хранится в планировщике, присваивание сразу меняет интервал таймера
+        return self.scheduler.fps
 
-    def get_rotation_matrix_x(self, angle_deg):
-        angle_rad = np.radians(angle_deg)
-        return np.array([
-            [1, 0, 0, 0],
-            [0, np.cos(angle_rad), -np.sin(angle_rad), 0],
-            [0, np.sin(angle_rad), np.cos(angle_rad), 0],
-            [0, 0, 0, 1]
-        ])
+    @target_fps.setter
+    def target_fps(self, fps):
+        self.scheduler.set_fps(fps)
 
-    def get_rotation_matrix_y(self, angle_deg):
-        angle_rad = np.radians(angle_deg)
-        return np.array([
-            [np.cos(angle_rad), 0, np.sin(angle_rad), 0],
-            [0, 1, 0, 0],
-            [-np.sin(angle_rad), 0, np.cos(angle_rad), 0],
-            [0, 0, 0, 1]
-        ])
-
-    def get_rotation_matrix_z(self, angle_deg):
-        angle_rad = np.radians(angle_deg)
-        return np.array([
-            [np.cos(angle_rad), -np.sin(angle_rad), 0, 0],
-            [np.sin(angle_rad), np.cos(angle_rad), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]
-        ])
+    def get_scale_matrix(self, scale):
+        return np.diag([scale, scale, scale, 1])
 
     def get_translation_matrix(self, tx, ty, tz):
         return np.array([
@@ -94,37 +118,56 @@ class Creeper:
             [0, 0, 0, 1]
         ])
     
+    def get_rotation_matrix(self, w, x, y, z):
+        return quaternion_to_matrix((w, x, y, z))
+
+    def get_transformation_matrix(self):
+        return self.transform_cache.compose([
+            ('translation', self.get_translation_matrix, tuple(self.translation)),
+            ('rotation', self.get_rotation_matrix, tuple(self.rotation.quaternion)),
+            ('scale', self.get_scale_matrix, (self.scale,)),
+            ('reflection_y', self.get_reflection_y_matrix, ()),
+        ])
+
     def apply_transformations(self):
-        scale_matrix = self.get_scale_matrix(self.scale)
-        rx = self.get_rotation_matrix_x(self.rotation_angle_x)
-        ry = self.get_rotation_matrix_y(self.rotation_angle_y)
-        rz = self.get_rotation_matrix_z(self.rotation_angle_z)
-        rotation_matrix = rz @ ry @ rx
-        translation_matrix = self.get_translation_matrix(self.translation[0], self.translation[1], self.translation[2])
-        reflection_y_matrix = self.get_reflection_y_matrix()
-        transformation_matrix = translation_matrix @ rotation_matrix @ scale_matrix @ reflection_y_matrix
-        transformed_points = np.zeros_like(self.original_points)
-        for i in range(len(self.original_points)):
-            transformed_points[i] = transformation_matrix @ self.original_points[i]
-        return transformed_points
-
-    def update_plot(self):
-        world_points = self.apply_transformations()
-        x_coords = world_points[:, 0]
-        y_coords = world_points[:, 1]
-        z_coords = world_points[:, 2]
-        lines = []
-        for point_idx, connected_points in self.adjacency.items():
-            x1, y1, z1 = world_points[point_idx, :3]
-            for connected_idx in connected_points:
-                x2, y2, z2 = world_points[connected_idx, :3]
-                lines.append(go.Scatter3d(
-                    x=[x1, x2], y=[y1, y2], z=[z1, z2],
-                    mode='lines',
-                    line=dict(color='deeppink', width=5)
-                ))
+        self.get_transformation_matrix()
+        return self.transform_cache.apply(self.original_points)
+
+    def get_pixels_per_unit(self):
+        # Пикселей экрана на единицу мировых координат: сцена-куб занимает ширину фигуры (700 по умолчанию)
+        return (self.fig.layout.width or 700) / (self.fixed_xlim[1] - self.fixed_xlim[0])
+
+    def get_info_text(self):
+        return (f"Масштаб: {self.scale:.2f}x<br>"
+                f"Поворот X: {self.rotation_angle_x:.1f}°<br>"
+                f"Поворот Y: {self.rotation_angle_y:.1f}°<br>"
+                f"Поворот Z: {self.rotation_angle_z:.1f}°<br>"
+                f"Позиция: ({self.translation[0]:.2f}, {self.translation[1]:.2f}, {self.translation[2]:.2f})<br>"
+                + (f"Детализация: {LOD_NAMES[self.lod_level]}<br>" if self.lod_level != FULL else "")
+                + ("Невидимые линии скрыты<br>" if self.hidden_lines else "") +
+                "Инструкция:<br>"
+                "+ - увеличение масштаба<br>"
+                "- - уменьшение масштаба<br>"
+                "Стрелки - перемещение по x y<br>"
+                "q/e - перемещение по z<br>"
+                "r/f - поворот вокруг x<br>"
+                "t/g - поворот вокруг y<br>"
+                "Ctrl - поворот вокруг z вправо<br>"
+                "Shift - поворот вокруг z влево<br>"
+                "h - скрыть невидимые линии<br>"
+                "i - замер времени кадра (FPS)"
+                + (f"<br>{self.profiler.format_line()}" if self.profiler.enabled else ""))
+
+    def create_figure(self):
+        import plotly.graph_objects as go
+        wireframe = go.Scatter3d(
+            x=[], y=[], z=[],
+            mode='lines',
+            line=dict(color='deeppink', width=5),
+            connectgaps=False
+        )
         points = go.Scatter3d(
-            x=x_coords, y=y_coords, z=z_coords,
+            x=[], y=[], z=[],
             mode='markers',
             marker=dict(size=6, color='hotpink')
         )
@@ -140,22 +183,11 @@ class Creeper:
             paper_bgcolor='lightpink',
             showlegend=False,
             margin=dict(l=0, r=0, t=50, b=0),
+            # Постоянный uirevision: при обновлении данных камера, повернутая мышью, не сбрасывается
+            uirevision='creeper',
             annotations=[
                 dict(
-                    text=(f"Масштаб: {self.scale:.2f}x<br>"
-                          f"Поворот X: {self.rotation_angle_x:.1f}°<br>"
-                          f"Поворот Y: {self.rotation_angle_y:.1f}°<br>"
-                          f"Поворот Z: {self.rotation_angle_z:.1f}°<br>"
-                          f"Позиция: ({self.translation[0]:.2f}, {self.translation[1]:.2f}, {self.translation[2]:.2f})<br>"
-                          "Инструкция:<br>"
-                          "+ - увеличение масштаба<br>"
-                          "- - уменьшение масштаба<br>"
-                          "Стрелки - перемещение по x y<br>"
-                          "q/e - перемещение по z<br>"
-                          "r/f - поворот вокруг x<br>"
-                          "t/g - поворот вокруг y<br>"
-                          "Ctrl - поворот вокруг z вправо<br>"
-                          "Shift - поворот вокруг z влево"),
+                    text='',
                     x=0.02, y=0.98, xref="paper", yref="paper",
                     showarrow=False, align="left",
                     font=dict(size=10, color='mediumvioletred'),
@@ -163,8 +195,144 @@ class Creeper:
                 )
             ]
         )
-        self.fig = go.Figure(data=lines + [points], layout=layout)
+        # FigureWidget (Jupyter + anywidget) получает изменения как небольшие патчи,
+        # без него (или вне ядра Jupyter) используем обычную статическую фигуру в браузере
+        self.is_widget = False
+        if self.use_widget and in_ipython_kernel():
+            try:
+                self.fig = go.FigureWidget(data=[wireframe, points], layout=layout)
+                self.is_widget = True
+            except ImportError:
+                pass
+        if not self.is_widget:
+            self.fig = go.Figure(data=[wireframe, points], layout=layout)
         return self.fig
+
+    def create_offscreen_figure(self, width=1000, height=1000):
+        self.use_widget = False
+        self.create_figure()
+        self.fig.update_layout(width=width, height=height)
+
+    def grab_frame(self):
+        # Растеризация Plotly без браузера требует пакета kaleido
+        import io
+        import matplotlib.image
+        image = matplotlib.image.imread(io.BytesIO(self.fig.to_image(format='png')), format='png')
+        return (image[:, :, :3] * 255).astype(np.uint8)
+
+    def render_offscreen(self, states, output=None, fmt='png'):
+        return render_frames(self, states, output, fmt)
+
+    def project_edges(self, width, height):
+        # Модель -> камера -> проекция -> пиксели одной матрицей, затем отсечение ближней плоскостью
+        matrix = self.camera.get_screen_matrix(width, height) @ self.get_transformation_matrix()
+        return clip_edges_near(transform_points(matrix, self.original_points), self.edges)
+
+    def project_visible_edges(self, width, height):
+        # Удаление невидимых линий: отбраковка нелицевых граней и тест глубины по лицевым
+        model = self.get_transformation_matrix()
+        screen_points = transform_points(self.camera.get_screen_matrix(width, height) @ model, self.original_points)
+        if self.triangles is None or np.any(screen_points[:, 2] < 0):
+            # Нет граней (загруженная модель) или тело пересекает ближнюю плоскость: рисуем все ребра
+            return self.project_edges(width, height)[0]
+        screen_points = screen_points[:, :3] / screen_points[:, 3:]
+        orientation = np.sign(np.linalg.det(model[:3, :3]))
+        return visible_edge_segments(screen_points, self.edges, self.triangles, self.face_ids,
+                                     self.edge_faces, orientation)
+
+    def get_scene_camera(self):
+        # Камера сцены Plotly в координатах мира: страница в браузере присылает повернутую камеру,
+        # FigureWidget синхронизирует ее в layout. eye и center заданы в долях куба сцены (aspectmode='cube')
+        scene_camera = self.live_page.camera if self.live_page is not None else None
+        if scene_camera is None:
+            scene_camera = self.fig.layout.scene.camera.to_plotly_json()
+        lo, hi = np.array((self.fixed_xlim, self.fixed_ylim, self.fixed_zlim), dtype=float).T
+        center, extent = (lo + hi) / 2, hi - lo
+
+        def vector(name, default):
+            value = scene_camera.get(name) or {}
+            return np.array([value.get(axis, d) for axis, d in zip('xyz', default)], dtype=float)
+
+        projection = (scene_camera.get('projection') or {}).get('type') or 'perspective'
+        eye = center + vector('eye', (1.25, 1.25, 1.25)) * extent
+        target = center + vector('center', (0, 0, 0)) * extent
+        return Camera(eye, target, vector('up', (0, 0, 1)), fov=45.0, projection=projection,
+                      ortho_height=np.linalg.norm(eye - target))
+
+    def get_visible_segments(self, world_points):
+        # Видимые части ребер для текущей камеры Plotly: тест глубины в пикселях, отрезки - в координатах мира
+        width, height = self.fig.layout.width or 700, self.fig.layout.height or 450
+        clip_points = transform_points(self.get_scene_camera().get_screen_matrix(width, height), world_points)
+        if np.any(clip_points[:, 2] < 0):
+            # Камера внутри тела: рисуем все ребра
+            return edge_segments(world_points[:, :3], self.edges)
+        return visible_model_segments(world_points, clip_points, self.original_points, self.edges, self.triangles,
+                                      self.face_ids, self.edge_faces)[:, :, :3]
+
+    def rasterize(self, width=800, height=800, antialiased=True, out=None, hidden_lines=False):
+        if hidden_lines:
+            segments = self.project_visible_edges(width, height)
+        else:
+            segments, _ = self.project_edges(width, height)
+        if out is None:
+            out = new_framebuffer(width, height, self.raster_background)
+        else:
+            clear_framebuffer(out, self.raster_background)
+        return rasterize_lines(out, segments[:, 0, :2], segments[:, 1, :2], self.raster_color, antialiased)
+
+    def update_plot(self, world_points=None, visibility=None):
+        if self.fig is None:
+            self.create_figure()
+        self.profiler.begin_frame()
+        with self.profiler.stage('матрица'):
+            lo, hi = np.array((self.fixed_xlim, self.fixed_ylim, self.fixed_zlim), dtype=float).T
+            if world_points is None:
+                self.visibility = self.bounds.classify(self.get_transformation_matrix(), lo, hi)
+            else:
+                # Кадр запеченной анимации: матрица и вершины посчитаны заранее
+                self.visibility = INSIDE if visibility is None else visibility
+        with self.profiler.stage('вершины'):
+            if self.visibility == OUTSIDE:
+                # Крипер целиком за пределами окна: вершины не преобразуем и ничего не рисуем
+                world_points = np.empty((0, 4))
+                polyline = np.empty((0, 3))
+            else:
+                edges = self.edges
+                if world_points is None:
+                    # Мелкий на экране крипер рисуется упрощенной моделью; кадр анимации - всегда целиком
+                    matrix = self.get_transformation_matrix()
+                    self.lod_level = self.lod.select(matrix, self.get_pixels_per_unit())
+                    if self.lod_level == FULL:
+                        world_points = self.apply_transformations()
+                    else:
+                        world_points, edges = self.lod.transform_level(self.lod_level, matrix)
+                else:
+                    self.lod_level = FULL
+                if self.hidden_lines and self.lod_level == FULL and self.triangles is not None:
+                    segments = self.get_visible_segments(world_points)
+                elif self.visibility == PARTIAL:
+                    segments = edge_segments(world_points[:, :3], edges)
+                else:
+                    segments = None
+                if segments is None:
+                    polyline = edge_polyline(world_points[:, :3], edges)
+                else:
+                    if self.visibility == PARTIAL:
+                        starts, ends, _ = clip_segments_box(segments[:, 0], segments[:, 1], lo, hi)
+                        segments = np.stack((starts, ends), axis=1)
+                    polyline = segment_polyline(segments)
+                if self.lod_level not in (FULL, POINT):
+                    # Маркеры вершин упрощенной модели сливаются в пятно
+                    world_points = world_points[:0]
+        with self.profiler.stage('артисты'):
+            wireframe, points = self.fig.data
+            with self.fig.batch_update():
+                wireframe.x, wireframe.y, wireframe.z = polyline.T
+                points.x, points.y, points.z = world_points[:, :3].T
+                self.fig.layout.annotations[0].text = self.get_info_text()
+        self.profiler.end_frame()
+        return self.fig
+
     def on_key_press(self, event):
         if event.key == '=' or event.key == 'add':
             self.scale += self.scale_step
@@ -183,27 +351,73 @@ class Creeper:
         elif event.key == 'e':
             self.translation[2] -= self.move_step
         elif event.key == 'r':
-            self.rotation_angle_x += self.rotation_step
+            self.rotation.rotate('x', self.rotation_step)
         elif event.key == 'f':
-            self.rotation_angle_x -= self.rotation_step
+            self.rotation.rotate('x', -self.rotation_step)
         elif event.key == 't':
-            self.rotation_angle_y += self.rotation_step
+            self.rotation.rotate('y', self.rotation_step)
         elif event.key == 'g':
-            self.rotation_angle_y -= self.rotation_step
+            self.rotation.rotate('y', -self.rotation_step)
         elif event.key == 'control':
-            self.rotation_angle_z += self.rotation_step
+            self.rotation.rotate('z', self.rotation_step)
         elif event.key == 'shift':
-            self.rotation_angle_z -= self.rotation_step
-        self.fig = self.update_plot()
-        self.fig.show()
+            self.rotation.rotate('z', -self.rotation_step)
+        elif event.key == 'h':
+            self.hidden_lines = not self.hidden_lines
+        elif event.key == 'i':
+            self.profiler.toggle()
+        self.scheduler.request()
+
+    def on_camera_change(self, *args):
+        # Видимость ребер зависит от направления взгляда: после поворота сцены мышью кадр пересчитывается
+        if self.hidden_lines:
+            self.scheduler.request()
+
+    def check_page_camera(self):
+        if self.live_page is not None and self.live_page.camera_version != self.camera_version:
+            self.camera_version = self.live_page.camera_version
+            self.on_camera_change()
+
+    def on_close(self, event):
+        # При закрытии окна сохраняем собранные замеры для chrome://tracing или Perfetto
+        if self.profiler.frames and self.trace_path:
+            count = self.profiler.export_chrome_trace(self.trace_path)
+            print(f'Замеры {count} кадров сохранены в {self.trace_path}')
+        if self.live_page is not None:
+            self.live_page.close()
+            self.live_page = None
+
+    def render_frame(self):
+        self.update_plot()
+        if self.live_page is not None:
+            # Вне Jupyter кадр публикуется для открытой страницы, она сама обновит фигуру через Plotly.react
+            self.live_page.update(self.fig)
 
     def draw(self):
-        pio.renderers.default = 'browser'
-        plt.ion()  # Теперь plt доступен благодаря импорту в начале
-        self.fig = self.update_plot()
-        self.fig.show()
+        import matplotlib.pyplot as plt
+        plt.ion()
+        self.update_plot()
+        if self.is_widget:
+            from IPython.display import display
+            self.fig.layout.scene.on_change(self.on_camera_change, 'camera')
+            display(self.fig)
+        else:
+            import webbrowser
+            from live_page import LivePage
+            self.live_page = LivePage('Creeper - ЛР №1', self.scheduler.get_frame_interval_ms())
+            self.live_page.update(self.fig)
+            url = self.live_page.start()
+            print(f'Крипер открыт в браузере: {url} (управление - клавишами в окне matplotlib)')
+            webbrowser.open(url)
         fig, ax = plt.subplots(figsize=(1, 1))  # Создаём фигуру только для обработки клавиш
+        self.scheduler.attach(fig.canvas)
+        if self.live_page is not None:
+            # Камеру страница присылает в поток сервера, а кадр запрашиваем из цикла matplotlib
+            self.camera_timer = fig.canvas.new_timer(interval=200)
+            self.camera_timer.add_callback(self.check_page_camera)
+            self.camera_timer.start()
         fig.canvas.mpl_connect('key_press_event', self.on_key_press)
+        fig.canvas.mpl_connect('close_event', self.on_close)
         plt.show(block=True)
 
 if __name__ == "__main__":
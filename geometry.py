@@ -0,0 +1,258 @@
+import hashlib
+from collections.abc import Mapping
+
+import numpy as np
+
+
+def validate_adjacency(adjacency, num_points=None):
+    """Проверяет словарь смежности как неориентированный граф.
+
+    Возвращает словарь со списками найденных проблем:
+    asymmetric - пары (i, j), где i ссылается на j, а j на i нет;
+    duplicates - пары (i, j), где j повторяется в списке i;
+    self_loops - вершины, ссылающиеся сами на себя;
+    out_of_range - пары (i, j) с индексом вне [0, num_points).
+    """
+    report = {'asymmetric': [], 'duplicates': [], 'self_loops': [], 'out_of_range': []}
+    for point_idx, connected_points in adjacency.items():
+        seen = set()
+        for connected_idx in connected_points:
+            if connected_idx in seen:
+                report['duplicates'].append((point_idx, connected_idx))
+            seen.add(connected_idx)
+            if connected_idx == point_idx:
+                report['self_loops'].append(point_idx)
+            if num_points is not None and not (0 <= point_idx < num_points and 0 <= connected_idx < num_points):
+                report['out_of_range'].append((point_idx, connected_idx))
+            if point_idx not in adjacency.get(connected_idx, ()):
+                report['asymmetric'].append((point_idx, connected_idx))
+    return report
+
+
+def edges_from_adjacency(adjacency):
+    """Собирает из словаря смежности массив (E, 2) уникальных неориентированных ребер.
+
+    Ребро, указанное в обе стороны или несколько раз, попадает в массив один
+    раз в виде (min, max); петли отбрасываются.
+    """
+    pairs = [(point_idx, connected_idx)
+             for point_idx, connected_points in adjacency.items()
+             for connected_idx in connected_points]
+    return unique_edges(np.array(pairs, dtype=np.intp).reshape(-1, 2))
+
+
+def unique_edges(edges):
+    """Неориентированные ребра (min, max) без повторов и петель, отсортированные, массив (E, 2)."""
+    edges = np.sort(np.asarray(edges, dtype=np.intp).reshape(-1, 2), axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    if not len(edges):
+        return edges
+    # Пара кодируется одним числом: сортировка int64 намного быстрее np.unique(axis=0)
+    base = edges[:, 1].max() + 1
+    keys = np.sort(edges[:, 0] * base + edges[:, 1])
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return np.column_stack(np.divmod(keys, base))
+
+
+class EdgeAdjacency(Mapping):
+    """Словарь смежности, построенный по массиву ребер (E, 2) и хранимый в виде CSR.
+
+    Ведет себя как обычный словарь {вершина: [соседи]}, но не создает
+    миллионы списков для больших загруженных моделей: соседи лежат в одном
+    массиве indices, а indptr указывает начало списка каждой вершины.
+    """
+
+    def __init__(self, edges, num_points):
+        edges = np.asarray(edges, dtype=np.intp)
+        sources = np.concatenate((edges[:, 0], edges[:, 1]))
+        targets = np.concatenate((edges[:, 1], edges[:, 0]))
+        order = np.argsort(sources, kind='stable')
+        self.indices = targets[order]
+        self.indptr = np.zeros(num_points + 1, dtype=np.intp)
+        np.cumsum(np.bincount(sources, minlength=num_points), out=self.indptr[1:])
+
+    def __getitem__(self, point_idx):
+        if not 0 <= point_idx < len(self):
+            raise KeyError(point_idx)
+        return self.indices[self.indptr[point_idx]:self.indptr[point_idx + 1]].tolist()
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+
+def edge_segments(points, edges, out=None):
+    """Массив отрезков (E, 2, D) для коллекций линий: концы каждого ребра подряд."""
+    return np.take(points, edges, axis=0, out=out)
+
+
+def edge_polyline(points, edges):
+    """Все ребра одной ломаной (3E, D): концы ребра и разделитель NaN после каждого.
+
+    Plotly и matplotlib не соединяют точки через NaN, поэтому весь каркас
+    помещается в одну трассу или линию.
+    """
+    return segment_polyline(points[edges])
+
+
+def segment_polyline(segments):
+    """Отрезки (E, 2, D) одной ломаной (3E, D) с разделителями NaN."""
+    polyline = np.full((len(segments), 3, segments.shape[2]), np.nan)
+    polyline[:, :2] = segments
+    return polyline.reshape(-1, segments.shape[2])
+
+
+def clip_segments(starts, ends, xlim, ylim):
+    """Отсекает отрезки прямоугольником xlim x ylim (Лианг-Барски для всех отрезков сразу).
+
+    Возвращает обрезанные начала, концы и маску отрезков, у которых осталась
+    видимая часть; начала и концы возвращаются только для них.
+    """
+    starts = np.asarray(starts, dtype=float)[:, :2]
+    ends = np.asarray(ends, dtype=float)[:, :2]
+    return clip_segments_box(starts, ends, (xlim[0], ylim[0]), (xlim[1], ylim[1]))
+
+
+def clip_segments_box(starts, ends, lo, hi):
+    """Отсечение отрезков (E, D) параллелепипедом lo..hi любой размерности, как clip_segments."""
+    starts = np.asarray(starts, dtype=float)
+    delta = np.asarray(ends, dtype=float) - starts
+    p = np.concatenate((-delta, delta), axis=1)
+    q = np.concatenate((starts - lo, hi - starts), axis=1)
+    parallel = p == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = q / p
+    t0 = np.max(np.where(p < 0, r, 0.0), axis=1)
+    t1 = np.min(np.where(p > 0, r, 1.0), axis=1)
+    visible = (t0 <= t1) & ~np.any(parallel & (q < 0), axis=1)
+    starts, delta = starts[visible], delta[visible]
+    t0, t1 = t0[visible, None], t1[visible, None]
+    return starts + t0 * delta, starts + t1 * delta, visible
+
+
+def polygon_area(points2d, loop):
+    """Ориентированная площадь многоугольника (> 0 при обходе против часовой стрелки)."""
+    x, y = points2d[loop, 0], points2d[loop, 1]
+    return 0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+
+
+def triangulate_polygon(points2d, loop):
+    """Триангуляция простого многоугольника отсечением ушей, треугольники (T, 3) в порядке обхода loop."""
+    loop = list(loop)
+    orientation = np.sign(polygon_area(points2d, loop))
+    triangles = []
+    while len(loop) > 3:
+        for k in range(len(loop)):
+            a, b, c = loop[k - 1], loop[k], loop[(k + 1) % len(loop)]
+            pa, pb, pc = points2d[a], points2d[b], points2d[c]
+            cross = (pb[0] - pa[0]) * (pc[1] - pa[1]) - (pb[1] - pa[1]) * (pc[0] - pa[0])
+            if cross * orientation <= 0:
+                continue
+            # Ухо: внутри треугольника нет других вершин многоугольника
+            others = points2d[[i for i in loop if i not in (a, b, c)]]
+            d1 = (pb[0] - pa[0]) * (others[:, 1] - pa[1]) - (pb[1] - pa[1]) * (others[:, 0] - pa[0])
+            d2 = (pc[0] - pb[0]) * (others[:, 1] - pb[1]) - (pc[1] - pb[1]) * (others[:, 0] - pb[0])
+            d3 = (pa[0] - pc[0]) * (others[:, 1] - pc[1]) - (pa[1] - pc[1]) * (others[:, 0] - pc[0])
+            if np.any((d1 * orientation >= 0) & (d2 * orientation >= 0) & (d3 * orientation >= 0)):
+                continue
+            triangles.append((a, b, c))
+            del loop[k]
+            break
+        else:
+            raise ValueError("Многоугольник не простой: не удалось найти ухо")
+    triangles.append(tuple(loop))
+    return np.array(triangles, dtype=np.intp)
+
+
+def extrusion_topology(points, loop, offset, front_members, back_members):
+    """Грани призмы, выдавленной из контура loop: передняя крышка, задняя крышка и боковые четырехугольники.
+
+    Вершина i контура имеет пару i + offset в выдавленном слое. front_members
+    и back_members - все вершины, лежащие на передней и задней крышке (вместе
+    с внутренними линиями, например лицом крипера). Возвращает треугольники
+    (T, 3), номер грани каждого треугольника (T,) и список вершин каждой грани.
+    Все грани ориентированы одинаково: обход против часовой стрелки при
+    взгляде снаружи тела.
+    """
+    loop = np.asarray(loop, dtype=np.intp)
+    cap = triangulate_polygon(points[:, :2], loop)
+    triangles = [cap, cap[:, ::-1] + offset]
+    members = [np.asarray(front_members, dtype=np.intp), np.asarray(back_members, dtype=np.intp)]
+    for a, b in zip(loop, np.roll(loop, -1)):
+        triangles.append(np.array([[a, a + offset, b + offset], [a, b + offset, b]]))
+        members.append(np.array([a, b, b + offset, a + offset]))
+    face_ids = np.repeat(np.arange(len(triangles)), [len(t) for t in triangles])
+    triangles = np.vstack(triangles)
+    # Знак объема по формуле Гаусса-Остроградского: если он отрицательный, грани смотрят внутрь
+    p0, p1, p2 = (points[triangles[:, k], :3] for k in range(3))
+    if np.einsum('ij,ij->', p0, np.cross(p1, p2)) < 0:
+        triangles = triangles[:, ::-1]
+    return triangles, face_ids, members
+
+
+def edge_face_incidence(edges, members, num_points):
+    """Матрица (E, F): ребро лежит на грани, если оба его конца принадлежат этой грани."""
+    on_face = np.zeros((num_points, len(members)), dtype=bool)
+    for face, vertices in enumerate(members):
+        on_face[vertices, face] = True
+    return on_face[edges[:, 0]] & on_face[edges[:, 1]]
+
+
+_extrusion_cache = {}
+extrusion_stats = {'hits': 0, 'misses': 0}
+
+
+def _array_key(array):
+    array = np.ascontiguousarray(array)
+    return array.dtype.str, array.shape, hashlib.blake2b(array.tobytes(), digest_size=16).digest()
+
+
+def extrude(points2d, edges, depth, subset=None, segments=1, cache_size=16):
+    """Выдавливает плоский контур вдоль оси z на глубину depth (может быть отрицательной).
+
+    points2d - точки (N, 2) или однородные (N, 3) как в creeper_1, edges - ребра
+    (E, 2). Выдавливаются только вершины subset (по умолчанию все) в segments
+    слоев с шагом depth / segments. Вершины слоя k идут после слоя k - 1 в
+    порядке subset, поэтому при subset = 0..S-1 пара вершины i в первом слое
+    равна i + N. Ребра: исходные, ребра между выдавленными вершинами в каждом
+    слое и соединения соседних слоев. Возвращает однородные точки (N + S*segments, 4)
+    и ребра; результат кэшируется по параметрам и доступен только для чтения.
+    """
+    # Проверка до ключа кэша: неверные параметры не должны попадать в кэш
+    if isinstance(segments, bool) or not isinstance(segments, (int, np.integer)) or segments < 1:
+        raise ValueError(f"Число слоев segments должно быть целым >= 1, получено {segments!r}")
+    points2d = np.asarray(points2d, dtype=float)[:, :2]
+    edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+    num_points = len(points2d)
+    subset = np.arange(num_points) if subset is None else np.asarray(subset, dtype=np.intp)
+    key = (_array_key(points2d), _array_key(edges), float(depth), _array_key(subset), int(segments))
+    cached = _extrusion_cache.get(key)
+    if cached is not None:
+        extrusion_stats['hits'] += 1
+        return cached
+    extrusion_stats['misses'] += 1
+
+    layers = np.arange(1, segments + 1)
+    points = np.ones((num_points + len(subset) * segments, 4))
+    points[:num_points, :2] = points2d
+    points[:num_points, 2] = 0.0
+    points[num_points:, :2] = np.tile(points2d[subset], (segments, 1))
+    points[num_points:, 2] = np.repeat(depth * layers / segments, len(subset))
+
+    # Номер вершины в каждом слое, -1 если вершина не выдавливается
+    layer_index = np.full((segments + 1, num_points), -1, dtype=np.intp)
+    layer_index[0] = np.arange(num_points)
+    layer_index[1:, subset] = num_points + (layers[:, None] - 1) * len(subset) + np.arange(len(subset))
+    inner = edges[np.all(layer_index[1][edges] >= 0, axis=1)]
+    layer_edges = layer_index[1:][:, inner].reshape(-1, 2)
+    connections = np.stack((layer_index[:-1][:, subset], layer_index[1:][:, subset]), axis=2).reshape(-1, 2)
+    edges = np.vstack((edges, layer_edges, connections))
+
+    points.flags.writeable = False
+    edges.flags.writeable = False
+    if len(_extrusion_cache) >= cache_size:
+        _extrusion_cache.pop(next(iter(_extrusion_cache)))
+    _extrusion_cache[key] = points, edges
+    return points, edges
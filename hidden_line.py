@@ -0,0 +1,131 @@
+import numpy as np
+
+
+def front_facing_faces(screen_points, triangles, face_ids, num_faces, orientation=1.0):
+    """Отбраковка нелицевых граней по знаку площади их проекции на экран.
+
+    screen_points - пиксельные координаты (N, 2|3) с осью y вниз. orientation
+    равно знаку определителя матрицы модели: отражение меняет обход граней.
+    """
+    a, b, c = (screen_points[triangles[:, k], :2] for k in range(3))
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    face_area = np.zeros(num_faces)
+    np.add.at(face_area, face_ids, area)
+    # Ось y экрана направлена вниз, поэтому обход против часовой стрелки дает отрицательную площадь
+    return face_area * orientation < 0
+
+
+def signed_volume(points, triangles):
+    """Объем замкнутой модели со знаком по треугольникам граней; знак меняется при отражении."""
+    a, b, c = (np.asarray(points, dtype=float)[triangles[:, k], :3] for k in range(3))
+    return np.einsum('ij,ij->', a, np.cross(b, c)) / 6
+
+
+def screen_orientation(screen_points, model_points, triangles):
+    """orientation для front_facing_faces по любому экранному отображению модели.
+
+    Сравнивает знак объема модели на экране (x, y, глубина) со знаком
+    исходного объема, поэтому учитывает отражения в матрице модели, в
+    масштабе сцены и в проекции осей, без разбора самих матриц.
+    """
+    return np.sign(signed_volume(screen_points, triangles) * signed_volume(model_points, triangles))
+
+
+def _occluded(samples, sample_edges, tri_points, tri_faces, edge_faces, eps):
+    # Точка закрыта, если попадает внутрь лицевого треугольника чужой грани и лежит глубже него
+    a, b, c = tri_points[:, 0], tri_points[:, 1], tri_points[:, 2]
+    v0, v1 = b[:, :2] - a[:, :2], c[:, :2] - a[:, :2]
+    denom = v0[:, 0] * v1[:, 1] - v0[:, 1] * v1[:, 0]
+    valid = np.abs(denom) > 1e-12
+    a, b, c, v0, v1, denom = a[valid], b[valid], c[valid], v0[valid], v1[valid], denom[valid]
+    tri_faces = tri_faces[valid]
+    px = samples[:, None, 0] - a[None, :, 0]
+    py = samples[:, None, 1] - a[None, :, 1]
+    u = (px * v1[None, :, 1] - py * v1[None, :, 0]) / denom
+    v = (v0[None, :, 0] * py - v0[None, :, 1] * px) / denom
+    inside = (u > eps) & (v > eps) & (u + v < 1 - eps)
+    depth = a[None, :, 2] + u * (b[None, :, 2] - a[None, :, 2]) + v * (c[None, :, 2] - a[None, :, 2])
+    in_front = depth < samples[:, None, 2] - eps
+    own_face = edge_faces[sample_edges][:, tri_faces]
+    return np.any(inside & in_front & ~own_face, axis=1)
+
+
+def visible_edge_parts(screen_points, edges, triangles, face_ids, edge_faces,
+                       orientation=1.0, step=2.0, eps=1e-6, batch_size=1 << 22):
+    """Видимые части ребер выдавленной модели: номера ребер (V,) и доли начала и конца (V,) на экране.
+
+    screen_points (N, 3) - пиксели x, y и глубина после деления на w. Сначала
+    отбрасываются ребра, не лежащие ни на одной лицевой грани, затем
+    оставшиеся делятся на отрезки длиной около step пикселей, и середина
+    каждого проверяется тестом глубины против лицевых треугольников.
+    Подряд идущие видимые кусочки склеиваются. Часть ребра i - это отрезок
+    от start + t0 * (end - start) до start + t1 * (end - start) в пикселях.
+    """
+    num_faces = edge_faces.shape[1]
+    facing = front_facing_faces(screen_points, triangles, face_ids, num_faces, orientation)
+    candidates = np.flatnonzero(np.any(edge_faces[:, facing], axis=1))
+    if not len(candidates):
+        return np.empty(0, dtype=np.intp), np.empty(0), np.empty(0)
+    start = screen_points[edges[candidates, 0], :3]
+    end = screen_points[edges[candidates, 1], :3]
+    pieces = np.maximum(1, np.ceil(np.linalg.norm(end[:, :2] - start[:, :2], axis=1) / step)).astype(np.intp)
+
+    piece_edge = np.repeat(np.arange(len(candidates)), pieces)
+    first = np.cumsum(pieces) - pieces
+    k = np.arange(pieces.sum()) - np.repeat(first, pieces)
+    t0 = k / pieces[piece_edge]
+    t1 = (k + 1) / pieces[piece_edge]
+    delta = end - start
+    samples = start[piece_edge] + ((t0 + t1) / 2)[:, None] * delta[piece_edge]
+
+    front_tris = facing[face_ids]
+    tri_points = screen_points[triangles[front_tris], :3]
+    tri_faces = face_ids[front_tris]
+    visible = np.empty(len(samples), dtype=bool)
+    chunk = max(1, batch_size // max(1, len(tri_points)))
+    for lo in range(0, len(samples), chunk):
+        hi = lo + chunk
+        visible[lo:hi] = ~_occluded(samples[lo:hi], candidates[piece_edge[lo:hi]], tri_points,
+                                    tri_faces, edge_faces, eps)
+
+    # Склеиваем подряд идущие видимые кусочки одного ребра в один отрезок
+    new_edge = np.ones(len(visible), dtype=bool)
+    new_edge[1:] = piece_edge[1:] != piece_edge[:-1]
+    run_start = visible & (new_edge | ~np.roll(visible, 1))
+    last = np.ones(len(visible), dtype=bool)
+    last[:-1] = new_edge[1:]
+    run_end = visible & (last | ~np.roll(visible, -1))
+    starts_idx, ends_idx = np.flatnonzero(run_start), np.flatnonzero(run_end)
+    return candidates[piece_edge[starts_idx]], t0[starts_idx], t1[ends_idx]
+
+
+def _edge_parts(points, edges, index, t0, t1):
+    start, end = points[edges[index, 0]], points[edges[index, 1]]
+    return np.stack((start + t0[:, None] * (end - start), start + t1[:, None] * (end - start)), axis=1)
+
+
+def visible_edge_segments(screen_points, edges, triangles, face_ids, edge_faces,
+                          orientation=1.0, step=2.0, eps=1e-6, batch_size=1 << 22):
+    """Видимые части ребер (см. visible_edge_parts) отрезками (V, 2, 3) в пикселях."""
+    index, t0, t1 = visible_edge_parts(screen_points, edges, triangles, face_ids, edge_faces,
+                                       orientation, step, eps, batch_size)
+    return _edge_parts(np.asarray(screen_points)[:, :3], edges, index, t0, t1)
+
+
+def visible_model_segments(points, clip_points, model_points, edges, triangles, face_ids, edge_faces, step=2.0):
+    """Видимые части ребер в координатах points (N, K) для интерактивного вида.
+
+    clip_points (N, 4) - те же вершины после матрицы в пиксели до деления на
+    w, model_points - исходная модель, по которой заданы обходы граней (для
+    знака orientation). Тест идет на экране, а доли вдоль ребер переводятся обратно с
+    поправкой на перспективу, поэтому отрезки (V, 2, K) можно отдать
+    рендереру, который сам проецирует точки (mplot3d, Plotly).
+    """
+    screen_points = clip_points[:, :3] / clip_points[:, 3:]
+    orientation = screen_orientation(screen_points, model_points, triangles)
+    index, t0, t1 = visible_edge_parts(screen_points, edges, triangles, face_ids, edge_faces, orientation, step)
+    # Доля u на экране соответствует доле u * w0 / (u * w0 + (1 - u) * w1) вдоль ребра до проекции
+    w0, w1 = clip_points[edges[index, 0], 3], clip_points[edges[index, 1], 3]
+    t0 = t0 * w0 / (t0 * w0 + (1 - t0) * w1)
+    t1 = t1 * w0 / (t1 * w0 + (1 - t1) * w1)
+    return _edge_parts(np.asarray(points), edges, index, t0, t1)
@@ -0,0 +1,86 @@
+import numpy as np
+
+from bounds import OUTSIDE, Bounds
+from transforms import (CompactPoints, point_coords, rotation_matrices_2d, rotation_matrices_3d, scale_matrices,
+                        transform_points_batch, translation_matrices)
+
+
+class InstancedScene:
+    """Толпа криперов: одна общая геометрия и массивы состояний экземпляров.
+
+    Для 2D-модели (точки (N, 3), как в creeper_1) поворот задается одним углом
+    на экземпляр, для выдавленной 3D-модели (точки (N, 4), как в creeper_2 и
+    creeper_m) - тремя углами (x, y, z). Матрица экземпляра собирается в том же
+    порядке, что и у Creeper: перенос @ поворот @ масштаб @ base_matrix.
+    Общая геометрия может быть CompactPoints загруженной модели.
+    """
+
+    def __init__(self, base_points, count=0, base_matrix=None):
+        if isinstance(base_points, CompactPoints):
+            self.base_points = base_points
+        else:
+            self.base_points = np.asarray(base_points, dtype=float)
+        self.dim = point_coords(self.base_points).shape[1] + 1
+        if self.dim not in (3, 4):
+            raise ValueError(f"Ожидались однородные точки (N, 3) или (N, 4), получена размерность {self.dim}")
+        self.base_matrix = np.eye(self.dim) if base_matrix is None else np.asarray(base_matrix, dtype=float)
+        self.scale = np.ones((count, self.dim - 1))
+        self.rotation = np.zeros(count) if self.dim == 3 else np.zeros((count, 3))
+        self.translation = np.zeros((count, self.dim - 1))
+        self.bounds = Bounds(self.base_points)
+
+    @classmethod
+    def from_creeper(cls, creeper, count=0):
+        base_matrix = None
+        if hasattr(creeper, 'get_reflection_y_matrix'):
+            base_matrix = creeper.get_reflection_y_matrix()
+        return cls(creeper.original_points, count, base_matrix)
+
+    def __len__(self):
+        return len(self.translation)
+
+    def add_instance(self, scale=1.0, rotation=0.0, translation=None):
+        """Добавляет экземпляр и возвращает его индекс."""
+        if translation is None:
+            translation = np.zeros(self.dim - 1)
+        self.scale = np.vstack((self.scale, np.broadcast_to(scale, (1, self.dim - 1))))
+        if self.dim == 3:
+            self.rotation = np.append(self.rotation, rotation)
+        else:
+            self.rotation = np.vstack((self.rotation, np.broadcast_to(rotation, (1, 3))))
+        self.translation = np.vstack((self.translation, np.reshape(translation, (1, self.dim - 1))))
+        return len(self) - 1
+
+    def get_instance_matrices(self):
+        """Составные матрицы всех экземпляров, стек (M, D, D)."""
+        if self.dim == 3:
+            rotation = rotation_matrices_2d(self.rotation)
+        else:
+            rotation = rotation_matrices_3d(self.rotation)
+        return (translation_matrices(self.translation) @ rotation
+                @ scale_matrices(self.scale, self.dim) @ self.base_matrix)
+
+    def apply_transformations(self, out=None):
+        """Преобразованные вершины всех экземпляров одной операцией, массив (M, N, D)."""
+        return transform_points_batch(self.get_instance_matrices(), self.base_points, out=out)
+
+    def get_visibility(self, window_lo, window_hi):
+        """OUTSIDE, PARTIAL или INSIDE для каждого экземпляра по ограничивающим объемам, массив (M,)."""
+        return self.bounds.classify(self.get_instance_matrices(), window_lo, window_hi)
+
+    def apply_visible(self, window_lo, window_hi):
+        """Индексы экземпляров, задевающих окно, и их вершины (K, N, D); невидимые не преобразуются."""
+        matrices = self.get_instance_matrices()
+        visible = np.flatnonzero(self.bounds.classify(matrices, window_lo, window_hi) != OUTSIDE)
+        return visible, transform_points_batch(matrices[visible], self.base_points)
+
+    def apply_lod(self, lod, window_lo, window_hi, pixels_per_unit):
+        """Отрезки и точки видимых экземпляров, каждый на уровне детализации по своему размеру на экране.
+
+        lod - lod.LevelsOfDetail той же модели. Возвращает отрезки (S, 2, D),
+        точки (P, D) и число нарисованных экземпляров на каждом уровне.
+        """
+        matrices = self.get_instance_matrices()
+        visible = self.bounds.classify(matrices, window_lo, window_hi) != OUTSIDE
+        segments, points, levels = lod.build(matrices[visible], pixels_per_unit)
+        return segments, points, lod.counts
@@ -0,0 +1,143 @@
+"""Страница в браузере, на которой фигура Plotly обновляется на месте.
+
+Вне Jupyter FigureWidget показать некуда, а fig.show() на каждый кадр
+открывает новую вкладку. Вместо этого страница открывается один раз:
+сервер на localhost отдает ее и текущую фигуру в JSON, страница опрашивает
+его и при новой версии кадра вызывает Plotly.react, который меняет только
+изменившиеся данные и сохраняет повернутую пользователем камеру (uirevision).
+Повернутую камеру страница отправляет обратно (POST /camera): от нее
+зависит, какие линии невидимы.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAGE = '''<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{title}</title><script>{plotly_js}</script></head>
+<body style="margin: 0">
+<div id="plot" style="width: 100vw; height: 100vh"></div>
+<script>
+let version = -1;
+let listening = false;
+function sendCamera() {{
+    const camera = document.getElementById('plot')._fullLayout.scene.camera;
+    fetch('/camera', {{method: 'POST', body: JSON.stringify(camera)}}).catch(() => {{}});
+}}
+async function poll() {{
+    try {{
+        const response = await fetch('/frame?version=' + version);
+        if (response.status === 200) {{
+            const frame = await response.json();
+            version = frame.version;
+            await Plotly.react('plot', frame.figure.data, frame.figure.layout, {{responsive: true}});
+            if (!listening) {{
+                listening = true;
+                document.getElementById('plot').on('plotly_relayout', event => {{
+                    if (Object.keys(event).some(key => key.startsWith('scene.camera'))) sendCamera();
+                }});
+            }}
+        }}
+    }} catch (error) {{
+        // Сервер закрыт вместе с окном управления: страница остается с последним кадром
+        return;
+    }}
+    setTimeout(poll, {interval_ms});
+}}
+poll();
+</script>
+</body>
+</html>
+'''
+
+
+class LivePage:
+    """Сервер одной страницы с фигурой: update(fig) публикует новый кадр, страница забирает его сама."""
+
+    def __init__(self, title='Creeper', interval_ms=100, port=0):
+        self.title = title
+        self.interval_ms = interval_ms
+        self.port = port
+        self.version = 0
+        self.frame = None
+        # Камера сцены из браузера (словарь eye, center, up, projection) и номер ее изменения
+        self.camera = None
+        self.camera_version = 0
+        self.server = None
+        self._lock = threading.Lock()
+
+    def update(self, fig):
+        figure = fig.to_json()
+        with self._lock:
+            self.version += 1
+            self.frame = f'{{"version": {self.version}, "figure": {figure}}}'.encode()
+
+    def get_frame(self, known_version):
+        # None, если у страницы уже последний кадр
+        with self._lock:
+            return None if known_version == self.version else self.frame
+
+    def set_camera(self, camera):
+        with self._lock:
+            self.camera = camera
+            self.camera_version += 1
+
+    def get_page(self):
+        from plotly.offline import get_plotlyjs
+        return PAGE.format(title=self.title, plotly_js=get_plotlyjs(), interval_ms=self.interval_ms).encode()
+
+    def start(self):
+        """Запускает сервер в фоновом потоке и возвращает адрес страницы."""
+        page = self.get_page()
+        live_page = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/':
+                    self.send_body(page, 'text/html; charset=utf-8')
+                elif url.path == '/frame':
+                    known = parse_qs(url.query).get('version', ['-1'])[0]
+                    frame = live_page.get_frame(int(known) if known.lstrip('-').isdigit() else -1)
+                    if frame is None:
+                        self.send_response(204)
+                        self.end_headers()
+                    else:
+                        self.send_body(frame, 'application/json')
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if urlparse(self.path).path != '/camera':
+                    self.send_error(404)
+                    return
+                try:
+                    live_page.set_camera(json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0)))))
+                except ValueError:
+                    self.send_error(400)
+                    return
+                self.send_response(204)
+                self.end_headers()
+
+            def send_body(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                # Опрос идет много раз в секунду, журнал запросов в терминал не нужен
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{self.server.server_address[1]}/'
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
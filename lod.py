@@ -0,0 +1,145 @@
+"""Уровни детализации: мелкий на экране крипер рисуется упрощенной моделью.
+
+Уровни по убыванию подробности: вся модель, внешний контур, ограничивающий
+параллелепипед и одна точка. Уровень выбирается по размеру модели на экране
+в пикселях: больше thresholds[0] - вся модель, больше thresholds[1] - контур,
+больше thresholds[2] - параллелепипед, иначе точка.
+"""
+import itertools
+
+import numpy as np
+
+from bounds import bounding_box, transform_box
+from transforms import CompactPoints, point_coords, transform_points, transform_points_batch
+
+# Уровни детализации
+FULL = 0
+SILHOUETTE = 1
+BOX = 2
+POINT = 3
+
+LOD_NAMES = ('полная', 'контур', 'параллелепипед', 'точка')
+
+
+def convex_outline(points):
+    """Выпуклая оболочка проекции точек на плоскость xy: индексы вершин по обходу.
+
+    points - однородные точки (N, D) или CompactPoints.
+    """
+    xy = np.asarray(point_coords(points)[:, :2], dtype=float)
+    order = np.lexsort((xy[:, 1], xy[:, 0]))
+
+    def chain(indices):
+        hull = []
+        for index in indices:
+            while len(hull) >= 2:
+                (ax, ay), (bx, by) = xy[hull[-1]] - xy[hull[-2]], xy[index] - xy[hull[-2]]
+                if ax * by - ay * bx > 0:
+                    break
+                hull.pop()
+            hull.append(index)
+        return hull[:-1]
+
+    # Монотонная цепочка Эндрю: нижняя и верхняя части оболочки
+    return chain(order) + chain(order[::-1])
+
+
+def loop_edges(loops):
+    """Ребра (E, 2) замкнутых обходов вершин."""
+    pairs = [(loop[k - 1], loop[k]) for loop in loops if len(loop) > 1 for k in range(len(loop))]
+    return np.array(pairs, dtype=np.intp).reshape(-1, 2)
+
+
+def box_geometry(lo, hi):
+    """Углы параллелепипеда lo..hi однородными точками (2^K, K + 1) и его ребра (K * 2^(K-1), 2)."""
+    corners = np.array(list(itertools.product(*zip(lo, hi))), dtype=float)
+    points = np.column_stack((corners, np.ones(len(corners))))
+    bits = np.array(list(itertools.product((0, 1), repeat=len(lo))))
+    # Ребро соединяет углы, отличающиеся ровно одной координатой
+    pairs = [(i, j) for i in range(len(bits)) for j in range(i + 1, len(bits)) if np.sum(bits[i] != bits[j]) == 1]
+    return points, np.array(pairs, dtype=np.intp)
+
+
+class LevelsOfDetail:
+    """Упрощенные версии модели и выбор уровня по размеру на экране.
+
+    outlines - замкнутые обходы вершин внешнего контура (для выдавленного
+    крипера - передняя и задняя крышки); по умолчанию берется выпуклая
+    оболочка в плоскости xy. Упрощенные модели строятся при первом запросе.
+    CompactPoints остаются компактными, в том числе в контуре.
+    """
+
+    def __init__(self, points, edges, outlines=None, thresholds=(120, 24, 4)):
+        self.points = points if isinstance(points, CompactPoints) else np.asarray(points, dtype=float)
+        self.edges = np.asarray(edges, dtype=np.intp)
+        self.dim = point_coords(self.points).shape[1] + 1
+        self.outlines = outlines
+        self.thresholds = thresholds
+        self.box = bounding_box(self.points)
+        self.counts = np.zeros(len(LOD_NAMES), dtype=int)
+        self._levels = {FULL: (self.points, self.edges)}
+
+    def get_level(self, level):
+        """Точки (n, D) (для полной модели и контура - возможно, CompactPoints) и ребра (e, 2) уровня level."""
+        if level not in self._levels:
+            if level == SILHOUETTE:
+                outlines = self.outlines if self.outlines is not None else [convex_outline(self.points)]
+                # Контур хранит только свои вершины, ребра перенумеровываются
+                used, edges = np.unique(loop_edges(outlines), return_inverse=True)
+                if isinstance(self.points, CompactPoints):
+                    level_points = self.points.take(used)
+                else:
+                    level_points = self.points[used]
+                self._levels[level] = (level_points, edges.reshape(-1, 2))
+            elif level == BOX:
+                self._levels[level] = box_geometry(*self.box)
+            elif level == POINT:
+                center = (self.box[0] + self.box[1]) / 2
+                self._levels[level] = (np.append(center, 1.0)[None], np.empty((0, 2), dtype=np.intp))
+            else:
+                raise ValueError(f"Неизвестный уровень детализации: {level}")
+        return self._levels[level]
+
+    def get_sizes(self, matrices, pixels_per_unit):
+        """Размер модели на экране в пикселях по проекции преобразованного параллелепипеда на xy."""
+        lo, hi = transform_box(np.asarray(matrices), *self.box)
+        return np.max((hi - lo)[..., :2], axis=-1) * pixels_per_unit
+
+    def select(self, matrices, pixels_per_unit):
+        """Уровень для матрицы (D, D) или для каждого экземпляра стека (M, D, D)."""
+        sizes = self.get_sizes(matrices, pixels_per_unit)
+        levels = np.sum(np.asarray(sizes)[..., None] < np.asarray(self.thresholds), axis=-1)
+        self.counts = np.bincount(np.ravel(levels), minlength=len(LOD_NAMES))
+        return levels[()]
+
+    def transform_level(self, level, matrix):
+        """Точки уровня level, преобразованные матрицей (D, D), и его ребра."""
+        points, edges = self.get_level(level)
+        return transform_points(matrix, points), edges
+
+    def build(self, matrices, pixels_per_unit):
+        """Отрезки (S, 2, D) и точки (P, D) всех экземпляров, каждый на своем уровне, и уровни (M,).
+
+        Экземпляры группируются по уровню, и каждая группа преобразуется одной
+        пакетной операцией над вершинами своего уровня.
+        """
+        matrices = np.asarray(matrices)
+        levels = np.atleast_1d(self.select(matrices, pixels_per_unit))
+        segments = [np.empty((0, 2, self.dim))]
+        points = [np.empty((0, self.dim))]
+        for level in range(len(LOD_NAMES)):
+            chosen = np.flatnonzero(levels == level)
+            if not len(chosen):
+                continue
+            level_points, level_edges = self.get_level(level)
+            world = transform_points_batch(matrices[chosen], level_points)
+            if len(level_edges):
+                segments.append(world[:, level_edges].reshape(-1, 2, self.dim))
+            else:
+                points.append(world.reshape(-1, self.dim))
+        return np.concatenate(segments), np.concatenate(points), levels
+
+    def format_counts(self, counts=None):
+        """Строка с числом экземпляров на каждом уровне для подписи."""
+        counts = self.counts if counts is None else counts
+        return ', '.join(f'{name} {count}' for name, count in zip(LOD_NAMES, counts) if count)
@@ -1,7 +1,6 @@
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.path import Path
-import matplotlib.patches as patches
+
+from geometry import edges_from_adjacency, validate_adjacency
 
 class Creeper:
     def __init__(self):
@@ -54,8 +53,12 @@ class Creeper:
             34: [33, 35], # 35: 34,36
             35: [18, 34]  # 36: 19,35
         }
+
+        # Уникальные неориентированные ребра (E, 2): каждый отрезок рисуется один раз
+        self.edges = edges_from_adjacency(self.adjacency)
         
     def draw(self):
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(figsize=(10, 12))
         ax.set_aspect('equal')
         
@@ -74,11 +77,10 @@ class Creeper:
         ax.grid(True, alpha=0.3, color='pink')
         
         # Рисуем все связи розовым цветом
-        for point_idx, connected_points in self.adjacency.items():
+        for point_idx, connected_idx in self.edges:
             x1, y1, _ = self.points[point_idx]
-            for connected_idx in connected_points:
-                x2, y2, _ = self.points[connected_idx]
-                ax.plot([x1, x2], [y1, y2], color='deeppink', linewidth=2.5)  # Глубокий розовый
+            x2, y2, _ = self.points[connected_idx]
+            ax.plot([x1, x2], [y1, y2], color='deeppink', linewidth=2.5)  # Глубокий розовый
         
         # Рисуем все точки розовым цветом
         x_coords = self.points[:, 0]
@@ -111,7 +113,15 @@ class Creeper:
         for point_idx, connected_points in self.adjacency.items():
             print(f"{point_idx+1}: {[idx+1 for idx in connected_points]}")
 
-# Создаем и рисуем крипера
-creeper = Creeper()
-creeper.print_info()
-creeper.draw()
\ No newline at end of file
+        report = validate_adjacency(self.adjacency, len(self.points))
+        print(f"\nУникальных ребер: {len(self.edges)}")
+        for i, j in report['asymmetric']:
+            print(f"Несимметричная связь: {i+1} -> {j+1}, но {j+1} -> {i+1} нет")
+        for i, j in report['duplicates']:
+            print(f"Повторная связь: {i+1} -> {j+1}")
+
+if __name__ == "__main__":
+    # Создаем и рисуем крипера
+    creeper = Creeper()
+    creeper.print_info()
+    creeper.draw()
\ No newline at end of file
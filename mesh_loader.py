@@ -0,0 +1,267 @@
+"""Загрузка каркасных моделей из OBJ и PLY с двоичным кэшем.
+
+Из файла берутся вершины и ребра: линии OBJ (l), стороны граней (f) и
+ребра PLY (element edge). При первой загрузке рядом с файлом пишется кэш
+<файл>.points.npy, <файл>.edges.npy и <файл>.cache.json, а следующие
+запуски отображают его в память (np.load с mmap_mode) без разбора текста.
+
+Пример:
+    from mesh_loader import load_into
+    load_into(creeper, 'models/bunny.obj', fit=True)
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+from bounds import Bounds
+from geometry import EdgeAdjacency, unique_edges
+from lod import LevelsOfDetail
+from transforms import CompactPoints, point_coords
+
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+
+def polygon_edges(polygons):
+    """Ребра (E, 2) сторон многоугольников: массив (F, K) или список списков индексов."""
+    if isinstance(polygons, np.ndarray):
+        if not polygons.size:
+            return np.empty((0, 2), dtype=np.intp)
+        return np.stack((polygons, np.roll(polygons, -1, axis=1)), axis=2).reshape(-1, 2)
+    pairs = [(polygon[k - 1], polygon[k]) for polygon in polygons for k in range(len(polygon))]
+    return np.array(pairs, dtype=np.intp).reshape(-1, 2)
+
+
+def polyline_edges(polylines):
+    """Ребра (E, 2) между соседними вершинами ломаных."""
+    pairs = [(line[k], line[k + 1]) for line in polylines for k in range(len(line) - 1)]
+    return np.array(pairs, dtype=np.intp).reshape(-1, 2)
+
+
+def _check_edges(edges, num_points):
+    # До unique_edges: иначе неверные индексы сначала переупорядочатся и сольются
+    bad = (edges < 0) | (edges >= num_points)
+    if bad.any():
+        raise ValueError(f"Ребра ссылаются на вершины вне [0, {num_points}): {np.unique(edges[bad])[:5].tolist()}")
+    return edges
+
+
+def _parse_indices(lines, defined):
+    # "1/2/3 4//6 -1" -> индексы вершин с нуля; отрицательные считаются
+    # от последней вершины, объявленной до этой строки (defined[k] штук)
+    if not lines:
+        return []
+    counts = np.array([len(line.split()) for line in lines])
+    indices = np.array(re.sub(r'/\S*', '', ' '.join(lines)).split(), dtype=np.intp)
+    indices = np.where(indices < 0, indices + np.repeat(defined, counts), indices - 1)
+    if np.all(counts == counts[0]):
+        return indices.reshape(len(lines), counts[0])
+    return np.split(indices, np.cumsum(counts)[:-1])
+
+
+def parse_obj(path):
+    """Вершины (N, 3) и ребра (E, 2) из OBJ: команды v, l и f, остальное пропускается."""
+    commands = {'v ': [], 'f ': [], 'l ': []}
+    # Число вершин, объявленных до каждой строки f и l, - для отрицательных индексов
+    defined = {'f ': [], 'l ': []}
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            key = line[:2]
+            target = commands.get(key)
+            if target is not None:
+                target.append(line[2:].split('#', 1)[0] if '#' in line else line[2:])
+                if key != 'v ':
+                    defined[key].append(len(commands['v ']))
+    vertices = commands['v ']
+    points = np.array(' '.join(vertices).split(), dtype=float)
+    if points.size != 3 * len(vertices):
+        # Есть вершины с весом w или цветом: берем первые три числа каждой
+        points = np.array([line.split()[:3] for line in vertices], dtype=float)
+    points = points.reshape(-1, 3)
+    faces = _parse_indices(commands['f '], defined['f '])
+    polylines = _parse_indices(commands['l '], defined['l '])
+    edges = np.concatenate((polygon_edges(faces), polyline_edges(polylines)))
+    return points, unique_edges(_check_edges(edges, len(points)))
+
+
+def _read_ply_header(file):
+    if file.readline().strip() != b'ply':
+        raise ValueError("Файл не является PLY")
+    fmt = None
+    elements = []
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError("Заголовок PLY не завершен end_header")
+        words = line.decode('ascii', errors='replace').split()
+        if not words or words[0] in ('comment', 'obj_info'):
+            continue
+        if words[0] == 'end_header':
+            return fmt, elements
+        if words[0] == 'format':
+            fmt = words[1]
+        elif words[0] == 'element':
+            elements.append({'name': words[1], 'count': int(words[2]), 'properties': []})
+        elif words[0] == 'property':
+            if words[1] == 'list':
+                elements[-1]['properties'].append((words[4], 'list', PLY_TYPES[words[2]], PLY_TYPES[words[3]]))
+            else:
+                elements[-1]['properties'].append((words[2], PLY_TYPES[words[1]], None, None))
+
+
+def _read_ply_binary(file, element, byte_order):
+    properties = element['properties']
+    count = element['count']
+    if not any(kind == 'list' for _, kind, _, _ in properties):
+        dtype = np.dtype([(name, byte_order + kind) for name, kind, _, _ in properties])
+        return np.frombuffer(file.read(dtype.itemsize * count), dtype=dtype, count=count), None
+    if len(properties) != 1:
+        raise ValueError(f"Элемент {element['name']}: поддерживается только одно свойство-список")
+    _, _, count_type, item_type = properties[0]
+    count_type, item_type = np.dtype(byte_order + count_type), np.dtype(byte_order + item_type)
+    start = file.tell()
+    first = np.frombuffer(file.read(count_type.itemsize), dtype=count_type)[0] if count else 0
+    file.seek(start)
+    # Быстрый путь: все многоугольники с одинаковым числом вершин (обычно треугольники)
+    dtype = np.dtype([('count', count_type), ('items', item_type, (int(first),))])
+    data = file.read(dtype.itemsize * count)
+    if len(data) == dtype.itemsize * count:
+        rows = np.frombuffer(data, dtype=dtype, count=count)
+        if np.all(rows['count'] == first):
+            return None, rows['items'].astype(np.intp)
+    file.seek(start)
+    lists = []
+    for _ in range(count):
+        size = int(np.frombuffer(file.read(count_type.itemsize), dtype=count_type)[0])
+        lists.append(np.frombuffer(file.read(item_type.itemsize * size), dtype=item_type).astype(np.intp))
+    return None, lists
+
+
+def _read_ply_ascii(file, element):
+    rows = [file.readline().split() for _ in range(element['count'])]
+    properties = element['properties']
+    if any(kind == 'list' for _, kind, _, _ in properties):
+        return None, [np.array(row[1:1 + int(row[0])], dtype=np.intp) for row in rows]
+    names = [name for name, _, _, _ in properties]
+    values = np.array(rows, dtype=float).reshape(-1, len(names))
+    return {name: values[:, k] for k, name in enumerate(names)}, None
+
+
+def parse_ply(path):
+    """Вершины (N, 3) и ребра (E, 2) из PLY (ascii и binary): element vertex, face и edge."""
+    with open(path, 'rb') as file:
+        fmt, elements = _read_ply_header(file)
+        byte_order = {'binary_little_endian': '<', 'binary_big_endian': '>'}.get(fmt)
+        points = np.empty((0, 3))
+        edges = [np.empty((0, 2), dtype=np.intp)]
+        for element in elements:
+            if byte_order is None:
+                fields, lists = _read_ply_ascii(file, element)
+            else:
+                fields, lists = _read_ply_binary(file, element, byte_order)
+            if element['name'] == 'vertex':
+                points = np.column_stack([np.asarray(fields[axis], dtype=float) for axis in 'xyz'])
+            elif element['name'] == 'face':
+                edges.append(polygon_edges(lists))
+            elif element['name'] == 'edge':
+                edges.append(np.column_stack((fields['vertex1'], fields['vertex2'])).astype(np.intp))
+    return points, unique_edges(_check_edges(np.concatenate(edges), len(points)))
+
+
+def _cache_paths(path):
+    return path + '.points.npy', path + '.edges.npy', path + '.cache.json'
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def load_mesh(path, cache=True):
+    """Загружает модель: CompactPoints (float32, по массиву на координату) и ребра (E, 2).
+
+    При cache=True кэш создается при первой загрузке и используется, пока
+    размер и время изменения исходного файла совпадают с записанными в нем.
+    Массивы из кэша отображены в память и доступны только для чтения.
+    Неполный или поврежденный кэш пересобирается, а если его нельзя записать
+    (каталог только для чтения), модель загружается без кэша.
+    """
+    path = os.fspath(path)
+    points_path, edges_path, meta_path = _cache_paths(path)
+    if cache and all(os.path.exists(name) for name in (points_path, edges_path, meta_path)):
+        try:
+            with open(meta_path) as file:
+                if json.load(file) == _source_signature(path):
+                    return (CompactPoints(np.load(points_path, mmap_mode='r')),
+                            np.load(edges_path, mmap_mode='r'))
+        except (OSError, ValueError):
+            # Поврежденный кэш: разбираем исходный файл заново и перезаписываем его
+            pass
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.obj':
+        points, edges = parse_obj(path)
+    elif extension == '.ply':
+        points, edges = parse_ply(path)
+    else:
+        raise ValueError(f"Неизвестный формат модели: {extension}")
+    compact = CompactPoints(points.T.astype(np.float32))
+    if cache:
+        try:
+            # Описание пишется последним: без него недописанные массивы не считаются кэшем
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            np.save(points_path, compact.coords)
+            np.save(edges_path, edges)
+            with open(meta_path, 'w') as file:
+                json.dump(_source_signature(path), file)
+        except OSError:
+            pass
+    return compact, edges
+
+
+def load_into(creeper, path, fit=False, cache=True):
+    """Заменяет геометрию крипера моделью из файла (см. set_geometry)."""
+    compact, edges = load_mesh(path, cache)
+    return set_geometry(creeper, compact, edges, fit)
+
+
+def set_geometry(creeper, compact, edges, fit=False):
+    """Заменяет геометрию крипера: точки CompactPoints, ребра (E, 2) и смежность.
+
+    Точки остаются компактными (float32, без столбца единиц): без fit это
+    отображенный в память кэш без копирования. Размерность берется у
+    крипера: для 2D-варианта координата z отбрасывается. fit=True переносит
+    модель в начало координат и масштабирует так, чтобы она помещалась в
+    окне fixed_xlim; тогда координаты копируются.
+    """
+    dim = point_coords(creeper.original_points).shape[1] + 1
+    coords = compact.coords[:dim - 1]
+    if fit and coords.shape[1]:
+        coords = np.array(coords, dtype=np.float32)
+        coords -= ((coords.min(axis=1) + coords.max(axis=1)) / 2)[:, None]
+        radius = np.abs(coords).max()
+        if radius:
+            coords *= np.float32(0.8 * max(np.abs(creeper.fixed_xlim)) / radius)
+    points = CompactPoints(coords)
+    creeper.original_points = points
+    creeper.edges = np.asarray(edges, dtype=np.intp)
+    creeper.adjacency = EdgeAdjacency(creeper.edges, len(points))
+    creeper.bounds = Bounds(points)
+    if hasattr(creeper, 'lod'):
+        # Контур загруженной модели - выпуклая оболочка, она строится при первом мелком кадре
+        creeper.lod = LevelsOfDetail(points, creeper.edges, thresholds=creeper.lod.thresholds)
+    creeper.transform_cache.invalidate()
+    if hasattr(creeper, 'selection'):
+        creeper.selection = None
+    # Грани выдавленного крипера к загруженной модели не относятся
+    for name in ('triangles', 'face_ids', 'edge_faces'):
+        if hasattr(creeper, name):
+            setattr(creeper, name, None)
+    return creeper
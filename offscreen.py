@@ -0,0 +1,214 @@
+"""Рендеринг последовательности состояний крипера без окна.
+
+Запуск из корня репозитория (кадры поворота на 360°):
+    python offscreen.py creeper_1 --frames 120 --output frames
+    python offscreen.py creeper_2 --frames 120 --output spin.rgb --format rgb
+    python offscreen.py creeper_2 --mesh models/bunny.obj --frames 60
+    python offscreen.py creeper_2 --frames 2000 --workers 8 --chunk-size 25 --baseline
+"""
+import argparse
+import importlib
+import math
+import os
+import time
+
+import numpy as np
+
+from mesh_loader import load_into
+
+
+def apply_state(creeper, state):
+    """Записывает в крипера значения из словаря {имя атрибута: значение}."""
+    for name, value in state.items():
+        if np.ndim(value):
+            value = np.array(value, dtype=float)
+        setattr(creeper, name, value)
+
+
+def render_frames(creeper, states, output=None, fmt='png', first_index=0):
+    """Рендерит состояния states через неинтерактивный холст крипера.
+
+    Состояние - словарь атрибутов или функция state(creeper), которая сама
+    обновляет кадр (например, кадры timeline.BakedAnimation.frames()).
+    fmt='png' - output это каталог, кадры пишутся как frame_00000.png, ...;
+    fmt='rgb' - output это файл, кадры rgb24 пишутся в него подряд (как
+    rawvideo для ffmpeg), а без output возвращаются в списке 'images'.
+    Номера PNG начинаются с first_index. Возвращает словарь со счетчиком
+    кадров, временем и кадрами в секунду.
+    """
+    if fmt not in ('png', 'rgb'):
+        raise ValueError(f"Неизвестный формат кадров: {fmt}")
+    if fmt == 'png':
+        if output is None:
+            raise ValueError("Для PNG нужен каталог output")
+        os.makedirs(output, exist_ok=True)
+    if creeper.fig is None:
+        creeper.create_offscreen_figure()
+
+    import matplotlib.image
+
+    images = []
+    stream = open(output, 'wb') if fmt == 'rgb' and output is not None else None
+    start = time.perf_counter()
+    count = 0
+    try:
+        for count, state in enumerate(states, 1):
+            if callable(state):
+                state(creeper)
+            else:
+                apply_state(creeper, state)
+                creeper.update_plot()
+            image = creeper.grab_frame()
+            if fmt == 'png':
+                matplotlib.image.imsave(os.path.join(output, f'frame_{first_index + count - 1:05d}.png'), image)
+            elif stream is not None:
+                stream.write(np.ascontiguousarray(image).tobytes())
+            else:
+                images.append(image)
+    finally:
+        if stream is not None:
+            stream.close()
+    seconds = time.perf_counter() - start
+    result = {'frames': count, 'seconds': seconds, 'fps': count / seconds if seconds else 0.0}
+    if count:
+        result['size'] = image.shape[1], image.shape[0]
+    if fmt == 'rgb' and stream is None:
+        result['images'] = images
+    return result
+
+
+# Крипер и фигура процесса-обработчика, создаются один раз в _init_worker
+_worker = {}
+
+
+def _init_worker(module, mesh):
+    creeper = importlib.import_module(module).Creeper()
+    if mesh:
+        load_into(creeper, mesh, fit=True)
+    creeper.create_offscreen_figure()
+    _worker['creeper'] = creeper
+
+
+def _render_chunk(task):
+    first_index, states, output, fmt = task
+    if fmt == 'png':
+        result = render_frames(_worker['creeper'], states, output, 'png', first_index)
+        return result['frames'], result.get('size'), b''
+    result = render_frames(_worker['creeper'], states, None, 'rgb')
+    data = b''.join(np.ascontiguousarray(image).tobytes() for image in result['images'])
+    return result['frames'], result.get('size'), data
+
+
+def render_frames_parallel(module, states, output, fmt='png', workers=None, chunk_size=None, mesh=None):
+    """Рендерит состояния в пуле процессов; у каждого процесса свой Creeper и своя фигура.
+
+    Кадры делятся на куски по chunk_size подряд идущих состояний. PNG каждый
+    процесс пишет сам под номером кадра, а rgb-кадры собираются в output в
+    исходном порядке. Состояния должны быть словарями: функции из
+    timeline.BakedAnimation.frames() между процессами не передаются.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    if fmt == 'rgb' and output is None:
+        raise ValueError("Для параллельного rgb нужен файл output")
+    if fmt == 'png':
+        os.makedirs(output, exist_ok=True)
+    states = list(states)
+    workers = workers or os.cpu_count()
+    chunk_size = chunk_size or max(1, math.ceil(len(states) / (workers * 4)))
+    tasks = [(start, states[start:start + chunk_size], output, fmt) for start in range(0, len(states), chunk_size)]
+    count, size = 0, None
+    start = time.perf_counter()
+    stream = open(output, 'wb') if fmt == 'rgb' else None
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(module, mesh)) as pool:
+            # map отдает результаты в порядке кусков, поэтому поток rgb идет по порядку кадров
+            for frames, frame_size, data in pool.map(_render_chunk, tasks):
+                count += frames
+                size = frame_size or size
+                if stream is not None:
+                    stream.write(data)
+    finally:
+        if stream is not None:
+            stream.close()
+    seconds = time.perf_counter() - start
+    return {'frames': count, 'seconds': seconds, 'fps': count / seconds if seconds else 0.0,
+            'size': size, 'workers': workers, 'chunk_size': chunk_size}
+
+
+def compare_frames(fmt, output, reference, frames):
+    """Номер первого из frames кадров, которым output отличается от reference, или None.
+
+    rgb сравнивается побайтно, PNG - по раскодированным пикселям.
+    """
+    if fmt == 'rgb':
+        with open(output, 'rb') as file, open(reference, 'rb') as expected:
+            data, reference_data = file.read(), expected.read()
+        frame_bytes = len(reference_data) // frames if frames else 0
+        for index in range(frames):
+            part = slice(index * frame_bytes, (index + 1) * frame_bytes)
+            if data[part] != reference_data[part]:
+                return index
+        return None
+    import matplotlib.image
+    for index in range(frames):
+        name = f'frame_{index:05d}.png'
+        if not np.array_equal(matplotlib.image.imread(os.path.join(output, name)),
+                              matplotlib.image.imread(os.path.join(reference, name))):
+            return index
+    return None
+
+
+def spin_states(creeper, frames):
+    """Состояния полного оборота вокруг оси Z для любого варианта крипера."""
+    for name in ('rotation_angle', 'rotation_z', 'rotation_angle_z'):
+        if hasattr(creeper, name):
+            return [{name: 360.0 * i / frames} for i in range(frames)]
+    raise AttributeError("У крипера нет угла поворота вокруг Z")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('module', help='модуль с классом Creeper: creeper_1, creeper_2, creeper_m')
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--output', default='frames')
+    parser.add_argument('--format', choices=('png', 'rgb'), default='png')
+    parser.add_argument('--mesh', help='модель OBJ или PLY вместо встроенного крипера')
+    parser.add_argument('--workers', type=int, default=1, help='число процессов; 0 - по числу ядер')
+    parser.add_argument('--chunk-size', type=int, help='кадров в одном задании процесса')
+    parser.add_argument('--baseline', action='store_true',
+                        help='дополнительно замерить один процесс и посчитать эффективность масштабирования')
+    parser.add_argument('--baseline-frames', type=int, default=60, help='кадров для замера одного процесса')
+    args = parser.parse_args()
+
+    creeper = importlib.import_module(args.module).Creeper()
+    if args.mesh:
+        load_into(creeper, args.mesh, fit=True)
+    states = spin_states(creeper, args.frames)
+    if args.workers == 1:
+        creeper.create_offscreen_figure()
+        result = render_frames(creeper, states, args.output, args.format)
+    else:
+        result = render_frames_parallel(args.module, states, args.output, args.format,
+                                        args.workers or None, args.chunk_size, args.mesh)
+    print(f"{result['frames']} кадров {result.get('size')} за {result['seconds']:.2f} с: {result['fps']:.1f} кадр/с")
+
+    if args.baseline and args.workers != 1:
+        import tempfile
+        creeper.create_offscreen_figure()
+        with tempfile.TemporaryDirectory() as directory:
+            reference = directory if args.format == 'png' else os.path.join(directory, 'baseline.rgb')
+            baseline = render_frames(creeper, states[:args.baseline_frames], reference, args.format)
+            # Ускорение имеет смысл, только если процессы нарисовали те же кадры, что и один процесс
+            mismatch = compare_frames(args.format, args.output, reference, baseline['frames'])
+        if mismatch is not None:
+            raise SystemExit(f"кадр {mismatch} пула процессов отличается от одного процесса, "
+                             f"ускорение не считается")
+        print(f"первые {baseline['frames']} кадров совпадают с одним процессом")
+        speedup = result['fps'] / baseline['fps']
+        print(f"один процесс: {baseline['fps']:.1f} кадр/с; {result['workers']} процессов, "
+              f"куски по {result['chunk_size']}: ускорение {speedup:.2f}x, "
+              f"эффективность {speedup / result['workers']:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Выбор вершины или ребра мышью по равномерной сетке над экранными точками.
+
+Точки раскладываются по ячейкам сетки, номера ячеек сортируются, и каждая
+ячейка хранит отрезок в общем массиве индексов (как CSR). Запрос смотрит только
+ячейки в квадрате радиуса вокруг курсора, поэтому не зависит от числа вершин.
+Ребро попадает во все ячейки своего параллелепипеда; ребра, задевающие больше
+max_edge_cells ячеек, хранятся отдельным списком и проверяются всегда.
+"""
+import numpy as np
+
+
+def _grid(cells, ids, width):
+    # Отсортированные номера непустых ячеек, начала их отрезков и индексы по ячейкам
+    keys = cells[:, 0] * width + cells[:, 1]
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    first = np.flatnonzero(np.diff(keys, prepend=keys[:1] - 1))
+    return keys[first], np.append(first, len(keys)), ids[order]
+
+
+def segment_distances(points, starts, ends):
+    """Расстояния от точки (2,) до отрезков starts -> ends (K, 2)."""
+    direction = ends - starts
+    length2 = np.einsum('ij,ij->i', direction, direction)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(np.einsum('ij,ij->i', points - starts, direction) / length2, 0.0, 1.0)
+    t = np.where(length2 > 0, t, 0.0)
+    return np.linalg.norm(starts + t[:, None] * direction - points, axis=1)
+
+
+class PickIndex:
+    """Сетка над экранными точками (N, 2) и ребрами (E, 2) для выбора ближайшего под курсором.
+
+    Размер ячейки по умолчанию подбирается так, чтобы в ячейке было около
+    четырех точек. Сетка ребер строится при первом запросе ребра.
+    """
+
+    def __init__(self, points, edges=None, cell_size=None, max_edge_cells=64):
+        self.points = np.ascontiguousarray(points, dtype=float)
+        self.edges = np.empty((0, 2), dtype=np.intp) if edges is None else np.asarray(edges, dtype=np.intp)
+        self.max_edge_cells = max_edge_cells
+        if len(self.points):
+            self.origin = self.points.min(axis=0)
+            extent = self.points.max(axis=0) - self.origin
+        else:
+            self.origin, extent = np.zeros(2), np.zeros(2)
+        if cell_size is None:
+            area = extent[0] * extent[1]
+            cell_size = np.sqrt(4 * area / len(self.points)) if area > 0 else extent.max() / max(len(self.points), 1)
+        self.cell_size = float(cell_size) if cell_size > 0 else 1.0
+        self.shape = (extent // self.cell_size).astype(np.int64) + 1
+        self.vertex_grid = _grid(self._cells(self.points), np.arange(len(self.points)), self.shape[1])
+        self.edge_grid = None
+        self.long_edges = None
+
+    def _cells(self, points):
+        return np.clip(((points - self.origin) // self.cell_size).astype(np.int64), 0, self.shape - 1)
+
+    def _build_edges(self):
+        starts, ends = self.points[self.edges[:, 0]], self.points[self.edges[:, 1]]
+        lo, hi = self._cells(np.minimum(starts, ends)), self._cells(np.maximum(starts, ends))
+        size = hi - lo + 1
+        counts = size[:, 0] * size[:, 1]
+        short = counts <= self.max_edge_cells
+        self.long_edges = np.flatnonzero(~short)
+        ids = np.flatnonzero(short)
+        counts, lo, height = counts[short], lo[short], size[short, 1]
+        # Номер ячейки внутри параллелепипеда каждого ребра -> координаты ячейки
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        height = np.repeat(height, counts)
+        cells = np.repeat(lo, counts, axis=0) + np.column_stack((local // height, local % height))
+        self.edge_grid = _grid(cells, np.repeat(ids, counts), self.shape[1])
+
+    def _candidates(self, grid, x, y, radius):
+        keys, starts, ids = grid
+        lo = self._cells(np.array([x - radius, y - radius]))
+        hi = self._cells(np.array([x + radius, y + radius]))
+        cx, cy = np.meshgrid(np.arange(lo[0], hi[0] + 1), np.arange(lo[1], hi[1] + 1), indexing='ij')
+        query = (cx * self.shape[1] + cy).ravel()
+        position = np.searchsorted(keys, query)
+        inside = position < len(keys)
+        found = position[inside][keys[position[inside]] == query[inside]]
+        if not len(found):
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([ids[starts[k]:starts[k + 1]] for k in found])
+
+    def nearest_vertex(self, x, y, radius):
+        """Индекс ближайшей к (x, y) вершины не дальше radius или None."""
+        if not len(self.points):
+            return None
+        candidates = self._candidates(self.vertex_grid, x, y, radius)
+        if not len(candidates):
+            return None
+        distances = np.hypot(*(self.points[candidates] - (x, y)).T)
+        best = np.argmin(distances)
+        return int(candidates[best]) if distances[best] <= radius else None
+
+    def nearest_edge(self, x, y, radius):
+        """Индекс ближайшего к (x, y) ребра не дальше radius или None."""
+        if not len(self.edges):
+            return None
+        if self.edge_grid is None:
+            self._build_edges()
+        candidates = np.unique(np.concatenate((self._candidates(self.edge_grid, x, y, radius), self.long_edges)))
+        if not len(candidates):
+            return None
+        edges = self.edges[candidates]
+        distances = segment_distances(np.array([x, y]), self.points[edges[:, 0]], self.points[edges[:, 1]])
+        best = np.argmin(distances)
+        return int(candidates[best]) if distances[best] <= radius else None
+
+    def pick(self, x, y, radius):
+        """('vertex', индекс), ('edge', индекс) или None; вершина важнее ребра."""
+        vertex = self.nearest_vertex(x, y, radius)
+        if vertex is not None:
+            return 'vertex', vertex
+        edge = self.nearest_edge(x, y, radius)
+        return None if edge is None else ('edge', edge)
@@ -0,0 +1,93 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profiler._frame.append((self.name, self.start, time.perf_counter() - self.start))
+
+
+class FrameProfiler:
+    """Замер длительности этапов кадра (матрица, вершины, артисты, отрисовка).
+
+    Кадры хранятся в кольцевом буфере на capacity последних кадров, каждый -
+    время начала и список (этап, начало, длительность). Выключенный
+    профилировщик возвращает пустой контекст и почти ничего не стоит.
+    """
+
+    def __init__(self, capacity=240, enabled=False):
+        self.enabled = enabled
+        self.frames = deque(maxlen=capacity)
+        self._frame = None
+        self._origin = time.perf_counter()
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame = []
+            self._frame_start = time.perf_counter()
+
+    def stage(self, name):
+        if not self.enabled or self._frame is None:
+            return nullcontext()
+        return _Stage(self, name)
+
+    def end_frame(self):
+        if self._frame is None:
+            return
+        self.frames.append((self._frame_start, time.perf_counter() - self._frame_start, self._frame))
+        self._frame = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self._frame = None
+        if self.enabled:
+            # Кадры прошлого включения не должны смешиваться с новыми в FPS и отчете
+            self.frames.clear()
+        return self.enabled
+
+    def get_fps(self):
+        """Частота кадров по началам кадров в буфере."""
+        if len(self.frames) < 2:
+            return 0.0
+        elapsed = self.frames[-1][0] - self.frames[0][0]
+        return (len(self.frames) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def get_stage_means(self):
+        """Средняя длительность каждого этапа в секундах, в порядке первого появления."""
+        totals, counts = {}, {}
+        for _, _, stages in self.frames:
+            for name, _, duration in stages:
+                totals[name] = totals.get(name, 0.0) + duration
+                counts[name] = counts.get(name, 0) + 1
+        return {name: totals[name] / counts[name] for name in totals}
+
+    def format_line(self):
+        """Строка для info_text: FPS и средние времена этапов в миллисекундах."""
+        if not self.enabled:
+            return ''
+        stages = ', '.join(f'{name} {seconds * 1e3:.2f}' for name, seconds in self.get_stage_means().items())
+        return f'FPS: {self.get_fps():.1f} | {stages} мс' if stages else f'FPS: {self.get_fps():.1f}'
+
+    def export_chrome_trace(self, path):
+        """Пишет кадры из буфера в формате Trace Event (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = []
+        for number, (frame_start, frame_duration, stages) in enumerate(self.frames):
+            events.append({'name': 'кадр', 'ph': 'X', 'pid': pid, 'tid': 0, 'args': {'frame': number},
+                           'ts': (frame_start - self._origin) * 1e6, 'dur': frame_duration * 1e6})
+            for name, start, duration in stages:
+                events.append({'name': name, 'ph': 'X', 'pid': pid, 'tid': 0,
+                               'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6})
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file, ensure_ascii=False)
+        return len(self.frames)
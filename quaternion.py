@@ -0,0 +1,147 @@
+import numpy as np
+
+AXES = {'x': (1.0, 0.0, 0.0), 'y': (0.0, 1.0, 0.0), 'z': (0.0, 0.0, 1.0)}
+
+
+def quaternion_from_axis_angle(axis, angle_deg):
+    """Единичный кватернион (w, x, y, z) поворота на angle_deg вокруг оси 'x'|'y'|'z' или вектора."""
+    if isinstance(axis, str):
+        x, y, z = AXES[axis]
+    else:
+        x, y, z = np.asarray(axis, dtype=float) / np.linalg.norm(axis)
+    half = np.radians(angle_deg) / 2
+    sin = np.sin(half)
+    return np.array([np.cos(half), sin * x, sin * y, sin * z])
+
+
+def quaternion_multiply(a, b):
+    """Произведение Гамильтона a * b: сначала поворот b, затем a."""
+    # Скалярная арифметика на float быстрее, чем на элементах массива numpy
+    aw, ax, ay, az = np.asarray(a, dtype=float).tolist()
+    bw, bx, by, bz = np.asarray(b, dtype=float).tolist()
+    return np.array([
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw
+    ])
+
+
+def quaternion_from_euler(x_deg, y_deg, z_deg):
+    """Кватернион того же поворота, что и Rz @ Ry @ Rx."""
+    return quaternion_multiply(quaternion_from_axis_angle('z', z_deg),
+                               quaternion_multiply(quaternion_from_axis_angle('y', y_deg),
+                                                   quaternion_from_axis_angle('x', x_deg)))
+
+
+def quaternion_to_matrix(quaternion):
+    """Однородная матрица поворота 4x4 из единичного кватерниона."""
+    w, x, y, z = np.asarray(quaternion, dtype=float).tolist()
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y), 0],
+        [2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x), 0],
+        [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y), 0],
+        [0, 0, 0, 1]
+    ])
+
+
+def quaternions_to_matrices(quaternions):
+    """Стек матриц поворота (T, 4, 4) из кватернионов (T, 4)."""
+    w, x, y, z = np.asarray(quaternions, dtype=float).T
+    matrices = np.zeros((len(w), 4, 4))
+    matrices[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    matrices[:, 0, 1] = 2 * (x * y - w * z)
+    matrices[:, 0, 2] = 2 * (x * z + w * y)
+    matrices[:, 1, 0] = 2 * (x * y + w * z)
+    matrices[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    matrices[:, 1, 2] = 2 * (y * z - w * x)
+    matrices[:, 2, 0] = 2 * (x * z - w * y)
+    matrices[:, 2, 1] = 2 * (y * z + w * x)
+    matrices[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def slerp(q0, q1, t):
+    """Сферическая интерполяция кватернионов (T, 4) по долям t (T,) кратчайшим путем."""
+    dot = np.sum(q0 * q1, axis=-1)
+    q1 = np.where(dot[:, None] < 0, -q1, q1)
+    theta = np.arccos(np.clip(np.abs(dot), 0.0, 1.0))
+    sin = np.sin(theta)
+    # Для почти совпадающих кватернионов переходим на линейную интерполяцию
+    small = sin < 1e-6
+    safe_sin = np.where(small, 1.0, sin)
+    w0 = np.where(small, 1 - t, np.sin((1 - t) * theta) / safe_sin)
+    w1 = np.where(small, t, np.sin(t * theta) / safe_sin)
+    result = w0[:, None] * q0 + w1[:, None] * q1
+    return result / np.linalg.norm(result, axis=1, keepdims=True)
+
+
+def matrix_to_euler(matrix):
+    """Углы (x, y, z) в градусах для разложения Rz @ Ry @ Rx; при y = ±90° угол x полагается нулем."""
+    sin_y = np.clip(-matrix[2, 0], -1.0, 1.0)
+    if abs(sin_y) < 1 - 1e-9:
+        x = np.arctan2(matrix[2, 1], matrix[2, 2])
+        z = np.arctan2(matrix[1, 0], matrix[0, 0])
+    else:
+        x = 0.0
+        z = np.arctan2(-matrix[0, 1], matrix[1, 1])
+    return tuple(float(np.degrees(angle)) for angle in (x, np.arcsin(sin_y), z))
+
+
+class QuaternionRotation:
+    """Поворот модели, хранимый единичным кватернионом.
+
+    Нажатие клавиши домножает кватернион на небольшой поворот вокруг мировой
+    оси, поэтому блокировки осей, как у трех углов Эйлера, нет. Ошибки
+    округления накапливаются, и раз в renormalize_every поворотов кватернион
+    нормируется. Углы Эйлера для подписи на экране считаются только по запросу.
+    """
+
+    def __init__(self, renormalize_every=32):
+        self.quaternion = np.array([1.0, 0.0, 0.0, 0.0])
+        self.renormalize_every = renormalize_every
+        self.updates = 0
+        self._euler = (0.0, 0.0, 0.0)
+
+    def rotate(self, axis, angle_deg):
+        """Дополнительный поворот на angle_deg вокруг мировой оси 'x'|'y'|'z' или вектора."""
+        self.quaternion = quaternion_multiply(quaternion_from_axis_angle(axis, angle_deg), self.quaternion)
+        self.updates += 1
+        if self.updates % self.renormalize_every == 0:
+            self.quaternion /= np.linalg.norm(self.quaternion)
+        self._euler = None
+
+    def get_euler(self):
+        """Углы (x, y, z) в градусах; после set_euler возвращаются ровно заданные значения."""
+        if self._euler is None:
+            self._euler = matrix_to_euler(quaternion_to_matrix(self.quaternion))
+        return self._euler
+
+    def set_quaternion(self, quaternion):
+        self.quaternion = np.array(quaternion, dtype=float)
+        self._euler = None
+
+    def set_euler(self, x_deg, y_deg, z_deg):
+        self.quaternion = quaternion_from_euler(x_deg, y_deg, z_deg)
+        self._euler = (x_deg, y_deg, z_deg)
+
+    def get_matrix(self):
+        return quaternion_to_matrix(self.quaternion)
+
+
+class EulerAngle:
+    """Угол Эйлера (0 - x, 1 - y, 2 - z) как атрибут объекта, хранящего поворот в self.rotation."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj.rotation.get_euler()[self.index]
+
+    def __set__(self, obj, angle_deg):
+        angles = list(obj.rotation.get_euler())
+        angles[self.index] = float(angle_deg)
+        obj.rotation.set_euler(*angles)
@@ -0,0 +1,114 @@
+import numpy as np
+
+from geometry import clip_segments
+
+
+def new_framebuffer(width, height, background=(255, 255, 255)):
+    """Кадровый буфер (height, width, 3) uint8, залитый цветом фона."""
+    return clear_framebuffer(np.empty((height, width, 3), dtype=np.uint8), background)
+
+
+def clear_framebuffer(framebuffer, background):
+    # Заливаем одну строку и копируем ее целиком: в разы быстрее, чем framebuffer[:] = цвет
+    framebuffer[0] = background
+    framebuffer[1:] = framebuffer[0]
+    return framebuffer
+
+
+def window_to_pixels(points, xlim, ylim, width, height):
+    """Переводит координаты окна просмотра xlim x ylim в пиксели (ось y направлена вниз)."""
+    pixels = np.empty((len(points), 2))
+    pixels[:, 0] = (points[:, 0] - xlim[0]) / (xlim[1] - xlim[0]) * (width - 1)
+    pixels[:, 1] = (ylim[1] - points[:, 1]) / (ylim[1] - ylim[0]) * (height - 1)
+    return pixels
+
+
+def _sample_batches(lengths, batch_size):
+    # Делим ребра на группы так, чтобы в каждой было не больше batch_size отсчетов
+    bounds = np.cumsum(lengths)
+    start = 0
+    while start < len(lengths):
+        offset = bounds[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(bounds, offset + batch_size, side='right')))
+        yield start, stop
+        start = stop
+
+
+def _line_samples(starts, ends):
+    # Отсчеты вдоль главной оси каждого отрезка: по одному на пиксель
+    delta = ends - starts
+    steps = np.ceil(np.abs(delta).max(axis=1)).astype(np.intp)
+    counts = steps + 1
+    edge_idx = np.repeat(np.arange(len(starts)), counts)
+    first = np.cumsum(counts) - counts
+    t = np.arange(counts.sum(), dtype=float)
+    t -= np.repeat(first, counts)
+    t /= np.repeat(np.maximum(steps, 1), counts)
+    xs = np.repeat(starts[:, 0], counts) + t * np.repeat(delta[:, 0], counts)
+    ys = np.repeat(starts[:, 1], counts) + t * np.repeat(delta[:, 1], counts)
+    return xs, ys, edge_idx
+
+
+def rasterize_lines(framebuffer, starts, ends, color, antialiased=False, batch_size=1 << 20):
+    """Рисует отрезки starts[i] -> ends[i] (пиксельные координаты) в кадровый буфер.
+
+    Отрезки сначала отсекаются границами буфера, затем обрабатываются
+    группами не более batch_size отсчетов. В режиме antialiased покрытие
+    пикселей считается по алгоритму Ву: каждый отсчет делит яркость между
+    двумя соседними пикселями, для пикселя берется наибольшее покрытие в
+    группе, и цвет смешивается с буфером один раз на группу.
+    """
+    if not framebuffer.flags.c_contiguous:
+        raise ValueError("Кадровый буфер должен быть непрерывным массивом")
+    height, width = framebuffer.shape[:2]
+    starts, ends, _ = clip_segments(starts, ends, (0, width - 1), (0, height - 1))
+    if not len(starts):
+        return framebuffer
+    pixels = framebuffer.reshape(-1, framebuffer.shape[2])
+    color = np.asarray(color, dtype=np.float32)
+    lengths = np.ceil(np.abs(ends - starts).max(axis=1)).astype(np.intp) + 1
+    coverage = np.zeros(height * width, dtype=np.float32) if antialiased else None
+
+    for start, stop in _sample_batches(lengths, batch_size):
+        xs, ys, edge_idx = _line_samples(starts[start:stop], ends[start:stop])
+        if not antialiased:
+            cols = np.rint(xs).astype(np.intp)
+            rows = np.rint(ys).astype(np.intp)
+            pixels[rows * width + cols] = color
+            continue
+        # Главная ось округляется до пикселя, по второй оси яркость делится между двумя соседями
+        delta = ends[start:stop] - starts[start:stop]
+        edge_steep = np.abs(delta[:, 1]) > np.abs(delta[:, 0])
+        d_major = np.where(edge_steep, delta[:, 1], delta[:, 0])
+        d_minor = np.where(edge_steep, delta[:, 0], delta[:, 1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(d_major != 0, d_minor / d_major, 0.0)[edge_idx]
+        steep = edge_steep[edge_idx]
+        major = np.where(steep, ys, xs)
+        minor = np.where(steep, xs, ys)
+        major_px = np.rint(major)
+        minor = minor + (major_px - major) * slope
+        minor_px = np.floor(minor)
+        frac = minor - minor_px
+        major_px = major_px.astype(np.intp)
+        minor_px = minor_px.astype(np.intp)
+        cols = np.where(steep, minor_px, major_px)
+        rows = np.where(steep, major_px, minor_px)
+        cols = np.concatenate((cols, cols + steep))
+        rows = np.concatenate((rows, rows + ~steep))
+        weight = np.concatenate((1 - frac, frac)).astype(np.float32)
+        inside = (cols >= 0) & (rows >= 0) & (cols < width) & (rows < height) & (weight > 0)
+        index = rows[inside] * width + cols[inside]
+        weight = weight[inside]
+        # Наибольшее покрытие для каждого пикселя; повторные индексы дают одинаковый результат смешивания
+        np.maximum.at(coverage, index, weight)
+        alpha = coverage[index][:, None]
+        pixels[index] = np.rint(pixels[index] * (1 - alpha) + color * alpha).astype(np.uint8)
+        coverage[index] = 0
+    return framebuffer
+
+
+def rasterize_wireframe(pixel_points, edges, framebuffer, color, antialiased=False):
+    """Рисует каркас: вершины pixel_points (N, 2) в пикселях и ребра edges (E, 2)."""
+    return rasterize_lines(framebuffer, pixel_points[edges[:, 0]], pixel_points[edges[:, 1]],
+                           color, antialiased)
@@ -0,0 +1,71 @@
+import time
+
+
+class FrameScheduler:
+    """Планировщик кадров: объединяет события ввода и рисует не чаще target_fps.
+
+    Обработчик клавиш только меняет состояние и вызывает request(); сам кадр
+    рисуется по таймеру холста не чаще одного раза за 1 / fps секунд, поэтому
+    автоповтор клавиши не копит очередь полных перерисовок. Пока таймер не
+    подключен через attach(), request() рисует кадр сразу.
+
+    Счетчики: events_received - сколько запросов пришло, frames_rendered -
+    сколько кадров нарисовано, frames_skipped - сколько запросов слились с уже
+    ожидающим кадром и не получили отдельной перерисовки.
+    """
+
+    def __init__(self, render, fps=60):
+        self.render = render
+        self.fps = fps
+        self.timer = None
+        self.pending = False
+        self.last_frame_time = None
+        self.events_received = 0
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+
+    def attach(self, canvas):
+        self.timer = canvas.new_timer(interval=self.get_frame_interval_ms())
+        self.timer.single_shot = True
+        self.timer.add_callback(self.tick)
+
+    def set_fps(self, fps):
+        """Меняет частоту кадров; ожидающий кадр перезапускается с новым интервалом."""
+        if fps <= 0:
+            raise ValueError(f"Частота кадров должна быть положительной: {fps}")
+        self.fps = fps
+        if self.timer is not None:
+            self.timer.interval = self.get_frame_interval_ms()
+            if self.pending:
+                self.timer.start()
+
+    def get_frame_interval_ms(self):
+        return max(1, int(1000 / self.fps))
+
+    def request(self):
+        self.events_received += 1
+        if self.pending:
+            self.frames_skipped += 1
+            return
+        self.pending = True
+        if self.timer is None:
+            self.tick()
+            return
+        delay = 0.0
+        if self.last_frame_time is not None:
+            delay = self.last_frame_time + 1 / self.fps - time.perf_counter()
+        self.timer.interval = max(1, int(delay * 1000))
+        self.timer.start()
+
+    def tick(self):
+        if not self.pending:
+            return
+        self.pending = False
+        self.last_frame_time = time.perf_counter()
+        self.render()
+        self.frames_rendered += 1
+
+    def get_stats(self):
+        return {'events_received': self.events_received,
+                'frames_rendered': self.frames_rendered,
+                'frames_skipped': self.frames_skipped}
@@ -0,0 +1,172 @@
+"""Анимация крипера по ключевым кадрам с заранее посчитанными матрицами и вершинами.
+
+Пример (крипер заходит слева, разворачивается и приближается):
+    timeline = Timeline(creeper)
+    timeline.add_keyframe(0.0, translation=(-30, 0, 0), rotation=(0, 90, 0))
+    timeline.add_keyframe(2.0, translation=(0, 0, 0), rotation=(0, 0, 0))
+    timeline.add_keyframe(3.0, scale=1.8)
+    animation = timeline.bake(fps=30)
+    animation.play(creeper)                      # в окне
+    render_frames(creeper, animation.frames(), 'frames')   # без окна
+"""
+import numpy as np
+
+from quaternion import QuaternionRotation, quaternion_from_euler, quaternions_to_matrices, slerp
+from transforms import (point_coords, rotation_matrices_2d, scale_matrices, transform_points_batch,
+                        translation_matrices)
+
+
+def _track_names(creeper):
+    names = ['translation']
+    names += ['scale'] if hasattr(creeper, 'scale') else ['scale_x', 'scale_y', 'scale_z']
+    names.append('rotation' if isinstance(getattr(creeper, 'rotation', None), QuaternionRotation)
+                 else 'rotation_angle')
+    return names
+
+
+class Timeline:
+    """Ключевые кадры над состоянием крипера: перенос, масштаб и поворот.
+
+    Перенос, масштаб и угол 2D-поворота интерполируются линейно, поворот
+    3D-крипера - сферически (slerp) по кратчайшему пути, поэтому оборот больше
+    180° нужно разбивать на несколько ключей. Параметр, не заданный в ключе,
+    берется из текущего состояния крипера в начале и держится между ключами.
+    """
+
+    def __init__(self, creeper):
+        self.creeper = creeper
+        self.names = _track_names(creeper)
+        self.keyframes = []
+
+    def add_keyframe(self, time, **state):
+        """Ключ в момент time (секунды); rotation для 3D - углы (x, y, z) в градусах или кватернион."""
+        unknown = set(state) - set(self.names)
+        if unknown:
+            raise ValueError(f"Неизвестные параметры ключа: {sorted(unknown)}, доступны {self.names}")
+        if 'rotation' in state and np.size(state['rotation']) == 3:
+            state['rotation'] = quaternion_from_euler(*state['rotation'])
+        self.keyframes.append((float(time), {name: np.asarray(value, dtype=float) for name, value in state.items()}))
+        self.keyframes.sort(key=lambda keyframe: keyframe[0])
+        return self
+
+    def get_duration(self):
+        return self.keyframes[-1][0] - self.keyframes[0][0] if self.keyframes else 0.0
+
+    def _current_value(self, name):
+        if name == 'rotation':
+            return self.creeper.rotation.quaternion.copy()
+        return np.asarray(getattr(self.creeper, name), dtype=float).copy()
+
+    def _track(self, name):
+        keys = [(time, state[name]) for time, state in self.keyframes if name in state]
+        if not keys or keys[0][0] > self.keyframes[0][0]:
+            keys.insert(0, (self.keyframes[0][0], self._current_value(name)))
+        times = np.array([time for time, _ in keys])
+        values = np.array([value for _, value in keys]).reshape(len(keys), -1)
+        return times, values
+
+    def sample(self, times):
+        """Значения всех параметров в моменты times, словарь {имя: массив (T, ...)}."""
+        times = np.asarray(times, dtype=float)
+        samples = {}
+        for name in self.names:
+            key_times, values = self._track(name)
+            if name == 'rotation':
+                # Знаки соседних кватернионов согласуются, чтобы slerp шел кратчайшим путем
+                for k in range(1, len(values)):
+                    if np.dot(values[k - 1], values[k]) < 0:
+                        values[k] = -values[k]
+                segment = np.clip(np.searchsorted(key_times, times, side='right') - 1, 0, max(len(values) - 2, 0))
+                next_segment = np.minimum(segment + 1, len(values) - 1)
+                span = key_times[next_segment] - key_times[segment]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    u = np.clip(np.where(span > 0, (times - key_times[segment]) / span, 0.0), 0.0, 1.0)
+                samples[name] = slerp(values[segment], values[next_segment], u)
+            else:
+                columns = [np.interp(times, key_times, values[:, k]) for k in range(values.shape[1])]
+                sampled = np.column_stack(columns)
+                samples[name] = sampled[:, 0] if np.ndim(self._current_value(name)) == 0 else sampled
+        return samples
+
+    def get_matrices(self, samples):
+        """Составные матрицы всех кадров (T, D, D) в том же порядке, что get_transformation_matrix."""
+        creeper = self.creeper
+        dim = point_coords(creeper.original_points).shape[1] + 1
+        if 'rotation' in samples:
+            rotation = quaternions_to_matrices(samples['rotation'])
+        else:
+            rotation = rotation_matrices_2d(samples['rotation_angle'])
+        if 'scale' in samples:
+            scale = scale_matrices(samples['scale'], dim)
+        else:
+            scale = scale_matrices(np.column_stack((samples['scale_x'], samples['scale_y'], samples['scale_z'])), dim)
+        matrices = translation_matrices(samples['translation']) @ rotation @ scale
+        if hasattr(creeper, 'get_reflection_y_matrix'):
+            matrices = matrices @ creeper.get_reflection_y_matrix()
+        return matrices
+
+    def bake(self, fps=30):
+        """Матрицы (T, D, D), вершины (T, N, D) и видимость всех кадров одним пакетом."""
+        if not self.keyframes:
+            raise ValueError("Нет ключевых кадров")
+        start = self.keyframes[0][0]
+        count = int(round(self.get_duration() * fps)) + 1
+        times = start + np.arange(count) / fps
+        samples = self.sample(times)
+        matrices = self.get_matrices(samples)
+        vertices = transform_points_batch(matrices, self.creeper.original_points)
+        if hasattr(self.creeper, 'get_view_window'):
+            window = self.creeper.get_view_window()
+        else:
+            creeper = self.creeper
+            window = np.array((creeper.fixed_xlim, creeper.fixed_ylim, creeper.fixed_zlim), dtype=float).T
+        visibility = self.creeper.bounds.classify(matrices, *window)
+        return BakedAnimation(times, fps, samples, matrices, vertices, np.atleast_1d(visibility))
+
+
+class BakedAnimation:
+    """Готовые кадры анимации: при показе матрицы не пересобираются, вершины берутся из массива."""
+
+    def __init__(self, times, fps, samples, matrices, vertices, visibility):
+        self.times = times
+        self.fps = fps
+        self.samples = samples
+        self.matrices = matrices
+        self.vertices = vertices
+        self.visibility = visibility
+        self.timer = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def show_frame(self, creeper, index):
+        # Состояние крипера обновляется только для подписи и для продолжения с клавиатуры
+        for name, values in self.samples.items():
+            if name == 'rotation':
+                creeper.rotation.set_quaternion(values[index])
+            elif np.ndim(values[index]):
+                setattr(creeper, name, values[index].copy())
+            else:
+                setattr(creeper, name, float(values[index]))
+        creeper.update_plot(self.vertices[index], self.visibility[index])
+
+    def frames(self):
+        """Кадры для offscreen.render_frames: каждый сам показывает себя на крипере."""
+        return [lambda creeper, index=index: self.show_frame(creeper, index) for index in range(len(self))]
+
+    def play(self, creeper, loop=True):
+        """Воспроизведение в окне по таймеру холста с частотой fps."""
+        state = {'index': 0}
+
+        def tick():
+            self.show_frame(creeper, state['index'])
+            state['index'] += 1
+            if state['index'] == len(self):
+                if not loop:
+                    self.timer.stop()
+                state['index'] = 0
+
+        self.timer = creeper.fig.canvas.new_timer(interval=int(1000 / self.fps))
+        self.timer.add_callback(tick)
+        self.timer.start()
+        return self.timer
@@ -0,0 +1,243 @@
+import numpy as np
+
+
+def transform_points(matrix, points, out=None):
+    """Применяет матрицу преобразования ко всем точкам (N, 3|4) одной матричной операцией.
+
+    Точки хранятся строками, поэтому вместо matrix @ p для каждой точки
+    считается points @ matrix.T. Если передан out, результат пишется в него.
+    CompactPoints дают однородный результат (N, D) для любой, в том числе
+    проективной, матрицы.
+    """
+    matrix = np.asarray(matrix)
+    if isinstance(points, CompactPoints):
+        return _transform_coords(matrix, points.coords.T, out)
+    points = np.asarray(points)
+    if points.ndim != 2 or matrix.shape != (points.shape[1], points.shape[1]):
+        raise ValueError(f"Матрица {matrix.shape} не подходит к точкам {points.shape}")
+    if out is None:
+        out = np.empty(points.shape, dtype=np.result_type(matrix, points, float))
+    elif out.shape != points.shape:
+        raise ValueError(f"Буфер {out.shape} не совпадает с формой точек {points.shape}")
+    return np.matmul(points, matrix.T, out=out)
+
+
+def _transform_coords(matrices, coords, out):
+    # Точки без столбца единиц: вклад этого столбца - последний столбец матрицы, он прибавляется
+    dim = coords.shape[1] + 1
+    if matrices.shape[-2:] != (dim, dim):
+        raise ValueError(f"Матрицы {matrices.shape} не подходят к точкам размерности {coords.shape[1]}")
+    shape = matrices.shape[:-2] + (len(coords), dim)
+    if out is None:
+        out = np.empty(shape, dtype=np.result_type(matrices, float))
+    elif out.shape != shape:
+        raise ValueError(f"Буфер {out.shape} не совпадает с формой результата {shape}")
+    np.matmul(coords, np.swapaxes(matrices[..., :, :-1], -1, -2), out=out)
+    out += matrices[..., None, :, -1]
+    return out
+
+
+def point_coords(points):
+    """Координаты (N, D - 1) без столбца единиц: вид на CompactPoints или на однородные точки (N, D)."""
+    if isinstance(points, CompactPoints):
+        return points.coords.T
+    return np.asarray(points)[:, :-1]
+
+
+class CompactPoints:
+    """Компактное хранение вершин: отдельный непрерывный массив на каждую координату, без столбца единиц.
+
+    coords имеет форму (D - 1, N) и по умолчанию тип float32, то есть вершина
+    (x, y, z) занимает 12 байт вместо 32 у однородной строки float64.
+    """
+
+    def __init__(self, coords):
+        self.coords = np.ascontiguousarray(coords)
+
+    @classmethod
+    def from_homogeneous(cls, points, dtype=np.float32):
+        """Из однородных точек (N, D), последний столбец которых равен 1."""
+        points = np.asarray(points)
+        return cls(points[:, :-1].T.astype(dtype))
+
+    def to_homogeneous(self, dtype=float):
+        points = np.ones((len(self), self.coords.shape[0] + 1), dtype=dtype)
+        points[:, :-1] = self.coords.T
+        return points
+
+    def take(self, indices):
+        """CompactPoints из вершин с индексами indices."""
+        return CompactPoints(self.coords[:, indices])
+
+    def copy(self):
+        # np.array, а не coords.copy(): копия отображенного кэша не должна оставаться memmap
+        return CompactPoints(np.array(self.coords))
+
+    def __len__(self):
+        return self.coords.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.coords.nbytes
+
+
+def transform_compact(matrix, compact, out=None):
+    """Применяет аффинную матрицу (D, D) к CompactPoints: линейная часть умножением, перенос сложением.
+
+    Возвращает координаты (D - 1, N) в типе исходного массива. Для проективных
+    матриц (последняя строка не [0, ..., 0, 1]) нужен обычный transform_points.
+    """
+    matrix = np.asarray(matrix)
+    coords = compact.coords
+    dim = coords.shape[0]
+    if matrix.shape != (dim + 1, dim + 1):
+        raise ValueError(f"Матрица {matrix.shape} не подходит к точкам размерности {dim}")
+    if np.any(matrix[-1, :-1] != 0) or matrix[-1, -1] != 1:
+        raise ValueError("Компактные точки поддерживают только аффинные матрицы")
+    if out is None:
+        out = np.empty_like(coords)
+    elif out.shape != coords.shape:
+        raise ValueError(f"Буфер {out.shape} не совпадает с формой координат {coords.shape}")
+    np.matmul(matrix[:-1, :-1].astype(coords.dtype), coords, out=out)
+    out += matrix[:-1, -1].astype(coords.dtype)[:, None]
+    return out
+
+
+def transform_points_batch(matrices, points, out=None):
+    """Применяет стек матриц (M, D, D) к общим точкам (N, D) или CompactPoints, результат (M, N, D)."""
+    matrices = np.asarray(matrices)
+    if isinstance(points, CompactPoints):
+        if matrices.ndim != 3:
+            raise ValueError(f"Ожидался стек матриц (M, D, D), получено {matrices.shape}")
+        return _transform_coords(matrices, points.coords.T, out)
+    points = np.asarray(points)
+    if matrices.ndim != 3 or points.ndim != 2 or matrices.shape[1:] != (points.shape[1], points.shape[1]):
+        raise ValueError(f"Матрицы {matrices.shape} не подходят к точкам {points.shape}")
+    shape = (matrices.shape[0],) + points.shape
+    if out is None:
+        out = np.empty(shape, dtype=np.result_type(matrices, points, float))
+    elif out.shape != shape:
+        raise ValueError(f"Буфер {out.shape} не совпадает с формой результата {shape}")
+    return np.matmul(points, matrices.transpose(0, 2, 1), out=out)
+
+
+def scale_matrices(scales, dim):
+    """Стек матриц масштаба (M, dim, dim) из коэффициентов (M,) или (M, dim - 1)."""
+    scales = np.asarray(scales, dtype=float)
+    if scales.ndim == 1:
+        scales = np.repeat(scales[:, None], dim - 1, axis=1)
+    matrices = np.zeros((len(scales), dim, dim))
+    axes = np.arange(dim - 1)
+    matrices[:, axes, axes] = scales
+    matrices[:, -1, -1] = 1.0
+    return matrices
+
+
+def translation_matrices(translations):
+    """Стек матриц переноса из векторов смещения (M, 2) или (M, 3)."""
+    translations = np.asarray(translations, dtype=float)
+    dim = translations.shape[1] + 1
+    matrices = np.broadcast_to(np.eye(dim), (len(translations), dim, dim)).copy()
+    matrices[:, :-1, -1] = translations
+    return matrices
+
+
+def rotation_matrices_2d(angles_deg):
+    """Стек матриц поворота 3x3 в плоскости из углов (M,) в градусах."""
+    angles_rad = np.radians(np.asarray(angles_deg, dtype=float))
+    cos, sin = np.cos(angles_rad), np.sin(angles_rad)
+    matrices = np.zeros((len(angles_rad), 3, 3))
+    matrices[:, 0, 0] = cos
+    matrices[:, 0, 1] = -sin
+    matrices[:, 1, 0] = sin
+    matrices[:, 1, 1] = cos
+    matrices[:, 2, 2] = 1.0
+    return matrices
+
+
+def rotation_matrices_3d(angles_deg):
+    """Стек матриц поворота 4x4 Rz @ Ry @ Rx из углов (M, 3) = (x, y, z) в градусах."""
+    angles_rad = np.radians(np.asarray(angles_deg, dtype=float))
+    cos, sin = np.cos(angles_rad), np.sin(angles_rad)
+    cx, cy, cz = cos.T
+    sx, sy, sz = sin.T
+    matrices = np.zeros((len(angles_rad), 4, 4))
+    matrices[:, 0, 0] = cz * cy
+    matrices[:, 0, 1] = cz * sy * sx - sz * cx
+    matrices[:, 0, 2] = cz * sy * cx + sz * sx
+    matrices[:, 1, 0] = sz * cy
+    matrices[:, 1, 1] = sz * sy * sx + cz * cx
+    matrices[:, 1, 2] = sz * sy * cx - cz * sx
+    matrices[:, 2, 0] = -sy
+    matrices[:, 2, 1] = cy * sx
+    matrices[:, 2, 2] = cy * cx
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+class TransformCache:
+    """Кэш составной матрицы модели и преобразованных вершин.
+
+    Каждая компонента цепочки (масштаб, поворот, перенос, ...) запоминается
+    вместе с параметрами, из которых она построена, и пересобирается только
+    когда эти параметры изменились. Произведение цепочки пересчитывается лишь
+    при изменении хотя бы одной компоненты, а преобразованные вершины
+    хранятся до следующего изменения матрицы или исходных точек.
+    """
+
+    def __init__(self):
+        self._components = {}
+        self._order = None
+        self._matrix = None
+        self._matrix_version = 0
+        self._points = None
+        self._points_source = None
+        self._points_version = None
+        self.changed = ()
+        # Номер состояния: растет с каждой новой матрицей и после invalidate
+        self.version = 0
+        self.stats = {'components': 0, 'compositions': 0, 'transforms': 0}
+
+    def compose(self, parts):
+        """Возвращает произведение цепочки parts = [(имя, фабрика, аргументы), ...] слева направо."""
+        order = tuple(name for name, _, _ in parts)
+        changed = []
+        for name, factory, args in parts:
+            cached = self._components.get(name)
+            if cached is None or cached[0] != args:
+                self._components[name] = (args, factory(*args))
+                self.stats['components'] += 1
+                changed.append(name)
+        self.changed = tuple(changed)
+        if changed or self._matrix is None or order != self._order:
+            matrix = self._components[order[0]][1]
+            for name in order[1:]:
+                matrix = matrix @ self._components[name][1]
+            self._order = order
+            self._matrix = matrix
+            self._matrix_version += 1
+            self.version += 1
+            self.stats['compositions'] += 1
+        return self._matrix
+
+    def apply(self, points):
+        """Возвращает вершины, преобразованные последней составленной матрицей (только для чтения).
+
+        Для CompactPoints результат - представление (N, D - 1) без столбца единиц.
+        """
+        if (self._points is None or self._points_source is not points
+                or self._points_version != self._matrix_version):
+            if isinstance(points, CompactPoints):
+                self._points = transform_compact(self._matrix, points).T
+            else:
+                self._points = transform_points(self._matrix, points)
+            self._points.flags.writeable = False
+            self._points_source = points
+            self._points_version = self._matrix_version
+            self.stats['transforms'] += 1
+        return self._points
+
+    def invalidate(self):
+        """Сбрасывает кэш вершин, например после правки исходных точек на месте."""
+        self._points = None
+        self.version += 1